@@ -6,8 +6,11 @@ pragma experimental ABIEncoderV2;
 import "OpenZeppelin/openzeppelin-contracts-upgradeable@3.4.0/contracts/utils/AddressUpgradeable.sol";
 import "OpenZeppelin/openzeppelin-contracts-upgradeable@3.4.0/contracts/math/MathUpgradeable.sol";
 import "OpenZeppelin/openzeppelin-contracts-upgradeable@3.4.0/contracts/math/SafeMathUpgradeable.sol";
+import "OpenZeppelin/openzeppelin-contracts-upgradeable@3.4.0/contracts/utils/SafeCastUpgradeable.sol";
+import "OpenZeppelin/openzeppelin-contracts-upgradeable@3.4.0/contracts/cryptography/ECDSAUpgradeable.sol";
 import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/token/ERC20/IERC20.sol";
 import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/token/ERC20/SafeERC20.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/drafts/IERC20Permit.sol";
 import "OpenZeppelin/openzeppelin-contracts-upgradeable@3.4.0/contracts/token/ERC20/ERC20Upgradeable.sol";
 import "OpenZeppelin/openzeppelin-contracts-upgradeable@3.4.0/contracts/utils/ReentrancyGuardUpgradeable.sol";
 import "../../interfaces/IFund.sol";
@@ -20,6 +23,7 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
   using SafeERC20 for IERC20;
   using AddressUpgradeable for address;
   using SafeMathUpgradeable for uint256;
+  using SafeCastUpgradeable for uint256;
 
   event Withdraw(address indexed beneficiary, uint256 amount, uint256 fee);
   event Deposit(address indexed beneficiary, uint256 amount);
@@ -28,28 +32,98 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
   event FundManagerRewards(uint256 profitTotal, uint256 fundManagerFee);
   event PlatformRewards(uint256 lastBalance, uint256 timeElapsed, uint256 platformFee);
   event HardWorkDone(uint256 totalValueLocked, uint256 pricePerShare);
+  event DepositRequested(address indexed beneficiary, uint256 amount, uint256 epoch);
+  event WithdrawRequested(address indexed beneficiary, uint256 numberOfShares, uint256 epoch);
+  event EpochSettled(uint256 epoch, uint256 pricePerShare, uint256 mintedShares, uint256 withdrawnUnderlying);
+  event Claim(address indexed beneficiary, uint256 shares, uint256 amount, uint256 fee);
+  event FeesClaimed(address indexed recipient, uint256 amount);
+  event FeesMinted(address indexed recipient, uint256 amount, uint256 shares);
 
   address internal constant ZERO_ADDRESS = address(0);
 
+  // EIP-2612 permit on the shares
+  bytes32 public constant PERMIT_TYPEHASH = keccak256("Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)");
+  bytes32 internal constant DOMAIN_TYPEHASH = keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)");
+
   uint256 internal constant MAX_BPS = 10000;   // 100% in basis points
   uint256 internal constant SECS_PER_YEAR = 31556952;  // 365.25 days from yearn
+  uint256 internal constant APY_PRECISION = 1e18;  // 100% in the APY views
   
   uint256 internal constant MAX_PLATFORM_FEE = 500;  // 5% (annual on AUM), goes to governance/treasury
   uint256 internal constant MAX_PERFORMANCE_FEE_FUND = 1000;  // 10% on profits, goes to fund manager
   uint256 internal constant MAX_PERFORMANCE_FEE_STRATEGY = 1000;  // 10% on profits, goes to strategy creator
   uint256 internal constant MAX_WITHDRAWAL_FEE = 100;  // 1%, goes to governance/treasury
 
+  // packed into a single storage slot
   struct StrategyParams {
-    uint256 weightage;  // weightage of total assets in fund this strategy can access (in BPS) (5000 for 50%)
-    uint256 performanceFeeStrategy;   // in BPS, fee on yield of the strategy, goes to strategy creator
-    uint256 activation;  // timestamp when strategy is added
-    uint256 lastBalance;    // balance at last hard work
+    uint16 weightage;  // weightage of total assets in fund this strategy can access (in BPS) (5000 for 50%)
+    uint16 performanceFeeStrategy;   // in BPS, fee on yield of the strategy, goes to strategy creator
+    uint64 activation;  // timestamp when strategy is added
+    uint128 lastBalance;    // balance at last hard work
+    uint32 indexInList;
+  }
+
+  // layout of the strategy records before they were packed, only read by finalizeUpgrade to migrate existing proxies
+  struct LegacyStrategyParams {
+    uint256 weightage;
+    uint256 performanceFeeStrategy;
+    uint256 activation;
+    uint256 lastBalance;
     uint256 indexInList;
   }
 
-  mapping(address => StrategyParams) public strategies;
+  mapping(address => LegacyStrategyParams) internal legacyStrategies;
   address[] public strategyList;
 
+  // requests queued in an epoch, settled together at a single price per share in doHardWork
+  struct Epoch {
+    uint256 deposits;   // underlying requested for deposit
+    uint256 withdrawals;    // shares requested for withdrawal
+    uint256 mintedShares;   // shares minted for the deposits at settlement
+    uint256 withdrawnUnderlying;    // underlying set aside for the withdrawals at settlement
+  }
+
+  struct PendingRequest {
+    uint256 epoch;
+    uint256 deposit;    // in underlying
+    uint256 withdrawal;   // in shares
+  }
+
+  mapping(uint256 => Epoch) public epochs;
+  mapping(address => PendingRequest) public pendingRequests;
+
+  mapping(address => StrategyParams) public strategies;
+
+  // strategies to pull from, in order, when the fund is short on a withdrawal
+  address[] public withdrawalQueue;
+  // relative cost of withdrawing from a strategy in the queue, the queue is ordered by it
+  mapping(address => uint256) public withdrawalCostHint;
+
+  // fees owed to each recipient (strategy creators, fund manager, platform rewards), paid out by claimFees
+  mapping(address => uint256) public accruedFees;
+
+  // drift from the target tolerated by a rebalance, in BPS of the target and in underlying
+  struct RebalanceBand {
+    uint16 threshold;
+    uint128 minAmount;
+  }
+
+  // transfer planned for a strategy by getRebalancePlan
+  struct RebalanceTransfer {
+    address strategy;
+    uint256 currentBalance;
+    uint256 targetBalance;
+    uint256 withdrawal;
+    uint256 deposit;
+    bool withinBand;
+  }
+
+  // band of a strategy, overrides the band of the fund when set
+  mapping(address => RebalanceBand) public strategyRebalanceBands;
+
+  // EIP-2612 nonces of the share holders, after the existing storage so that deployed funds can be upgraded
+  mapping(address => uint256) public nonces;
+
   constructor() public {
   }
 
@@ -90,6 +164,16 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     _;
   }
 
+  modifier whenNotQueued() {
+    require(!_queuedMode(), "Fund is in queued mode");
+    _;
+  }
+
+  modifier whenQueued() {
+    require(_queuedMode(), "Fund is not in queued mode");
+    _;
+  }
+
   function fundManager() external view returns(address) {
     return _fundManager();
   }
@@ -106,6 +190,11 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     return strategyList.length;
   }
 
+  modifier whenNoHardWorkInProgress() {
+    require(_hardWorkCursor() == 0, "Hard work in progress");
+    _;
+  }
+
   modifier whenStrategyDefined() {
     require(getStrategyCount() > 0, "Strategies must be defined");
     _;
@@ -121,15 +210,40 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
 
   /*
   * Returns the underlying balance currently in the fund.
+  * Excludes queued deposits that are not settled yet, settled withdrawals that are not claimed yet
+  * and fees that are accrued but not claimed yet.
   */
   function underlyingBalanceInFund() internal view returns (uint256) {
-    return IERC20(_underlying()).balanceOf(address(this));
+    uint256 balance = IERC20(_underlying()).balanceOf(address(this));
+    uint256 reserved = epochs[_currentEpoch()].deposits.add(_claimableUnderlying()).add(_totalAccruedFees());
+    return balance > reserved ? balance.sub(reserved) : 0;
+  }
+
+  /*
+  * Returns true if the strategy balances recorded at the last hard work can be used
+  * instead of querying every strategy. The cache expires after maxCachedBalanceAge seconds.
+  */
+  function cachedBalancesValid() internal view returns (bool) {
+    return _useCachedBalances()
+        && _lastHardworkTimestamp() > 0
+        && block.timestamp <= _lastHardworkTimestamp().add(_maxCachedBalanceAge());
   }
 
   /* Returns the current underlying (e.g., DAI's) balance together with
    * the invested amount (if DAI is invested elsewhere by the strategies).
+   * Uses the strategy balances cached at the last hard work when enabled and not stale.
   */
   function underlyingBalanceWithInvestment() internal view returns (uint256) {
+    if (cachedBalancesValid()) {
+      return underlyingBalanceInFund().add(_totalLastBalance());
+    }
+    return underlyingBalanceWithInvestmentLive();
+  }
+
+  /*
+  * Same as underlyingBalanceWithInvestment but always queries the strategies.
+  */
+  function underlyingBalanceWithInvestmentLive() internal view returns (uint256) {
     uint256 underlyingBalance = underlyingBalanceInFund();
     if (getStrategyCount() == 0) {
       // initial state, when not set
@@ -170,7 +284,16 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     return strategies[strategy].weightage > 0;
   }
 
-  function addStrategy(address newStrategy, uint256 weightage, uint256 performanceFeeStrategy) external onlyFundManagerOrGovernance {
+  /*
+  * Updates the balance recorded for a strategy together with the cached total of all strategies.
+  */
+  function updateLastBalance(address strategy, uint256 newBalance) internal {
+    StrategyParams storage params = strategies[strategy];
+    _setTotalLastBalance(_totalLastBalance().sub(params.lastBalance).add(newBalance));
+    params.lastBalance = newBalance.toUint128();
+  }
+
+  function addStrategy(address newStrategy, uint256 weightage, uint256 performanceFeeStrategy) external onlyFundManagerOrGovernance whenNoHardWorkInProgress {
     require(newStrategy != ZERO_ADDRESS, "new newStrategy cannot be empty");
     require(IStrategy(newStrategy).fund() == address(this), "The strategy does not belong to this fund");
     require(isActiveStrategy(newStrategy) == false, "This strategy is already active in this fund");
@@ -178,11 +301,14 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     require(_totalWeightInStrategies().add(weightage) <= _maxInvestmentInStrategies(), "Total investment can't be above 90%");
     require(performanceFeeStrategy <= MAX_PERFORMANCE_FEE_STRATEGY, "Performance fee too high");
     
-    strategies[newStrategy].weightage = weightage;
+    strategies[newStrategy] = StrategyParams({
+      weightage: weightage.toUint16(),
+      performanceFeeStrategy: performanceFeeStrategy.toUint16(),
+      activation: block.timestamp.toUint64(),
+      lastBalance: 0,
+      indexInList: getStrategyCount().toUint32()
+    });
     _setTotalWeightInStrategies(_totalWeightInStrategies().add(weightage));
-    strategies[newStrategy].activation = block.timestamp;
-    strategies[newStrategy].indexInList = getStrategyCount();
-    strategies[newStrategy].performanceFeeStrategy = performanceFeeStrategy;
     strategyList.push(newStrategy);
     _setShouldRebalance(true);
 
@@ -190,31 +316,44 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     IERC20(_underlying()).safeApprove(newStrategy, uint256(~0));
   }
 
-  function removeStrategy(address activeStrategy) external onlyFundManagerOrGovernance {
+  function removeStrategy(address activeStrategy) external onlyFundManagerOrGovernance whenNoHardWorkInProgress {
     require(activeStrategy != ZERO_ADDRESS, "current strategy cannot be empty");
     require(isActiveStrategy(activeStrategy), "This strategy is not active in this fund");
 
-    _setTotalWeightInStrategies(_totalWeightInStrategies().sub(strategies[activeStrategy].weightage));
-    uint256 totalStrategies = getStrategyCount();
-    for (uint256 i=strategies[activeStrategy].indexInList; i<totalStrategies-1; i++) {
-      strategyList[i] = strategyList[i+1];
-      strategies[strategyList[i]].indexInList = i;
+    StrategyParams memory params = strategies[activeStrategy];
+    _setTotalWeightInStrategies(_totalWeightInStrategies().sub(params.weightage));
+    uint256 lastIndex = getStrategyCount() - 1;
+    if (_preserveStrategyOrder()) {
+      // shift the later strategies to keep the order of the list
+      for (uint256 i=params.indexInList; i<lastIndex; i++) {
+        strategyList[i] = strategyList[i+1];
+        strategies[strategyList[i]].indexInList = uint32(i);
+      }
+    } else if (params.indexInList < lastIndex) {
+      // move the last strategy into the freed position
+      address lastStrategy = strategyList[lastIndex];
+      strategyList[params.indexInList] = lastStrategy;
+      strategies[lastStrategy].indexInList = params.indexInList;
     }
     strategyList.pop();
+    removeFromWithdrawalQueue(activeStrategy);
+    updateLastBalance(activeStrategy, 0);
     delete strategies[activeStrategy];
+    delete strategyRebalanceBands[activeStrategy];
     IERC20(_underlying()).safeApprove(activeStrategy, 0);
     IStrategy(activeStrategy).withdrawAllToFund();
     _setShouldRebalance(true);
   }
 
-  function updateStrategyWeightage(address activeStrategy, uint256 newWeightage) external onlyFundManagerOrGovernance {
+  function updateStrategyWeightage(address activeStrategy, uint256 newWeightage) external onlyFundManagerOrGovernance whenNoHardWorkInProgress {
     require(activeStrategy != ZERO_ADDRESS, "current strategy cannot be empty");
     require(isActiveStrategy(activeStrategy), "This strategy is not active in this fund");
     require(newWeightage > 0, "The weightage should be greater than 0");
-    require(_totalWeightInStrategies().sub(strategies[activeStrategy].weightage).add(newWeightage) <= _maxInvestmentInStrategies(), "Total investment can't be above 90%");
+    uint256 totalWeight = _totalWeightInStrategies().sub(strategies[activeStrategy].weightage).add(newWeightage);
+    require(totalWeight <= _maxInvestmentInStrategies(), "Total investment can't be above 90%");
 
-    _setTotalWeightInStrategies(_totalWeightInStrategies().sub(strategies[activeStrategy].weightage).add(newWeightage));
-    strategies[activeStrategy].weightage = newWeightage;
+    _setTotalWeightInStrategies(totalWeight);
+    strategies[activeStrategy].weightage = newWeightage.toUint16();
     _setShouldRebalance(true);
   }
   
@@ -223,115 +362,486 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     require(isActiveStrategy(activeStrategy), "This strategy is not active in this fund");
     require(newPerformanceFeeStrategy <= MAX_PERFORMANCE_FEE_STRATEGY, "Performance fee too high");
 
-    strategies[activeStrategy].performanceFeeStrategy = newPerformanceFeeStrategy;
+    strategies[activeStrategy].performanceFeeStrategy = newPerformanceFeeStrategy.toUint16();
   }
 
-  function processFees() internal {
+  /*
+  * Accrues the fees on the profits of the strategies since the last hard work and the platform fee.
+  * The fees stay in the fund, set aside from the underlying kept in the fund, until claimed with claimFees.
+  * With feesInShares, the fund manager and platform fees are paid in shares instead, see mintFeeShares.
+  */
+  function processFees(FundConfig memory config) internal {
     uint256 profitToFund = 0;
-    uint256 platformFee = (_totalInvested() * (block.timestamp - _lastHardworkTimestamp())).mul(_platformFee()).div(MAX_BPS).div(SECS_PER_YEAR);
-    
+    uint256 totalFees = 0;
+    uint256 investedBalance = 0;
     for (uint256 i=0; i<getStrategyCount(); i++) {
-      address strategy = strategyList[i];
-        
-      uint256 profit = MathUpgradeable.max((IStrategy(strategy).investedUnderlyingBalance() - strategies[strategy].lastBalance), 0);
-      uint256 strategyCreatorFee = 0;
-      
-      if (profit > 0) {
-        strategyCreatorFee = profit.mul(strategies[strategy].performanceFeeStrategy).div(MAX_BPS);
-        if (strategyCreatorFee > 0) {
-          IERC20(_underlying()).safeTransfer(IStrategy(strategy).creator(), strategyCreatorFee);
-        }
-        profitToFund = profitToFund.add(profit).sub(strategyCreatorFee);
+      (uint256 strategyProfitToFund, uint256 strategyCreatorFee, uint256 currentBalance) = processStrategyFee(strategyList[i]);
+      profitToFund = profitToFund.add(strategyProfitToFund);
+      totalFees = totalFees.add(strategyCreatorFee);
+      investedBalance = investedBalance.add(currentBalance);
+    }
+    uint256 fundManagerFee = processFundManagerFee(config, profitToFund);
+    uint256 platformFee = processPlatformFee(config);
+    if (config.feesInShares) {
+      reserveFees(totalFees);
+      // the balances of the strategies were just read, the total value does not need to query them again
+      mintFeeShares(underlyingBalanceInFund().add(investedBalance), fundManagerFee, platformFee);
+    } else {
+      reserveFees(totalFees.add(fundManagerFee).add(platformFee));
+    }
+  }
+
+  /*
+  * Accrues the creator fee on the profit of the strategy since its last balance.
+  * Returns the rest of the profit, which goes to the fund, the fee and the current balance of the strategy.
+  */
+  function processStrategyFee(address strategy) internal returns (uint256 profitToFund, uint256 strategyCreatorFee, uint256 currentBalance) {
+    currentBalance = IStrategy(strategy).investedUnderlyingBalance();
+    StrategyParams memory params = strategies[strategy];
+    uint256 profit = currentBalance > params.lastBalance ? currentBalance.sub(params.lastBalance) : 0;
+
+    if (profit > 0) {
+      strategyCreatorFee = profit.mul(params.performanceFeeStrategy).div(MAX_BPS);
+      if (strategyCreatorFee > 0) {
+        accrueFee(IStrategy(strategy).creator(), strategyCreatorFee);
       }
-      emit StrategyRewards(strategy, profit, strategyCreatorFee);
+      profitToFund = profit.sub(strategyCreatorFee);
     }
-    
-    uint256 fundManagerFee = profitToFund.mul(_performanceFeeFund()).div(MAX_BPS);
+    emit StrategyRewards(strategy, profit, strategyCreatorFee);
+  }
+
+  function processFundManagerFee(FundConfig memory config, uint256 profitToFund) internal returns (uint256 fundManagerFee) {
+    fundManagerFee = profitToFund.mul(config.performanceFeeFund).div(MAX_BPS);
     if (fundManagerFee > 0) {
-      address fundManagerRewards = (_fundManager() == _governance()) ? _platformRewards() : _fundManager();
-      IERC20(_underlying()).safeTransfer(fundManagerRewards, fundManagerFee);
+      if (!config.feesInShares) {
+        accrueFee(fundManagerRewards(), fundManagerFee);
+      }
       emit FundManagerRewards(profitToFund, fundManagerFee);
     }
+  }
+
+  function processPlatformFee(FundConfig memory config) internal returns (uint256 platformFee) {
+    uint256 timeElapsed = block.timestamp - config.lastHardworkTimestamp;
+    platformFee = (config.totalInvested * timeElapsed).mul(config.platformFee).div(MAX_BPS).div(SECS_PER_YEAR);
     if (platformFee > 0) {
-      IERC20(_underlying()).safeTransfer(_platformRewards(), platformFee);
-      emit PlatformRewards(_totalInvested(), block.timestamp - _lastHardworkTimestamp(), platformFee);
+      if (!config.feesInShares) {
+        accrueFee(_platformRewards(), platformFee);
+      }
+      emit PlatformRewards(config.totalInvested, timeElapsed, platformFee);
+    }
+  }
+
+  // sets the accrued fees aside from the underlying kept in the fund
+  function reserveFees(uint256 totalFees) internal {
+    if (totalFees > 0) {
+      require(totalFees <= underlyingBalanceInFund(), "Fees exceed underlying in fund");
+      _setTotalAccruedFees(_totalAccruedFees().add(totalFees));
+    }
+  }
+
+  function accrueFee(address recipient, uint256 amount) internal {
+    accruedFees[recipient] = accruedFees[recipient].add(amount);
+  }
+
+  function fundManagerRewards() internal view returns (address) {
+    return (_fundManager() == _governance()) ? _platformRewards() : _fundManager();
+  }
+
+  // pays the fund manager and platform fees set aside from the underlying or, with feesInShares, in shares
+  function payFundFees(FundConfig memory config, uint256 fundManagerFee, uint256 platformFee) internal {
+    if (config.feesInShares) {
+      mintFeeShares(underlyingBalanceWithInvestmentLive(), fundManagerFee, platformFee);
+    } else {
+      reserveFees(fundManagerFee.add(platformFee));
+    }
+  }
+
+  /*
+  * Pays the fund manager and platform fees in shares minted at the current price per share, the underlying
+  * staying invested. totalValue includes the fees: minting fees * totalSupply / (totalValue - fees) shares
+  * gives the recipients shares worth the fees and leaves the holders totalValue - fees, as if the fees
+  * were set aside from the underlying. The shares are split between the recipients in proportion to their fee.
+  */
+  function mintFeeShares(uint256 totalValue, uint256 fundManagerFee, uint256 platformFee) internal {
+    uint256 totalFees = fundManagerFee.add(platformFee);
+    if (totalFees == 0) {
+      return;
+    }
+    require(totalFees < totalValue, "Fees exceed total value");
+    uint256 supply = totalSupply();
+    uint256 shares = (supply == 0) ? totalFees : totalFees.mul(supply).div(totalValue.sub(totalFees));
+    uint256 fundManagerShares = shares.mul(fundManagerFee).div(totalFees);
+    if (fundManagerShares > 0) {
+      address recipient = fundManagerRewards();
+      _mint(recipient, fundManagerShares);
+      emit FeesMinted(recipient, fundManagerFee, fundManagerShares);
+    }
+    if (shares > fundManagerShares) {
+      _mint(_platformRewards(), shares - fundManagerShares);
+      emit FeesMinted(_platformRewards(), platformFee, shares - fundManagerShares);
     }
   }
 
+  /*
+  * Transfers the fees accrued for the recipient. Anyone can trigger it, the fees always go to the recipient.
+  */
+  function claimFees(address recipient) external nonReentrant {
+    _setTotalAccruedFees(_totalAccruedFees().sub(payAccruedFees(recipient)));
+  }
+
+  function claimFeesBatch(address[] calldata recipients) external nonReentrant {
+    uint256 claimed = 0;
+    for (uint256 i=0; i<recipients.length; i++) {
+      claimed = claimed.add(payAccruedFees(recipients[i]));
+    }
+    _setTotalAccruedFees(_totalAccruedFees().sub(claimed));
+  }
+
+  function payAccruedFees(address recipient) internal returns (uint256 amount) {
+    amount = accruedFees[recipient];
+    if (amount > 0) {
+      accruedFees[recipient] = 0;
+      IERC20(_underlying()).safeTransfer(recipient, amount);
+      emit FeesClaimed(recipient, amount);
+    }
+  }
+
+  function totalAccruedFees() external view returns(uint256) {
+    return _totalAccruedFees();
+  }
+
   /**
   * Invests the underlying capital to various strategies. Looks for weightage changes.
   */
   function doHardWork() whenStrategyDefined onlyFundManagerOrGovernance external {
-    if (_lastHardworkTimestamp() > 0) {
-      processFees();
+    FundConfig memory config = _loadConfig();
+    require(config.hardWorkCursor == 0, "Hard work in progress");
+    if (config.lastHardworkTimestamp > 0) {
+      processFees(config);
     }
+    settleEpoch();
     // ensure that new funds are invested too
 
-    if (_shouldRebalance()) {
-      _setShouldRebalance(false);
-      doHardWorkWithRebalance();
+    if (config.shouldRebalance) {
+      config.shouldRebalance = false;
+      doHardWorkWithRebalance(config);
     }
     else {
-      doHardWorkWithoutRebalance();
+      doHardWorkWithoutRebalance(config);
     }
-    _setLastHardworkTimestamp(block.timestamp);
-    emit HardWorkDone(underlyingBalanceWithInvestment(), _getPricePerShare());
+    finishHardWork(config);
   }
 
-  function doHardWorkWithoutRebalance() internal {
-    uint256 lastReserve = _totalAccounted() > 0 ? _totalAccounted().sub(_totalInvested()) : 0;
-    uint256 availableAmountToInvest = underlyingBalanceInFund() > lastReserve ? underlyingBalanceInFund().sub(lastReserve) : 0;
-    
-    if (availableAmountToInvest > 0) {
-      return;
-    }
-    
-    _setTotalAccounted(_totalAccounted().add(availableAmountToInvest));
-    
+  /*
+  * Records the price per share checkpoint of a hard work, stores config and emits HardWorkDone.
+  * The checkpoint count is stored with the state slot the hard work writes anyway, so the checkpoint costs one SSTORE.
+  */
+  function finishHardWork(FundConfig memory config) internal {
+    config.lastHardworkTimestamp = block.timestamp;
+    // same as underlyingBalanceWithInvestment once config is stored, the cached balances were just recorded
+    uint256 totalValue = config.useCachedBalances
+        ? underlyingBalanceInFund().add(_totalLastBalance())
+        : underlyingBalanceWithInvestmentLive();
+    uint256 pricePerShare = totalSupply() == 0
+        ? _underlyingUnit()
+        : _underlyingUnit().mul(totalValue).div(totalSupply());
+    _writePpsCheckpoint(config, pricePerShare, totalValue);
+    _storeConfig(config);
+    emit HardWorkDone(totalValue, pricePerShare);
+  }
+
+  function doHardWorkWithoutRebalance(FundConfig memory config) internal {
+    uint256 availableAmountToInvest = amountToInvest(config);
     for (uint256 i=0; i<getStrategyCount(); i++) { 
       address strategy = strategyList[i];
       uint256 availableAmountForStrategy = availableAmountToInvest.mul(strategies[strategy].weightage).div(MAX_BPS);
-      if (availableAmountForStrategy > 0) {
-        IERC20(_underlying()).safeTransfer(strategy, availableAmountForStrategy);
-        _setTotalInvested(_totalInvested().add(availableAmountForStrategy));
-        emit InvestInStrategy(strategy, availableAmountForStrategy);
-      }
-      
-      IStrategy(strategy).doHardWork();
-      
-      strategies[strategy].lastBalance = IStrategy(strategy).investedUnderlyingBalance();
+      config.totalInvested = config.totalInvested.add(availableAmountForStrategy);
+      investInStrategy(config.underlying, strategy, availableAmountForStrategy);
     }
   }
   
-  function doHardWorkWithRebalance() internal {
+  /*
+  * Returns the underlying the strategies take by weightage (out of MAX_BPS) and adds the underlying received since
+  * the last hard work to the accounted total. Without a reserve policy that is the amount returned.
+  * With a reserve policy, a reserve above its ceiling goes back to its target with the strategies taking the excess,
+  * and a reserve below its floor is refilled to its target from the strategies.
+  */
+  function amountToInvest(FundConfig memory config) internal returns (uint256) {
+    uint256 lastReserve = config.totalAccounted > 0 ? config.totalAccounted.sub(config.totalInvested) : 0;
+    uint256 underlyingInFund = underlyingBalanceInFund();
+    uint256 availableAmountToInvest = underlyingInFund > lastReserve ? underlyingInFund.sub(lastReserve) : 0;
+    config.totalAccounted = config.totalAccounted.add(availableAmountToInvest);
+    if (config.reserveCeiling == 0) {
+      return availableAmountToInvest;
+    }
+
     uint256 totalUnderlyingWithInvestment = underlyingBalanceWithInvestment();
-    _setTotalAccounted(totalUnderlyingWithInvestment);
-    uint256 totalInvested = 0;
-    uint256[] memory toDeposit = new uint256[](getStrategyCount());
-    
-    for (uint256 i=0; i<getStrategyCount(); i++) {
+    uint256 reserveTarget = totalUnderlyingWithInvestment.mul(config.reserveTarget).div(MAX_BPS);
+    if (underlyingInFund.mul(MAX_BPS) > totalUnderlyingWithInvestment.mul(config.reserveCeiling)) {
+      // scaled up so that the weightages of the strategies add up to the whole excess
+      return underlyingInFund.sub(reserveTarget).mul(MAX_BPS).div(config.totalWeightInStrategies);
+    }
+    if (underlyingInFund.mul(MAX_BPS) < totalUnderlyingWithInvestment.mul(config.reserveFloor)) {
+      uint256 missing = reserveTarget.sub(underlyingInFund);
+      withdrawFromStrategies(missing, config.totalWeightInStrategies);
+      config.totalInvested = config.totalInvested.sub(MathUpgradeable.min(missing, config.totalInvested));
+    }
+    return 0;
+  }
+
+  function doHardWorkWithRebalance(FundConfig memory config) internal {
+    uint256 totalUnderlyingWithInvestment = underlyingBalanceWithInvestmentLive();
+    config.totalAccounted = totalUnderlyingWithInvestment;
+    config.totalInvested = 0;
+    rebalanceStrategies(config, totalUnderlyingWithInvestment, 0, getStrategyCount());
+  }
+
+  /*
+  * Moves the strategies [start, end) of the strategy list to their weightage of the total and adds their new balances
+  * to config.totalInvested. Strategies within their rebalance band of the target are left as they are, without
+  * a transfer nor a hard work.
+  */
+  function rebalanceStrategies(FundConfig memory config, uint256 totalUnderlyingWithInvestment, uint256 start, uint256 end) internal {
+    RebalanceBand memory fundBand = fundRebalanceBand();
+    uint256[] memory toDeposit = new uint256[](end - start);
+    bool[] memory moved = new bool[](end - start);
+    for (uint256 i=start; i<end; i++) {
       address strategy = strategyList[i];
       uint256 shouldBeInStrategy = totalUnderlyingWithInvestment.mul(strategies[strategy].weightage).div(MAX_BPS);
-      totalInvested = totalInvested.add(shouldBeInStrategy);
       uint256 currentlyInStrategy = IStrategy(strategy).investedUnderlyingBalance();
+      if (isWithinRebalanceBand(strategy, fundBand, shouldBeInStrategy, currentlyInStrategy)) {
+        config.totalInvested = config.totalInvested.add(currentlyInStrategy);
+        updateLastBalance(strategy, currentlyInStrategy);
+        continue;
+      }
+      moved[i - start] = true;
       if (currentlyInStrategy > shouldBeInStrategy) {    // withdraw from strategy
         IStrategy(strategy).withdrawToFund(currentlyInStrategy.sub(shouldBeInStrategy));
-      } else if (shouldBeInStrategy > currentlyInStrategy) {   // can not directly deposit here as there might not be enough balance before withdrawing from required strategies
-        toDeposit[i] = shouldBeInStrategy.sub(currentlyInStrategy);
-      }  
+        config.totalInvested = config.totalInvested.add(shouldBeInStrategy);
+      } else {   // can not directly deposit here as there might not be enough balance before withdrawing from required strategies
+        toDeposit[i - start] = shouldBeInStrategy.sub(currentlyInStrategy);
+        config.totalInvested = config.totalInvested.add(currentlyInStrategy);
+      }
+    }
+    for (uint256 i=start; i<end; i++) {
+      if (moved[i - start]) {
+        investInStrategy(config.underlying, strategyList[i], investableAmount(config, toDeposit[i - start]));
+      }
+    }
+  }
+
+  function fundRebalanceBand() internal view returns (RebalanceBand memory) {
+    (uint256 threshold, uint256 minAmount) = _rebalanceBand();
+    return RebalanceBand(uint16(threshold), uint128(minAmount));
+  }
+
+  /*
+  * Returns true when the strategy is close enough to its target to be left out of a rebalance: the difference is
+  * at most threshold BPS of the target, or less than minAmount. Strategies without a band of their own use the
+  * band of the fund. Without any band every strategy is rebalanced.
+  */
+  function isWithinRebalanceBand(address strategy, RebalanceBand memory fundBand, uint256 shouldBeInStrategy, uint256 currentlyInStrategy) internal view returns (bool) {
+    RebalanceBand memory band = strategyRebalanceBands[strategy];
+    if (band.threshold == 0 && band.minAmount == 0) {
+      band = fundBand;
+    }
+    if (band.threshold == 0 && band.minAmount == 0) {
+      return false;
+    }
+    uint256 difference = currentlyInStrategy > shouldBeInStrategy ? currentlyInStrategy - shouldBeInStrategy : shouldBeInStrategy - currentlyInStrategy;
+    return difference.mul(MAX_BPS) <= shouldBeInStrategy.mul(band.threshold) || difference < band.minAmount;
+  }
+
+  /*
+  * Dry run of the transfers of a hard work with rebalance, with the balances as they are now. The fees the hard work
+  * accrues first lower the targets slightly. Strategies within their band get no transfer and no hard work,
+  * deposits are capped to the underlying the fund would hold at that point.
+  */
+  function getRebalancePlan() external view returns (RebalanceTransfer[] memory plan) {
+    uint256 totalUnderlyingWithInvestment = underlyingBalanceWithInvestmentLive();
+    uint256 underlyingInFund = underlyingBalanceInFund();
+    RebalanceBand memory fundBand = fundRebalanceBand();
+    plan = new RebalanceTransfer[](getStrategyCount());
+    for (uint256 i=0; i<getStrategyCount(); i++) {
+      RebalanceTransfer memory transfer = plan[i];
+      transfer.strategy = strategyList[i];
+      transfer.targetBalance = totalUnderlyingWithInvestment.mul(strategies[transfer.strategy].weightage).div(MAX_BPS);
+      transfer.currentBalance = IStrategy(transfer.strategy).investedUnderlyingBalance();
+      transfer.withinBand = isWithinRebalanceBand(transfer.strategy, fundBand, transfer.targetBalance, transfer.currentBalance);
+      if (!transfer.withinBand && transfer.currentBalance > transfer.targetBalance) {
+        transfer.withdrawal = transfer.currentBalance - transfer.targetBalance;
+        underlyingInFund = underlyingInFund.add(transfer.withdrawal);
+      }
+    }
+    for (uint256 i=0; i<plan.length; i++) {
+      if (!plan[i].withinBand && plan[i].targetBalance > plan[i].currentBalance) {
+        plan[i].deposit = MathUpgradeable.min(plan[i].targetBalance - plan[i].currentBalance, underlyingInFund);
+        underlyingInFund = underlyingInFund.sub(plan[i].deposit);
+      }
+    }
+  }
+
+  /*
+  * Sends the amount to the strategy, runs its hard work and records its new balance.
+  */
+  function investInStrategy(address underlying, address strategy, uint256 amount) internal {
+    if (amount > 0) {
+      IERC20(underlying).safeTransfer(strategy, amount);
+      emit InvestInStrategy(strategy, amount);
+    }
+    IStrategy(strategy).doHardWork();
+    updateLastBalance(strategy, IStrategy(strategy).investedUnderlyingBalance());
+  }
+
+  /*
+  * Runs the hard work over the strategies [start, end) of the strategy list, for funds with too many strategies
+  * to be worked in a single transaction. The chunks of a cycle follow each other from the hard work cursor
+  * to the end of the list.
+  * The first chunk settles the queued requests, accrues the platform fee and freezes the amount to invest,
+  * or the total to rebalance, for the whole cycle. Every chunk accrues the fees of its strategies before investing.
+  * The last chunk accrues the fund manager fee on the profit of the cycle and emits HardWorkDone.
+  * Deposits, withdrawals and changes to the strategies wait for the end of the cycle, so that the price per share
+  * only moves with the fees accrued by the chunks.
+  */
+  function doHardWorkChunk(uint256 start, uint256 end) whenStrategyDefined onlyFundManagerOrGovernance external {
+    FundConfig memory config = _loadConfig();
+    require(start == config.hardWorkCursor, "Chunk must start at the hard work cursor");
+    require(start < end && end <= getStrategyCount(), "Invalid chunk");
+
+    uint256 totalFees = 0;
+    uint256 platformFee = 0;
+    uint256 profitToFund = 0;
+    if (config.lastHardworkTimestamp > 0) {
+      if (start == 0) {
+        platformFee = processPlatformFee(config);
+      }
+      for (uint256 i=start; i<end; i++) {
+        (uint256 strategyProfitToFund, uint256 strategyCreatorFee, ) = processStrategyFee(strategyList[i]);
+        profitToFund = profitToFund.add(strategyProfitToFund);
+        totalFees = totalFees.add(strategyCreatorFee);
+      }
+      profitToFund = profitToFund.add(_hardWorkProfitToFund());
+    }
+    reserveFees(totalFees);
+    if (platformFee > 0) {
+      payFundFees(config, 0, platformFee);
+    }
+
+    if (start == 0) {
+      settleEpoch();
+      config.hardWorkCycleRebalance = config.shouldRebalance;
+      config.shouldRebalance = false;
+      startHardWorkCycle(config);
+    }
+    if (config.hardWorkCycleRebalance) {
+      rebalanceStrategies(config, _hardWorkCycleAmount(), start, end);
+    } else {
+      investChunk(config, start, end);
+    }
+
+    if (end < getStrategyCount()) {
+      config.hardWorkCursor = end;
+      _setHardWorkProfitToFund(profitToFund);
+      _storeConfig(config);
+      return;
+    }
+    if (profitToFund > 0) {
+      payFundFees(config, processFundManagerFee(config, profitToFund), 0);
+    }
+    config.hardWorkCursor = 0;
+    config.hardWorkCycleRebalance = false;
+    _setHardWorkCycleAmount(0);
+    _setHardWorkProfitToFund(0);
+    finishHardWork(config);
+  }
+
+  // freezes the amount to invest, or the total to rebalance, of a chunked hard work
+  function startHardWorkCycle(FundConfig memory config) internal {
+    if (config.hardWorkCycleRebalance) {
+      uint256 totalUnderlyingWithInvestment = underlyingBalanceWithInvestmentLive();
+      config.totalAccounted = totalUnderlyingWithInvestment;
+      config.totalInvested = 0;
+      _setHardWorkCycleAmount(totalUnderlyingWithInvestment);
+    } else {
+      // a reserve below its floor is refilled from every strategy in the first chunk
+      _setHardWorkCycleAmount(amountToInvest(config));
+    }
+  }
+
+  function investChunk(FundConfig memory config, uint256 start, uint256 end) internal {
+    uint256 availableAmountToInvest = _hardWorkCycleAmount();
+    for (uint256 i=start; i<end; i++) {
+      address strategy = strategyList[i];
+      uint256 amount = availableAmountToInvest.mul(strategies[strategy].weightage).div(MAX_BPS);
+      investInStrategy(config.underlying, strategy, investableAmount(config, amount));
     }
-    _setTotalInvested(totalInvested);
+  }
 
+  /*
+  * Caps the amount for a strategy to the underlying in the fund, which falls short when the underlying is still in
+  * the strategies of later chunks or in strategies left within their rebalance band. The amount left in the fund
+  * is taken out of the accounted total, so that the next hard work invests it.
+  */
+  function investableAmount(FundConfig memory config, uint256 amount) internal view returns (uint256 investable) {
+    investable = MathUpgradeable.min(amount, underlyingBalanceInFund());
+    config.totalAccounted = config.totalAccounted.sub(amount.sub(investable));
+    config.totalInvested = config.totalInvested.add(investable);
+  }
+
+  /*
+  * Forces a refresh of the cached strategy balances without investing.
+  * Fees are processed first as the recorded balances are the reference for the next profit calculation.
+  */
+  function refreshStrategyBalances() whenStrategyDefined onlyFundManagerOrGovernance external {
+    FundConfig memory config = _loadConfig();
+    require(config.hardWorkCursor == 0, "Hard work in progress");
+    if (config.lastHardworkTimestamp > 0) {
+      processFees(config);
+    }
     for (uint256 i=0; i<getStrategyCount(); i++) {
       address strategy = strategyList[i];
-      if (toDeposit[i] > 0) {
-        IERC20(_underlying()).safeTransfer(strategy, toDeposit[i]);
-        emit InvestInStrategy(strategy, toDeposit[i]);
+      updateLastBalance(strategy, IStrategy(strategy).investedUnderlyingBalance());
+    }
+    config.lastHardworkTimestamp = block.timestamp;
+    _storeConfig(config);
+  }
+
+  /*
+  * Settles the queued requests of the current epoch at a single price per share and opens the next epoch.
+  * The underlying owed to withdrawals is netted against the queued deposits first,
+  * only the remaining shortfall is pulled from the strategies.
+  */
+  function settleEpoch() internal {
+    uint256 epoch = _currentEpoch();
+    Epoch storage current = epochs[epoch];
+    if (current.deposits == 0 && current.withdrawals == 0) {
+      return;
+    }
+
+    uint256 totalUnderlying = underlyingBalanceWithInvestmentLive();
+    uint256 totalSupply = totalSupply();
+    uint256 pricePerShare = totalSupply == 0 ? _underlyingUnit() : _underlyingUnit().mul(totalUnderlying).div(totalSupply);
+    uint256 toWithdraw = current.withdrawals > 0 ? totalUnderlying.mul(current.withdrawals).div(totalSupply) : 0;
+    current.mintedShares = totalSupply == 0 ? current.deposits : current.deposits.mul(totalSupply).div(totalUnderlying);
+
+    // the deposits of the settled epoch are part of the fund from here on
+    _setCurrentEpoch(epoch.add(1));
+
+    if (toWithdraw > 0) {
+      uint256 underlyingInFund = underlyingBalanceInFund();
+      if (toWithdraw > underlyingInFund) {
+        withdrawFromStrategies(toWithdraw.sub(underlyingInFund), _totalWeightInStrategies());
+        toWithdraw = MathUpgradeable.min(toWithdraw, underlyingBalanceInFund());
       }
-      IStrategy(strategy).doHardWork();
-      
-      strategies[strategy].lastBalance = IStrategy(strategy).investedUnderlyingBalance();
+      _setClaimableUnderlying(_claimableUnderlying().add(toWithdraw));
+      _burn(address(this), current.withdrawals);
     }
+    current.withdrawnUnderlying = toWithdraw;
+
+    if (current.mintedShares > 0) {
+      _mint(address(this), current.mintedShares);
+    }
+    emit EpochSettled(epoch, pricePerShare, current.mintedShares, toWithdraw);
   }
 
   function pauseDeposits(bool trigger) external onlyFundManagerOrGovernance {
@@ -342,7 +852,7 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
   * Allows for depositing the underlying asset in exchange for shares.
   * Approval is assumed.
   */
-  function deposit(uint256 amount) external override nonReentrant whenDepositsNotPaused {
+  function deposit(uint256 amount) external override nonReentrant whenDepositsNotPaused whenNotQueued whenNoHardWorkInProgress {
     _deposit(amount, msg.sender, msg.sender);
   }
 
@@ -350,16 +860,46 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
   * Allows for depositing the underlying asset and shares assigned to the holder.
   * This facilitates depositing for someone else (e.g. using DepositHelper)
   */
-  function depositFor(uint256 amount, address holder) external override nonReentrant whenDepositsNotPaused {
+  function depositFor(uint256 amount, address holder) external override nonReentrant whenDepositsNotPaused whenNotQueued whenNoHardWorkInProgress {
     _deposit(amount, msg.sender, holder);
   }
 
-  function _deposit(uint256 amount, address sender, address beneficiary) internal {
-    require(amount > 0, "Cannot deposit 0");
-    require(beneficiary != ZERO_ADDRESS, "holder must be defined");
+  /*
+  * Deposits with an EIP-2612 permit signed by the sender on the underlying instead of a prior approval.
+  * Only for underlying tokens that support permit. The permit is skipped when the allowance already covers the amount,
+  * as after anyone submitted the same permit first from the mempool.
+  */
+  function depositWithPermit(uint256 amount, uint256 deadline, uint8 v, bytes32 r, bytes32 s) external nonReentrant whenDepositsNotPaused whenNotQueued whenNoHardWorkInProgress {
+    if (IERC20(_underlying()).allowance(msg.sender, address(this)) < amount) {
+      IERC20Permit(_underlying()).permit(msg.sender, address(this), amount, deadline, v, r, s);
+    }
+    _deposit(amount, msg.sender, msg.sender);
+  }
 
+  /*
+  * EIP-2612 approval of the shares of owner with a signature, so that transfers and integrations skip the approve transaction.
+  */
+  function permit(address owner, address spender, uint256 value, uint256 deadline, uint8 v, bytes32 r, bytes32 s) external {
+    require(block.timestamp <= deadline, "Permit expired");
+    bytes32 structHash = keccak256(abi.encode(PERMIT_TYPEHASH, owner, spender, value, nonces[owner], deadline));
+    bytes32 digest = keccak256(abi.encodePacked("\x19\x01", DOMAIN_SEPARATOR(), structHash));
+    require(ECDSAUpgradeable.recover(digest, v, r, s) == owner, "Invalid permit signature");
+    nonces[owner] = nonces[owner].add(1);
+    _approve(owner, spender, value);
+  }
+
+  // computed on every call, as the name and the address of the proxy are only known at runtime
+  function DOMAIN_SEPARATOR() public view returns (bytes32) {
+    uint256 chainId;
+    assembly {
+      chainId := chainid()
+    }
+    return keccak256(abi.encode(DOMAIN_TYPEHASH, keccak256(bytes(name())), keccak256(bytes("1")), chainId, address(this)));
+  }
+
+  function checkDepositLimits(uint256 amount, uint256 totalUnderlyingWithInvestment) internal view {
     if(_depositLimit() > 0) { // if deposit limit is 0, then there is no deposit limit
-      require(underlyingBalanceWithInvestment().add(amount) <= _depositLimit(), "Total deposit limit hit");
+      require(totalUnderlyingWithInvestment.add(amount) <= _depositLimit(), "Total deposit limit hit");
     }
 
     if(_depositLimitTxMax() > 0) { // if deposit limit is 0, then there is no deposit limit
@@ -369,17 +909,93 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     if(_depositLimitTxMin() > 0) { // if deposit limit is 0, then there is no deposit limit
       require(amount >= _depositLimitTxMin(), "Minimum transaction deposit limit hit");
     }
+  }
+
+  function _deposit(uint256 amount, address sender, address beneficiary) internal {
+    require(amount > 0, "Cannot deposit 0");
+    require(beneficiary != ZERO_ADDRESS, "holder must be defined");
+
+    uint256 totalUnderlyingWithInvestment = underlyingBalanceWithInvestment();
+    checkDepositLimits(amount, totalUnderlyingWithInvestment);
 
     uint256 toMint = totalSupply() == 0
         ? amount
-        : amount.mul(totalSupply()).div(underlyingBalanceWithInvestment());
+        : amount.mul(totalSupply()).div(totalUnderlyingWithInvestment);
     _mint(beneficiary, toMint);
 
     IERC20(_underlying()).safeTransferFrom(sender, address(this), amount);
     emit Deposit(beneficiary, amount);
   }
 
-  function withdraw(uint256 numberOfShares) external override nonReentrant {
+  /*
+  * Pulls the missing amount from the strategies. Follows the withdrawal queue if one is set,
+  * otherwise pulls from the active strategies in proportion to weightage / totalWeight.
+  * A strategy is never asked for more than it holds.
+  */
+  function withdrawFromStrategies(uint256 missing, uint256 totalWeight) internal {
+    if (withdrawalQueue.length > 0) {
+      withdrawFromQueue(missing);
+      return;
+    }
+    for (uint256 i=0; i<getStrategyCount(); i++) {
+      address strategy = strategyList[i];
+      uint256 weightage = strategies[strategy].weightage;
+      if (weightage > 0) {
+        uint256 missingforStrategy = MathUpgradeable.min(
+          missing.mul(weightage).div(totalWeight),
+          IStrategy(strategy).investedUnderlyingBalance()
+        );
+        if (missingforStrategy > 0) {
+          pullFromStrategy(strategy, missingforStrategy);
+        }
+      }
+    }
+  }
+
+  /*
+  * Fills the missing amount from as few strategies as possible, following the withdrawal queue.
+  * Underlying already sitting in the strategies is used before any strategy has to redeem from its vault.
+  * What the queued strategies can not cover is pulled from the other active strategies, in list order.
+  */
+  function withdrawFromQueue(uint256 missing) internal {
+    address underlyingToken = _underlying();
+    uint256 queueLength = withdrawalQueue.length;
+    for (uint256 i=0; i<queueLength && missing > 0; i++) {
+      address strategy = withdrawalQueue[i];
+      uint256 amount = MathUpgradeable.min(missing, IERC20(underlyingToken).balanceOf(strategy));
+      if (amount > 0) {
+        pullFromStrategy(strategy, amount);
+        missing = missing.sub(amount);
+      }
+    }
+    for (uint256 i=0; i<queueLength && missing > 0; i++) {
+      address strategy = withdrawalQueue[i];
+      uint256 amount = MathUpgradeable.min(missing, IStrategy(strategy).investedUnderlyingBalance());
+      if (amount > 0) {
+        pullFromStrategy(strategy, amount);
+        missing = missing.sub(amount);
+      }
+    }
+    for (uint256 i=0; i<getStrategyCount() && missing > 0; i++) {
+      address strategy = strategyList[i];
+      if (withdrawalCostHint[strategy] > 0) {
+        continue;
+      }
+      uint256 amount = MathUpgradeable.min(missing, IStrategy(strategy).investedUnderlyingBalance());
+      if (amount > 0) {
+        pullFromStrategy(strategy, amount);
+        missing = missing.sub(amount);
+      }
+    }
+  }
+
+  function pullFromStrategy(address strategy, uint256 amount) internal {
+    IStrategy(strategy).withdrawToFund(amount);
+    uint256 lastBalance = strategies[strategy].lastBalance;
+    updateLastBalance(strategy, lastBalance.sub(MathUpgradeable.min(amount, lastBalance)));
+  }
+
+  function withdraw(uint256 numberOfShares) external override nonReentrant whenNotQueued whenNoHardWorkInProgress {
     require(totalSupply() > 0, "Fund has no shares");
     require(numberOfShares > 0, "numberOfShares must be greater than 0");
     
@@ -390,15 +1006,9 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
         .mul(numberOfShares)
         .div(totalSupply);
 
-    if (underlyingAmountToWithdraw > underlyingBalanceInFund()) {
-      uint256 missing = underlyingAmountToWithdraw.sub(underlyingBalanceInFund());
-      for (uint256 i=0; i<getStrategyCount(); i++) {
-        if (isActiveStrategy(strategyList[i])) {
-          uint256 weightage = strategies[strategyList[i]].weightage;
-          uint256 missingforStrategy = missing.mul(weightage).div(MAX_BPS);
-          IStrategy(strategyList[i]).withdrawToFund(missingforStrategy);
-        }
-      }
+    uint256 underlyingInFund = underlyingBalanceInFund();
+    if (underlyingAmountToWithdraw > underlyingInFund) {
+      withdrawFromStrategies(underlyingAmountToWithdraw.sub(underlyingInFund), _totalWeightInStrategies());
       // recalculate to improve accuracy
       underlyingAmountToWithdraw = MathUpgradeable.min(underlyingAmountToWithdraw, underlyingBalanceInFund());
     }
@@ -407,11 +1017,134 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     underlyingAmountToWithdraw = underlyingAmountToWithdraw.sub(withdrawalFee);
 
     IERC20(_underlying()).safeTransfer(msg.sender, underlyingAmountToWithdraw);
-    IERC20(_underlying()).safeTransfer(_platformRewards(), withdrawalFee);
+    if (withdrawalFee > 0) {
+      accrueFee(_platformRewards(), withdrawalFee);
+      _setTotalAccruedFees(_totalAccruedFees().add(withdrawalFee));
+    }
     
     emit Withdraw(msg.sender, underlyingAmountToWithdraw, withdrawalFee);
   }
 
+  /*
+  * Queues a deposit of the underlying asset. Shares are minted at the price per share of the next hard work
+  * and can be claimed afterwards. Approval is assumed.
+  */
+  function requestDeposit(uint256 amount) external nonReentrant whenDepositsNotPaused whenQueued {
+    require(amount > 0, "Cannot deposit 0");
+    uint256 totalUnderlyingWithInvestment = _depositLimit() > 0
+        ? underlyingBalanceWithInvestment().add(epochs[_currentEpoch()].deposits)
+        : 0;
+    checkDepositLimits(amount, totalUnderlyingWithInvestment);
+
+    PendingRequest storage request = openRequest(msg.sender);
+    request.deposit = request.deposit.add(amount);
+    epochs[request.epoch].deposits = epochs[request.epoch].deposits.add(amount);
+
+    IERC20(_underlying()).safeTransferFrom(msg.sender, address(this), amount);
+    emit DepositRequested(msg.sender, amount, request.epoch);
+  }
+
+  /*
+  * Queues a withdrawal. The shares are held by the fund until the next hard work settles the epoch,
+  * the underlying can be claimed afterwards.
+  */
+  function requestWithdraw(uint256 numberOfShares) external nonReentrant whenQueued {
+    require(numberOfShares > 0, "numberOfShares must be greater than 0");
+
+    PendingRequest storage request = openRequest(msg.sender);
+    request.withdrawal = request.withdrawal.add(numberOfShares);
+    epochs[request.epoch].withdrawals = epochs[request.epoch].withdrawals.add(numberOfShares);
+
+    _transfer(msg.sender, address(this), numberOfShares);
+    emit WithdrawRequested(msg.sender, numberOfShares, request.epoch);
+  }
+
+  /*
+  * Transfers the shares and the underlying of the caller's settled requests.
+  */
+  function claim() external nonReentrant {
+    require(claimSettled(msg.sender), "Nothing to claim");
+  }
+
+  /*
+  * Claims a settled request of the holder, if any, and returns the holder's request for the current epoch.
+  */
+  function openRequest(address holder) internal returns (PendingRequest storage request) {
+    claimSettled(holder);
+    request = pendingRequests[holder];
+    request.epoch = _currentEpoch();
+  }
+
+  function claimSettled(address holder) internal returns (bool) {
+    PendingRequest memory request = pendingRequests[holder];
+    if (request.epoch == _currentEpoch() || (request.deposit == 0 && request.withdrawal == 0)) {
+      return false;
+    }
+    delete pendingRequests[holder];
+    Epoch storage settled = epochs[request.epoch];
+
+    uint256 shares = 0;
+    if (request.deposit > 0) {
+      shares = request.deposit.mul(settled.mintedShares).div(settled.deposits);
+      _transfer(address(this), holder, shares);
+    }
+
+    uint256 underlyingAmount = 0;
+    uint256 fee = 0;
+    if (request.withdrawal > 0) {
+      underlyingAmount = request.withdrawal.mul(settled.withdrawnUnderlying).div(settled.withdrawals);
+      _setClaimableUnderlying(_claimableUnderlying().sub(underlyingAmount));
+      fee = underlyingAmount.mul(_withdrawalFee()).div(MAX_BPS);
+      underlyingAmount = underlyingAmount.sub(fee);
+      IERC20(_underlying()).safeTransfer(holder, underlyingAmount);
+      if (fee > 0) {
+        accrueFee(_platformRewards(), fee);
+        _setTotalAccruedFees(_totalAccruedFees().add(fee));
+      }
+    }
+    emit Claim(holder, shares, underlyingAmount, fee);
+    return true;
+  }
+
+  function getWithdrawalQueue() external view returns (address[] memory) {
+    return withdrawalQueue;
+  }
+
+  /*
+  * Sets the strategies to pull from when the fund is short on a withdrawal, ordered by increasing cost hint.
+  * An empty queue restores the withdrawal in proportion to the weightage of every strategy.
+  */
+  function setWithdrawalQueue(address[] calldata queue, uint256[] calldata costHints) external onlyFundManagerOrGovernance {
+    require(queue.length == costHints.length, "Queue and cost hints must have the same length");
+    for (uint256 i=0; i<withdrawalQueue.length; i++) {
+      delete withdrawalCostHint[withdrawalQueue[i]];
+    }
+    delete withdrawalQueue;
+    for (uint256 i=0; i<queue.length; i++) {
+      require(isActiveStrategy(queue[i]), "This strategy is not active in this fund");
+      require(withdrawalCostHint[queue[i]] == 0, "Strategy is already in the queue");
+      require(i == 0 || costHints[i] >= costHints[i-1], "Withdrawal queue must be ordered by cost");
+      require(costHints[i] > 0, "Cost hint should be greater than 0");
+      withdrawalQueue.push(queue[i]);
+      withdrawalCostHint[queue[i]] = costHints[i];
+    }
+  }
+
+  function removeFromWithdrawalQueue(address strategy) internal {
+    if (withdrawalCostHint[strategy] == 0) {
+      return;
+    }
+    delete withdrawalCostHint[strategy];
+    uint256 lastIndex = withdrawalQueue.length - 1;
+    for (uint256 i=0; i<lastIndex; i++) {
+      if (withdrawalQueue[i] == strategy) {
+        withdrawalQueue[i] = withdrawalQueue[i+1];
+        withdrawalQueue[i+1] = strategy;
+      }
+    }
+    withdrawalQueue.pop();
+  }
+
   function shouldUpgrade() external override view returns (bool, address) {
     return (
       true,
@@ -419,7 +1152,32 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     );
   }
 
-  function finalizeUpgrade() external override onlyGovernance {
+  /*
+  * Runs the migrations of a new implementation. Called by FundProxy.upgrade, by the governance or, for the funds
+  * behind FundBeaconProxy, by FundFactory.finalizeFunds. Does nothing on a fund already migrated.
+  */
+  function finalizeUpgrade() external override {
+    require((_governance() == msg.sender) || (_factory() == msg.sender), "Not governance nor factory");
+    migrateFundStorage();
+    uint256 totalLastBalance = 0;
+    for (uint256 i=0; i<getStrategyCount(); i++) {
+      address strategy = strategyList[i];
+      // move strategy records of proxies upgraded from the unpacked layout
+      LegacyStrategyParams memory legacy = legacyStrategies[strategy];
+      if (legacy.weightage > 0) {
+        strategies[strategy] = StrategyParams({
+          weightage: legacy.weightage.toUint16(),
+          performanceFeeStrategy: legacy.performanceFeeStrategy.toUint16(),
+          activation: legacy.activation.toUint64(),
+          lastBalance: legacy.lastBalance.toUint128(),
+          indexInList: i.toUint32()
+        });
+        delete legacyStrategies[strategy];
+      }
+      // the cached total is derived from the recorded strategy balances
+      totalLastBalance = totalLastBalance.add(strategies[strategy].lastBalance);
+    }
+    _setTotalLastBalance(totalLastBalance);
   }
 
   function setFundManager(address newFundManager) external onlyFundManagerOrGovernance {
@@ -430,15 +1188,113 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
       _setPlatformRewards(newRewards);
   }
 
+  function platformRewards() external view returns(address) {
+    return _platformRewards();
+  }
+
   function setShouldRebalance(bool trigger) external onlyFundManagerOrGovernance {
       _setShouldRebalance(trigger);
   }
 
+  function shouldRebalance() external view returns(bool) {
+    return _shouldRebalance();
+  }
+
+  function depositsPaused() external view returns(bool) {
+    return _depositsPaused();
+  }
+
+  function totalWeightInStrategies() external view returns(uint256) {
+    return _totalWeightInStrategies();
+  }
+
+  function totalAccounted() external view returns(uint256) {
+    return _totalAccounted();
+  }
+
+  function totalInvested() external view returns(uint256) {
+    return _totalInvested();
+  }
+
+  function lastHardworkTimestamp() external view returns(uint256) {
+    return _lastHardworkTimestamp();
+  }
+
+  // index of the next strategy of a chunked hard work in progress, 0 when none is in progress
+  function hardWorkCursor() external view returns(uint256) {
+    return _hardWorkCursor();
+  }
+
+  // when enabled, deposits, withdrawals and price per share use the strategy balances cached at the last hard work
+  function setUseCachedBalances(bool trigger) external onlyGovernance {
+    _setUseCachedBalances(trigger);
+  }
+
+  function useCachedBalances() external view returns(bool) {
+    return _useCachedBalances();
+  }
+
+  // seconds after the last hard work during which the cached strategy balances are used
+  function setMaxCachedBalanceAge(uint256 maxAge) external onlyGovernance {
+    _setMaxCachedBalanceAge(maxAge);
+  }
+
+  function maxCachedBalanceAge() external view returns(uint256) {
+    return _maxCachedBalanceAge();
+  }
+
+  // when enabled, removeStrategy shifts the later strategies instead of moving the last one into the freed position
+  function setPreserveStrategyOrder(bool trigger) external onlyFundManagerOrGovernance {
+    _setPreserveStrategyOrder(trigger);
+  }
+
+  function preserveStrategyOrder() external view returns(bool) {
+    return _preserveStrategyOrder();
+  }
+
+  /*
+  * When enabled, the fund manager and platform fees are paid in shares minted at the price per share of the
+  * hard work instead of underlying set aside in the fund. The strategy creator and withdrawal fees are still accrued.
+  */
+  function setFeesInShares(bool trigger) external onlyGovernance {
+    _setFeesInShares(trigger);
+  }
+
+  function feesInShares() external view returns(bool) {
+    return _feesInShares();
+  }
+
+  // when enabled, deposits and withdrawals are queued and settled in doHardWork
+  function setQueuedMode(bool trigger) external onlyFundManagerOrGovernance {
+    _setQueuedMode(trigger);
+  }
+
+  function queuedMode() external view returns(bool) {
+    return _queuedMode();
+  }
+
+  function storageVersion() external view returns(uint256) {
+    return _storageVersion();
+  }
+
+  function currentEpoch() external view returns(uint256) {
+    return _currentEpoch();
+  }
+
+  // underlying of the settled withdrawals not claimed yet
+  function claimableUnderlying() external view returns(uint256) {
+    return _claimableUnderlying();
+  }
+
   function setMaxInvestmentInStrategies(uint256 value) external onlyFundManagerOrGovernance {
     require(value < MAX_BPS, "Value greater than 100%");
     _setMaxInvestmentInStrategies(value);
   }
 
+  function maxInvestmentInStrategies() external view returns(uint256) {
+    return _maxInvestmentInStrategies();
+  }
+
   // if limit == 0 then there is no deposit limit
   function setDepositLimit(uint256 limit) external onlyFundManagerOrGovernance {
     _setDepositLimit(limit);
@@ -493,9 +1349,114 @@ contract Fund is ERC20Upgradeable, ReentrancyGuardUpgradeable, IFund, IUpgradeSo
     return _withdrawalFee();
   }
 
+  /*
+  * Keeps the underlying in the fund between floor and ceiling BPS of the TVL. A hard work without rebalance invests
+  * the reserve above the ceiling and refills the reserve below the floor, both back to the target. In between,
+  * deposits stay in the reserve. A rebalance still moves every strategy to its weightage of the total, so weightages
+  * should leave the target out of the strategies. All 0 disables the policy: a hard work then invests the deposits
+  * received since the last one by weightage.
+  */
+  function setReservePolicy(uint256 target, uint256 floor, uint256 ceiling) external onlyFundManagerOrGovernance {
+    require(ceiling <= MAX_BPS, "Value greater than 100%");
+    require(floor <= target && target <= ceiling, "Reserve target must be between floor and ceiling");
+    _setReservePolicy(target, floor, ceiling);
+  }
+
+  function reservePolicy() external view returns(uint256 target, uint256 floor, uint256 ceiling) {
+    return _reservePolicy();
+  }
+
+  /*
+  * Number of withdrawals of withdrawalSize underlying the fund serves from its reserve before pulling from the strategies.
+  */
+  function reserveCoverage(uint256 withdrawalSize) external view returns(uint256) {
+    require(withdrawalSize > 0, "Withdrawal size must be greater than 0");
+    return underlyingBalanceInFund().div(withdrawalSize);
+  }
+
+  // number of price per share checkpoints kept, one per hard work up to the last PPS_CHECKPOINT_CAPACITY
+  function ppsCheckpointCount() external view returns(uint256) {
+    return MathUpgradeable.min(_ppsCheckpointCount(), PPS_CHECKPOINT_CAPACITY);
+  }
+
+  /*
+  * Returns the kept checkpoints [start, start + count), oldest first, fewer past the last checkpoint.
+  */
+  function getPpsCheckpoints(uint256 start, uint256 count) external view returns(PpsCheckpoint[] memory checkpoints) {
+    uint256 total = _ppsCheckpointCount();
+    uint256 kept = MathUpgradeable.min(total, PPS_CHECKPOINT_CAPACITY);
+    require(start <= kept, "Checkpoint out of range");
+    uint256 end = MathUpgradeable.min(kept, start.add(count));
+    checkpoints = new PpsCheckpoint[](end - start);
+    for (uint256 i=start; i<end; i++) {
+      checkpoints[i - start] = _ppsCheckpoint(total - kept + i);
+    }
+  }
+
+  /*
+  * Yield of the price per share between the last checkpoints at or before fromTimestamp and toTimestamp,
+  * annualized linearly with APY_PRECISION as 100%, negative when the price per share went down.
+  * A window starting before the oldest kept checkpoint starts at the oldest one.
+  * Also returns the timestamps of the two checkpoints.
+  */
+  function apyBetween(uint256 fromTimestamp, uint256 toTimestamp) public view returns(int256 apy, uint256 startTimestamp, uint256 endTimestamp) {
+    require(fromTimestamp < toTimestamp, "Invalid window");
+    uint256 total = _ppsCheckpointCount();
+    uint256 oldest = total.sub(MathUpgradeable.min(total, PPS_CHECKPOINT_CAPACITY));
+    require(total > 0, "Not enough checkpoints in window");
+    PpsCheckpoint memory start = _ppsCheckpoint(ppsCheckpointAt(fromTimestamp, oldest, total));
+    PpsCheckpoint memory end = _ppsCheckpoint(ppsCheckpointAt(toTimestamp, oldest, total));
+    require(end.timestamp > start.timestamp && start.pricePerShare > 0, "Not enough checkpoints in window");
+    // checkpoint amounts fit in 96 bits
+    int256 growth = int256(end.pricePerShare) - int256(start.pricePerShare);
+    apy = growth * int256(APY_PRECISION * SECS_PER_YEAR) / int256(start.pricePerShare) / int256(end.timestamp - start.timestamp);
+    return (apy, start.timestamp, end.timestamp);
+  }
+
+  // yield over the last `window` seconds, see apyBetween
+  function trailingApy(uint256 window) external view returns(int256 apy, uint256 startTimestamp, uint256 endTimestamp) {
+    return apyBetween(window < block.timestamp ? block.timestamp - window : 0, block.timestamp);
+  }
+
+  // binary search of the last checkpoint in [oldest, total) at or before timestamp, oldest when they are all later
+  function ppsCheckpointAt(uint256 timestamp, uint256 oldest, uint256 total) internal view returns(uint256) {
+    uint256 low = oldest;
+    uint256 high = total - 1;
+    while (low < high) {
+      uint256 middle = (low + high + 1) / 2;
+      if (_ppsCheckpoint(middle).timestamp <= timestamp) {
+        low = middle;
+      } else {
+        high = middle - 1;
+      }
+    }
+    return low;
+  }
+
+  /*
+  * Strategies within threshold BPS of their target, or closer to it than minAmount, are left out of a rebalance.
+  * Both 0 rebalance every strategy.
+  */
+  function setRebalanceBand(uint256 threshold, uint256 minAmount) external onlyFundManagerOrGovernance {
+    require(threshold <= MAX_BPS, "Value greater than 100%");
+    _setRebalanceBand(threshold, minAmount);
+  }
+
+  function rebalanceBand() external view returns(uint256 threshold, uint256 minAmount) {
+    return _rebalanceBand();
+  }
+
+  // band of the strategy used instead of the band of the fund, both 0 fall back to the band of the fund
+  function setStrategyRebalanceBand(address activeStrategy, uint256 threshold, uint256 minAmount) external onlyFundManagerOrGovernance {
+    require(isActiveStrategy(activeStrategy), "This strategy is not active in this fund");
+    require(threshold <= MAX_BPS, "Value greater than 100%");
+    strategyRebalanceBands[activeStrategy] = RebalanceBand(threshold.toUint16(), minAmount.toUint128());
+  }
+
   // no tokens should ever be stored on this contract. Any tokens that are sent here by mistake are recoverable by governance
   function sweep(address _token, address _sweepTo) external onlyGovernance {
     require(_token != address(_underlying()), "can not sweep underlying");
+    require(_token != address(this), "can not sweep queued shares");
       IERC20(_token).safeTransfer(_sweepTo, IERC20(_token).balanceOf(address(this)));
   }
 }
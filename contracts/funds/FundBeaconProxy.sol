@@ -0,0 +1,24 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/proxy/IBeacon.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/proxy/Proxy.sol";
+
+/**
+* Proxy of the funds created with FundFactory.createFundDeterministic. It reads the implementation from the
+* factory that deployed it, so these funds are upgraded together with FundFactory.setFundImplementation.
+* Nothing is stored at deployment and there are no constructor arguments: the creation code is the same for
+* every fund and the CREATE2 address only depends on the factory and the salt.
+*/
+contract FundBeaconProxy is Proxy {
+
+  address private immutable beacon;
+
+  constructor() public {
+    beacon = msg.sender;
+  }
+
+  function _implementation() internal view override returns (address) {
+    return IBeacon(beacon).implementation();
+  }
+}
@@ -1,13 +1,47 @@
 // SPDX-License-Identifier: MIT
 pragma solidity 0.6.12;
 
+pragma experimental ABIEncoderV2;
+
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/proxy/IBeacon.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/utils/Address.sol";
+import "./FundBeaconProxy.sol";
 import "./FundProxy.sol";
 import "./Fund.sol";
 import "../utils/Governable.sol";
 
-contract FundFactory is Governable {
+contract FundFactory is Governable, IBeacon {
+  using Address for address;
 
   event NewFund(address fundProxy);
+  event FundImplementationUpdated(address implementation);
+
+  // implementation shared by the funds created with createFundDeterministic and createFunds
+  address public fundImplementation;
+
+  struct FundInfo {
+    address fund;
+    address underlying;
+    uint64 creationBlock;
+    bool beacon;  // created behind a FundBeaconProxy, following fundImplementation
+    address implementation;  // fundImplementation for beacon funds, the implementation at creation for the others
+  }
+
+  struct FundSummary {
+    address fund;
+    address underlying;
+    uint256 totalValueLocked;
+    uint256 pricePerShare;
+    uint256 totalSupply;
+    bool reverted;  // the fund reverted on a read, the amounts are left at 0
+  }
+
+  // registry of the created funds, in creation order
+  FundInfo[] internal registry;
+  // index in the registry plus one, 0 for addresses not created by this factory
+  mapping(address => uint256) internal registryIndex;
+  // registry indexes of the funds of every underlying
+  mapping(address => uint256[]) internal registryIndexesByUnderlying;
 
   constructor() public {
     Governable.initializeGovernance(
@@ -22,12 +56,188 @@ contract FundFactory is Governable {
     string memory _symbol
   ) public onlyGovernance returns(address) {
     FundProxy proxy = new FundProxy(_implementation);
-    Fund(address(proxy)).initializeFund(msg.sender,
+    initializeFund(address(proxy), _implementation, false, _underlying, _name, _symbol);
+    return address(proxy);
+  }
+
+  /**
+  * Creates a fund behind a FundBeaconProxy at the address given by computeFundAddress(_salt).
+  * The fund uses fundImplementation, upgrading it upgrades all the funds created this way.
+  */
+  function createFundDeterministic(
+    bytes32 _salt,
+    address _underlying,
+    string memory _name,
+    string memory _symbol
+  ) public onlyGovernance returns(address) {
+    require(fundImplementation != address(0), "Fund implementation not set");
+    FundBeaconProxy proxy = new FundBeaconProxy{salt: _salt}();
+    initializeFund(address(proxy), fundImplementation, true, _underlying, _name, _symbol);
+    return address(proxy);
+  }
+
+  function createFunds(
+    bytes32[] memory _salts,
+    address[] memory _underlyings,
+    string[] memory _names,
+    string[] memory _symbols
+  ) external onlyGovernance returns(address[] memory funds) {
+    require(_salts.length == _underlyings.length
+      && _salts.length == _names.length
+      && _salts.length == _symbols.length, "Array lengths do not match");
+    funds = new address[](_salts.length);
+    for (uint256 i=0; i<_salts.length; i++) {
+      funds[i] = createFundDeterministic(_salts[i], _underlyings[i], _names[i], _symbols[i]);
+    }
+  }
+
+  function computeFundAddress(bytes32 _salt) external view returns(address) {
+    bytes32 hash = keccak256(abi.encodePacked(
+      bytes1(0xff),
+      address(this),
+      _salt,
+      keccak256(type(FundBeaconProxy).creationCode)
+    ));
+    return address(uint160(uint256(hash)));
+  }
+
+  /**
+  * Upgrades every fund created with createFundDeterministic. Call finalizeFunds right after, as FundProxy.upgrade
+  * does for the other funds, so that the funds run the storage migrations of the new implementation.
+  */
+  function setFundImplementation(address _implementation) external onlyGovernance {
+    require(_implementation.isContract(), "Implementation is not a contract");
+    fundImplementation = _implementation;
+    emit FundImplementationUpdated(_implementation);
+  }
+
+  /**
+  * Calls finalizeUpgrade on the beacon funds among the funds [_start, _start + _count) of the registry,
+  * in pages when there are too many funds for one transaction.
+  */
+  function finalizeFunds(uint256 _start, uint256 _count) external onlyGovernance {
+    uint256 end = pageEnd(_start, _count, registry.length);
+    for (uint256 i=_start; i<end; i++) {
+      if (registry[i].beacon) {
+        Fund(registry[i].fund).finalizeUpgrade();
+      }
+    }
+  }
+
+  // IBeacon of the FundBeaconProxy funds
+  function implementation() external view override returns(address) {
+    return fundImplementation;
+  }
+
+  function fundCount() external view returns(uint256) {
+    return registry.length;
+  }
+
+  function isFund(address _fund) external view returns(bool) {
+    return registryIndex[_fund] > 0;
+  }
+
+  function getFundInfo(address _fund) external view returns(FundInfo memory) {
+    require(registryIndex[_fund] > 0, "Fund not created by this factory");
+    return fundInfo(registryIndex[_fund] - 1);
+  }
+
+  /**
+  * Returns the funds [_start, _start + _count) in creation order, fewer past the last fund.
+  */
+  function getFunds(uint256 _start, uint256 _count) external view returns(FundInfo[] memory funds) {
+    uint256 end = pageEnd(_start, _count, registry.length);
+    funds = new FundInfo[](end - _start);
+    for (uint256 i=_start; i<end; i++) {
+      funds[i - _start] = fundInfo(i);
+    }
+  }
+
+  function fundCountByUnderlying(address _underlying) external view returns(uint256) {
+    return registryIndexesByUnderlying[_underlying].length;
+  }
+
+  function getFundsByUnderlying(address _underlying, uint256 _start, uint256 _count) external view returns(FundInfo[] memory funds) {
+    uint256[] storage indexes = registryIndexesByUnderlying[_underlying];
+    uint256 end = pageEnd(_start, _count, indexes.length);
+    funds = new FundInfo[](end - _start);
+    for (uint256 i=_start; i<end; i++) {
+      funds[i - _start] = fundInfo(indexes[i]);
+    }
+  }
+
+  /**
+  * TVL, price per share and supply of the funds [_start, _start + _count), to list them in a single call.
+  * A fund that reverts, as on a broken implementation, is flagged as reverted instead of failing the page.
+  */
+  function getFundSummaries(uint256 _start, uint256 _count) external view returns(FundSummary[] memory summaries) {
+    uint256 end = pageEnd(_start, _count, registry.length);
+    summaries = new FundSummary[](end - _start);
+    for (uint256 i=_start; i<end; i++) {
+      summaries[i - _start] = fundSummary(i);
+    }
+  }
+
+  function fundSummary(uint256 _index) internal view returns(FundSummary memory summary) {
+    summary.fund = registry[_index].fund;
+    summary.underlying = registry[_index].underlying;
+    Fund fund = Fund(summary.fund);
+    try fund.totalValueLocked() returns (uint256 totalValueLocked) {
+      summary.totalValueLocked = totalValueLocked;
+    } catch {
+      summary.reverted = true;
+      return summary;
+    }
+    try fund.getPricePerShare() returns (uint256 pricePerShare) {
+      summary.pricePerShare = pricePerShare;
+    } catch {
+      summary.totalValueLocked = 0;
+      summary.reverted = true;
+      return summary;
+    }
+    try fund.totalSupply() returns (uint256 totalSupply) {
+      summary.totalSupply = totalSupply;
+    } catch {
+      summary.totalValueLocked = 0;
+      summary.pricePerShare = 0;
+      summary.reverted = true;
+    }
+  }
+
+  function fundInfo(uint256 _index) internal view returns(FundInfo memory info) {
+    info = registry[_index];
+    if (info.beacon) {
+      info.implementation = fundImplementation;
+    }
+  }
+
+  function pageEnd(uint256 _start, uint256 _count, uint256 _length) internal pure returns(uint256 end) {
+    require(_start <= _length, "Page start out of range");
+    end = _length - _start < _count ? _length : _start + _count;
+  }
+
+  function initializeFund(
+    address _fund,
+    address _implementation,
+    bool _beacon,
+    address _underlying,
+    string memory _name,
+    string memory _symbol
+  ) internal {
+    Fund(_fund).initializeFund(msg.sender,
       _underlying,
       _name,
       _symbol
     );
-    emit NewFund(address(proxy));
-    return address(proxy);
+    registry.push(FundInfo({
+      fund: _fund,
+      underlying: _underlying,
+      creationBlock: uint64(block.number),
+      beacon: _beacon,
+      implementation: _implementation
+    }));
+    registryIndex[_fund] = registry.length;
+    registryIndexesByUnderlying[_underlying].push(registry.length - 1);
+    emit NewFund(_fund);
   }
 }
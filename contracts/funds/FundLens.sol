@@ -0,0 +1,172 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+pragma experimental ABIEncoderV2;
+
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/token/ERC20/IERC20.sol";
+import "../../interfaces/IStrategy.sol";
+import "./Fund.sol";
+
+/*
+* Stateless read-only contract aggregating the state of a fund, so that dashboards and keepers
+* can fetch everything with a single eth_call instead of one call per getter and per strategy.
+*/
+contract FundLens {
+
+  struct StrategyState {
+    address strategy;
+    uint256 weightage;
+    uint256 performanceFeeStrategy;
+    uint256 activation;
+    uint256 lastBalance;  // balance recorded at the last hard work
+    uint256 indexInList;
+    uint256 investedUnderlyingBalance;  // live balance reported by the strategy
+    uint256 withdrawalCostHint;  // 0 when the strategy is not in the withdrawal queue
+  }
+
+  struct FundState {
+    address fund;
+    string name;
+    string symbol;
+    uint8 decimals;
+    address underlying;
+    uint256 underlyingUnit;
+    address governance;
+    address fundManager;
+    address platformRewards;
+    uint256 depositLimit;
+    uint256 depositLimitTxMax;
+    uint256 depositLimitTxMin;
+    uint256 performanceFeeFund;
+    uint256 platformFee;
+    uint256 withdrawalFee;
+    uint256 maxInvestmentInStrategies;
+    uint256 totalWeightInStrategies;
+    uint256 totalAccounted;
+    uint256 totalInvested;
+    bool depositsPaused;
+    bool shouldRebalance;
+    uint256 lastHardworkTimestamp;
+    bool useCachedBalances;
+    uint256 maxCachedBalanceAge;
+    bool preserveStrategyOrder;
+    bool queuedMode;
+    uint256 currentEpoch;
+    uint256 claimableUnderlying;
+    uint256 totalAccruedFees;
+    bool feesInShares;
+    uint256 reserveTarget;
+    uint256 reserveFloor;
+    uint256 reserveCeiling;
+    uint256 rebalanceThreshold;
+    uint256 rebalanceMinAmount;
+    uint256 hardWorkCursor;  // first strategy of the next chunk, 0 when no chunked hard work is in progress
+    uint256 ppsCheckpointCount;
+    uint256 storageVersion;
+    uint256 totalSupply;
+    uint256 underlyingBalance;  // underlying held by the fund contract, including queued deposits and unclaimed withdrawals
+    uint256 totalValueLocked;
+    uint256 pricePerShare;
+    address[] withdrawalQueue;
+    StrategyState[] strategies;
+  }
+
+  struct HolderState {
+    address holder;
+    uint256 shares;
+    uint256 underlyingBalanceWithInvestment;  // value of the shares in underlying
+    uint256 underlyingBalance;  // underlying held by the holder
+    uint256 underlyingAllowance;  // underlying the fund can pull from the holder
+    uint256 pendingRequestEpoch;
+    uint256 pendingDeposit;
+    uint256 pendingWithdrawal;
+  }
+
+  function getFundState(address fund) public view returns (FundState memory state) {
+    Fund fund_ = Fund(fund);
+
+    state.fund = fund;
+    state.name = fund_.name();
+    state.symbol = fund_.symbol();
+    state.decimals = fund_.decimals();
+    state.underlying = fund_.underlying();
+    state.underlyingUnit = fund_.underlyingUnit();
+    state.governance = fund_.governance();
+    state.fundManager = fund_.fundManager();
+    state.platformRewards = fund_.platformRewards();
+    state.depositLimit = fund_.depositLimit();
+    state.depositLimitTxMax = fund_.depositLimitTxMax();
+    state.depositLimitTxMin = fund_.depositLimitTxMin();
+    state.performanceFeeFund = fund_.performanceFeeFund();
+    state.platformFee = fund_.platformFee();
+    state.withdrawalFee = fund_.withdrawalFee();
+    state.maxInvestmentInStrategies = fund_.maxInvestmentInStrategies();
+    state.totalWeightInStrategies = fund_.totalWeightInStrategies();
+    state.totalAccounted = fund_.totalAccounted();
+    state.totalInvested = fund_.totalInvested();
+    state.depositsPaused = fund_.depositsPaused();
+    state.shouldRebalance = fund_.shouldRebalance();
+    state.lastHardworkTimestamp = fund_.lastHardworkTimestamp();
+    state.useCachedBalances = fund_.useCachedBalances();
+    state.maxCachedBalanceAge = fund_.maxCachedBalanceAge();
+    state.preserveStrategyOrder = fund_.preserveStrategyOrder();
+    state.queuedMode = fund_.queuedMode();
+    state.currentEpoch = fund_.currentEpoch();
+    state.claimableUnderlying = fund_.claimableUnderlying();
+    state.totalAccruedFees = fund_.totalAccruedFees();
+    state.feesInShares = fund_.feesInShares();
+    (state.reserveTarget, state.reserveFloor, state.reserveCeiling) = fund_.reservePolicy();
+    (state.rebalanceThreshold, state.rebalanceMinAmount) = fund_.rebalanceBand();
+    state.hardWorkCursor = fund_.hardWorkCursor();
+    state.ppsCheckpointCount = fund_.ppsCheckpointCount();
+    state.storageVersion = fund_.storageVersion();
+    state.totalSupply = fund_.totalSupply();
+    state.underlyingBalance = IERC20(state.underlying).balanceOf(fund);
+    state.totalValueLocked = fund_.totalValueLocked();
+    state.pricePerShare = fund_.getPricePerShare();
+    state.withdrawalQueue = fund_.getWithdrawalQueue();
+    state.strategies = getStrategyStates(fund_);
+  }
+
+  function getStrategyStates(Fund fund_) internal view returns (StrategyState[] memory strategyStates) {
+    address[] memory strategyList = fund_.getStrategyList();
+    strategyStates = new StrategyState[](strategyList.length);
+    for (uint256 i = 0; i < strategyList.length; i++) {
+      Fund.StrategyParams memory params = fund_.getStrategy(strategyList[i]);
+      strategyStates[i] = StrategyState({
+        strategy: strategyList[i],
+        weightage: params.weightage,
+        performanceFeeStrategy: params.performanceFeeStrategy,
+        activation: params.activation,
+        lastBalance: params.lastBalance,
+        indexInList: params.indexInList,
+        investedUnderlyingBalance: IStrategy(strategyList[i]).investedUnderlyingBalance(),
+        withdrawalCostHint: fund_.withdrawalCostHint(strategyList[i])
+      });
+    }
+  }
+
+  function getHolderState(address fund, address holder) public view returns (HolderState memory state) {
+    Fund fund_ = Fund(fund);
+    IERC20 underlying = IERC20(fund_.underlying());
+
+    state.holder = holder;
+    state.shares = fund_.balanceOf(holder);
+    state.underlyingBalanceWithInvestment = fund_.underlyingBalanceWithInvestmentForHolder(holder);
+    state.underlyingBalance = underlying.balanceOf(holder);
+    state.underlyingAllowance = underlying.allowance(holder, fund);
+    (state.pendingRequestEpoch, state.pendingDeposit, state.pendingWithdrawal) = fund_.pendingRequests(holder);
+  }
+
+  function getFundStateForHolder(address fund, address holder) external view returns (FundState memory fundState, HolderState memory holderState) {
+    fundState = getFundState(fund);
+    holderState = getHolderState(fund, holder);
+  }
+
+  function getFundStates(address[] calldata funds) external view returns (FundState[] memory states) {
+    states = new FundState[](funds.length);
+    for (uint256 i = 0; i < funds.length; i++) {
+      states[i] = getFundState(funds[i]);
+    }
+  }
+}
@@ -3,6 +3,27 @@ pragma solidity 0.6.12;
 
 import "OpenZeppelin/openzeppelin-contracts-upgradeable@3.4.0/contracts/proxy/Initializable.sol";
 
+/**
+* Parameters of the fund in unstructured storage slots. Related parameters share a slot:
+*   fees:            performanceFeeFund, platformFee, withdrawalFee, maxInvestmentInStrategies, totalWeightInStrategies,
+*                    reserveTarget, reserveFloor, reserveCeiling (16 bits each, BPS)
+*   state:           lastHardworkTimestamp, maxCachedBalanceAge (64 bits each) and the flags
+*                    depositsPaused, shouldRebalance, useCachedBalances, queuedMode, preserveStrategyOrder, hardWorkCycleRebalance,
+*                    feesInShares (1 bit each)
+*                    and hardWorkCursor, ppsCheckpointCount (32 bits each)
+*   totals:          totalAccounted, totalInvested (128 bits each)
+*   depositLimitsTx: depositLimitTxMax, depositLimitTxMin (128 bits each)
+*   hardWorkCycle:   hardWorkCycleAmount, hardWorkProfitToFund (128 bits each), only used while a chunked hard work is in progress
+*   rebalanceBand:   rebalanceThreshold (16 bits, BPS), rebalanceMinAmount (128 bits)
+*   ppsCheckpoints:  ring buffer of PPS_CHECKPOINT_CAPACITY consecutive slots from _PPS_CHECKPOINTS_SLOT, one checkpoint
+*                    per slot: timestamp (64 bits), pricePerShare, totalValueLocked (96 bits each)
+* Hot paths load these slots once into a FundConfig with _loadConfig and write back the changed slots with _storeConfig.
+*
+* Storage version 0 kept every parameter in its own slot (the _LEGACY_ slots). Fund.finalizeUpgrade calls
+* migrateFundStorage, which moves the values into the packed slots, clears the old slots and sets the version to 1.
+* Funds upgraded through FundProxy.upgrade are migrated in the same transaction. Funds behind FundBeaconProxy
+* are migrated by FundFactory.finalizeFunds, to call right after FundFactory.setFundImplementation.
+*/
 contract FundStorage is Initializable {
 
   bytes32 internal constant _UNDERLYING_SLOT = 0xe0dc1d429ff8628e5936b3d6a6546947e1cc9ea7415a59d46ce95b3cfa4442b9;
@@ -10,18 +31,117 @@ contract FundStorage is Initializable {
   bytes32 internal constant _FUND_MANAGER_SLOT = 0x670552e214026020a9e6caa820519c7f879b21bd75b5571387d6a9cf8f94bd18;
   bytes32 internal constant _PLATFORM_REWARDS_SLOT = 0x92260bfe68dd0f8a9f5439b75466781ba1ce44523ed1a3026a73eada49072e65;
   bytes32 internal constant _DEPOSIT_LIMIT_SLOT = 0xca2f8a3e9ea81335bcce793cde55fc0c38129b594f53052d2bb18099ffa72613;
-  bytes32 internal constant _DEPOSIT_LIMIT_TX_MAX_SLOT = 0x769f312c3790719cf1ea5f75303393f080fd62be88d75fa86726a6be00bb5a24;
-  bytes32 internal constant _DEPOSIT_LIMIT_TX_MIN_SLOT = 0x9027949576d185c74d79ad3b8a8dbff32126f3a3ee140b346f146beb18234c85;
-  bytes32 internal constant _PERFORMANCE_FEE_FUND_SLOT = 0x5b8979500398f8fbeb42c36d18f31a76fd0ab30f4338d864e7d8734b340e9bb9;
-  bytes32 internal constant _PLATFORM_FEE_SLOT = 0x2084059f3bff3cc3fd204df32325dcb05f47c2f590aba5d103ec584523738e7a;
-  bytes32 internal constant _WITHDRAWAL_FEE_SLOT = 0x0fa90db0cd58feef247d70d3b21f64c03d0e3ec10eb297f015da0cc09eb3412c;
-  bytes32 internal constant _MAX_INVESTMENT_IN_STRATEGIES_SLOT = 0xe3b5969c9426551aa8f16dbc7b25042b9b9c9869b759c77a85f0b097ac363475;
-  bytes32 internal constant _TOTAL_WEIGHT_IN_STRATEGIES_SLOT = 0x63177e03c47ab825f04f5f8f2334e312239890e7588db78cabe10d7aec327fd2;
-  bytes32 internal constant _TOTAL_ACCOUNTED_SLOT = 0xa19f3b8a62465676ae47ab811ee15e3d2b68d88869cb38686d086a11d382f6bb;
-  bytes32 internal constant _TOTAL_INVESTED_SLOT = 0x49c84685200b42972f845832b2c3da3d71def653c151340801aeae053ce104e9;
-  bytes32 internal constant _DEPOSITS_PAUSED_SLOT = 0x3cefcfe9774096ac956c0d63992ea27a01fb3884a22b8765ad63c8366f90a9c8;
-  bytes32 internal constant _SHOULD_REBALANCE_SLOT = 0x7f8e3dfb98485aa419c1d05b6ea089a8cddbafcfcf4491db33f5d0b5fe4f32c7;
-  bytes32 internal constant _LAST_HARDWORK_TIMESTAMP_SLOT = 0x0260c2bf5555cd32cedf39c0fcb0eab8029c67b3d5137faeb3e24a500db80bc9;
+  bytes32 internal constant _TOTAL_LAST_BALANCE_SLOT = 0xc38ab48688a2caac1e21a2bf6f48be92b53110dc1a05f6d335fc939fb6169764;
+  bytes32 internal constant _CURRENT_EPOCH_SLOT = 0xa4c27415f65f2624787a5c1cc21c1004111b3ca09f74a539f761c534be144754;
+  bytes32 internal constant _CLAIMABLE_UNDERLYING_SLOT = 0xfaf58b9ae471cb8a04f78b587c632117cb216623a799b1ae4d6915cb4ba98416;
+  bytes32 internal constant _TOTAL_ACCRUED_FEES_SLOT = 0xfbea82e3dfeaadf233bccafa47b03e21b0d3bd3168543dda96c11775ff2c2c7f;
+  bytes32 internal constant _FEES_SLOT = 0xe93952420685310c7da60b99cb1a2e8ad2b9f5c783b7b8474c44ed3014127fc8;
+  bytes32 internal constant _STATE_SLOT = 0xc25528d55860f4801f3f749267aa1b845aaab33aeeb93bbf7e67f1e53c964556;
+  bytes32 internal constant _TOTALS_SLOT = 0x28f03533317ae7ca849fd29cb2851f27cde06da92796b1d52d1b995f0722762c;
+  bytes32 internal constant _DEPOSIT_LIMITS_TX_SLOT = 0x18d5ed0e812656fbca86b84233e56a52b9adcb3306fd9f0ec6d3e4c6f6df709f;
+  bytes32 internal constant _STORAGE_VERSION_SLOT = 0x51d8a25cd72c0aaa9f16e352a7d9aee3ede1a03093d18bc968a8e8b1046502a5;
+  bytes32 internal constant _HARD_WORK_CYCLE_SLOT = 0xad6164155e17d42ecb255b902a496eea93c4b5757f263e10e0d2ab2d98cf5963;
+  bytes32 internal constant _REBALANCE_BAND_SLOT = 0xb16eb115b615bcab8a300677604896eb7a576004b0890f6e3954955246a9cd9b;
+  bytes32 internal constant _PPS_CHECKPOINTS_SLOT = 0x55fb605b053e26d3e637e3722163d8b007c6c39c4c675b15d30a6058593148be;
+  bytes32 internal constant _FACTORY_SLOT = 0x837fd12d5dc984fd17654aa375e8718fe6bc95c3171790ca873c302bfb479c2b;
+
+  // slots of storage version 0, only read by migrateFundStorage
+  bytes32 internal constant _LEGACY_DEPOSIT_LIMIT_TX_MAX_SLOT = 0x769f312c3790719cf1ea5f75303393f080fd62be88d75fa86726a6be00bb5a24;
+  bytes32 internal constant _LEGACY_DEPOSIT_LIMIT_TX_MIN_SLOT = 0x9027949576d185c74d79ad3b8a8dbff32126f3a3ee140b346f146beb18234c85;
+  bytes32 internal constant _LEGACY_PERFORMANCE_FEE_FUND_SLOT = 0x5b8979500398f8fbeb42c36d18f31a76fd0ab30f4338d864e7d8734b340e9bb9;
+  bytes32 internal constant _LEGACY_PLATFORM_FEE_SLOT = 0x2084059f3bff3cc3fd204df32325dcb05f47c2f590aba5d103ec584523738e7a;
+  bytes32 internal constant _LEGACY_WITHDRAWAL_FEE_SLOT = 0x0fa90db0cd58feef247d70d3b21f64c03d0e3ec10eb297f015da0cc09eb3412c;
+  bytes32 internal constant _LEGACY_MAX_INVESTMENT_IN_STRATEGIES_SLOT = 0xe3b5969c9426551aa8f16dbc7b25042b9b9c9869b759c77a85f0b097ac363475;
+  bytes32 internal constant _LEGACY_TOTAL_WEIGHT_IN_STRATEGIES_SLOT = 0x63177e03c47ab825f04f5f8f2334e312239890e7588db78cabe10d7aec327fd2;
+  bytes32 internal constant _LEGACY_TOTAL_ACCOUNTED_SLOT = 0xa19f3b8a62465676ae47ab811ee15e3d2b68d88869cb38686d086a11d382f6bb;
+  bytes32 internal constant _LEGACY_TOTAL_INVESTED_SLOT = 0x49c84685200b42972f845832b2c3da3d71def653c151340801aeae053ce104e9;
+  bytes32 internal constant _LEGACY_DEPOSITS_PAUSED_SLOT = 0x3cefcfe9774096ac956c0d63992ea27a01fb3884a22b8765ad63c8366f90a9c8;
+  bytes32 internal constant _LEGACY_SHOULD_REBALANCE_SLOT = 0x7f8e3dfb98485aa419c1d05b6ea089a8cddbafcfcf4491db33f5d0b5fe4f32c7;
+  bytes32 internal constant _LEGACY_LAST_HARDWORK_TIMESTAMP_SLOT = 0x0260c2bf5555cd32cedf39c0fcb0eab8029c67b3d5137faeb3e24a500db80bc9;
+
+  uint256 internal constant STORAGE_VERSION = 1;
+  uint256 internal constant PPS_CHECKPOINT_CAPACITY = 256;
+
+  // sizes and offsets in bits of the fields in the packed slots
+  uint256 private constant BPS_BITS = 16;
+  uint256 private constant TIMESTAMP_BITS = 64;
+  uint256 private constant AMOUNT_BITS = 128;
+  uint256 private constant FLAG_BITS = 1;
+  uint256 private constant INDEX_BITS = 32;
+  uint256 private constant CHECKPOINT_AMOUNT_BITS = 96;
+
+  uint256 private constant PERFORMANCE_FEE_FUND_OFFSET = 0;
+  uint256 private constant PLATFORM_FEE_OFFSET = 16;
+  uint256 private constant WITHDRAWAL_FEE_OFFSET = 32;
+  uint256 private constant MAX_INVESTMENT_IN_STRATEGIES_OFFSET = 48;
+  uint256 private constant TOTAL_WEIGHT_IN_STRATEGIES_OFFSET = 64;
+  uint256 private constant RESERVE_TARGET_OFFSET = 80;
+  uint256 private constant RESERVE_FLOOR_OFFSET = 96;
+  uint256 private constant RESERVE_CEILING_OFFSET = 112;
+
+  uint256 private constant LAST_HARDWORK_TIMESTAMP_OFFSET = 0;
+  uint256 private constant MAX_CACHED_BALANCE_AGE_OFFSET = 64;
+  uint256 private constant DEPOSITS_PAUSED_OFFSET = 128;
+  uint256 private constant SHOULD_REBALANCE_OFFSET = 129;
+  uint256 private constant USE_CACHED_BALANCES_OFFSET = 130;
+  uint256 private constant QUEUED_MODE_OFFSET = 131;
+  uint256 private constant PRESERVE_STRATEGY_ORDER_OFFSET = 132;
+  uint256 private constant HARD_WORK_CYCLE_REBALANCE_OFFSET = 133;
+  uint256 private constant FEES_IN_SHARES_OFFSET = 134;
+  uint256 private constant HARD_WORK_CURSOR_OFFSET = 160;
+  uint256 private constant PPS_CHECKPOINT_COUNT_OFFSET = 192;
+
+  uint256 private constant TOTAL_ACCOUNTED_OFFSET = 0;
+  uint256 private constant TOTAL_INVESTED_OFFSET = 128;
+
+  uint256 private constant DEPOSIT_LIMIT_TX_MAX_OFFSET = 0;
+  uint256 private constant DEPOSIT_LIMIT_TX_MIN_OFFSET = 128;
+
+  uint256 private constant HARD_WORK_CYCLE_AMOUNT_OFFSET = 0;
+  uint256 private constant HARD_WORK_PROFIT_TO_FUND_OFFSET = 128;
+
+  uint256 private constant REBALANCE_THRESHOLD_OFFSET = 0;
+  uint256 private constant REBALANCE_MIN_AMOUNT_OFFSET = 128;
+
+  uint256 private constant CHECKPOINT_TIMESTAMP_OFFSET = 0;
+  uint256 private constant CHECKPOINT_PRICE_PER_SHARE_OFFSET = 64;
+  uint256 private constant CHECKPOINT_TOTAL_VALUE_LOCKED_OFFSET = 160;
+
+  // the parameters read by the hot paths, loaded once per call
+  struct FundConfig {
+    address underlying;
+    uint256 performanceFeeFund;
+    uint256 platformFee;
+    uint256 withdrawalFee;
+    uint256 maxInvestmentInStrategies;
+    uint256 totalWeightInStrategies;
+    uint256 reserveTarget;
+    uint256 reserveFloor;
+    uint256 reserveCeiling;
+    uint256 lastHardworkTimestamp;
+    uint256 maxCachedBalanceAge;
+    bool depositsPaused;
+    bool shouldRebalance;
+    bool useCachedBalances;
+    bool queuedMode;
+    bool preserveStrategyOrder;
+    bool hardWorkCycleRebalance;
+    bool feesInShares;
+    uint256 hardWorkCursor;
+    uint256 ppsCheckpointCount;  // checkpoints recorded since the fund was created, including the overwritten ones
+    uint256 totalAccounted;
+    uint256 totalInvested;
+    // packed slots as loaded, a slot is only written back when one of its fields changed
+    uint256 feesWord;
+    uint256 stateWord;
+    uint256 totalsWord;
+  }
+
+  struct PpsCheckpoint {
+    uint256 timestamp;
+    uint256 pricePerShare;
+    uint256 totalValueLocked;
+  }
 
   constructor() public {
     assert(_UNDERLYING_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.underlying")) - 1));
@@ -29,18 +149,31 @@ contract FundStorage is Initializable {
     assert(_FUND_MANAGER_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.fundManager")) - 1));
     assert(_PLATFORM_REWARDS_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.platformRewards")) - 1));
     assert(_DEPOSIT_LIMIT_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.depositLimit")) - 1));
-    assert(_DEPOSIT_LIMIT_TX_MAX_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.depositLimitTxMax")) - 1));
-    assert(_DEPOSIT_LIMIT_TX_MIN_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.depositLimitTxMin")) - 1));
-    assert(_PERFORMANCE_FEE_FUND_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.performanceFeeFund")) - 1));
-    assert(_PLATFORM_FEE_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.platformFee")) - 1));
-    assert(_WITHDRAWAL_FEE_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.withdrawalFee")) - 1));
-    assert(_MAX_INVESTMENT_IN_STRATEGIES_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.maxInvestmentInStrategies")) - 1));
-    assert(_TOTAL_WEIGHT_IN_STRATEGIES_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.totalWeightInStrategies")) - 1));
-    assert(_TOTAL_ACCOUNTED_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.totalAccounted")) - 1));
-    assert(_TOTAL_INVESTED_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.totalInvested")) - 1));
-    assert(_DEPOSITS_PAUSED_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.depositsPaused")) - 1));
-    assert(_SHOULD_REBALANCE_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.shouldRebalance")) - 1));
-    assert(_LAST_HARDWORK_TIMESTAMP_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.lastHardworkTimestamp")) - 1));
+    assert(_TOTAL_LAST_BALANCE_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.totalLastBalance")) - 1));
+    assert(_CURRENT_EPOCH_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.currentEpoch")) - 1));
+    assert(_CLAIMABLE_UNDERLYING_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.claimableUnderlying")) - 1));
+    assert(_TOTAL_ACCRUED_FEES_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.totalAccruedFees")) - 1));
+    assert(_FEES_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.fees")) - 1));
+    assert(_STATE_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.state")) - 1));
+    assert(_TOTALS_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.totals")) - 1));
+    assert(_DEPOSIT_LIMITS_TX_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.depositLimitsTx")) - 1));
+    assert(_STORAGE_VERSION_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.storageVersion")) - 1));
+    assert(_HARD_WORK_CYCLE_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.hardWorkCycle")) - 1));
+    assert(_REBALANCE_BAND_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.rebalanceBand")) - 1));
+    assert(_PPS_CHECKPOINTS_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.ppsCheckpoints")) - 1));
+    assert(_FACTORY_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.factory")) - 1));
+    assert(_LEGACY_DEPOSIT_LIMIT_TX_MAX_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.depositLimitTxMax")) - 1));
+    assert(_LEGACY_DEPOSIT_LIMIT_TX_MIN_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.depositLimitTxMin")) - 1));
+    assert(_LEGACY_PERFORMANCE_FEE_FUND_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.performanceFeeFund")) - 1));
+    assert(_LEGACY_PLATFORM_FEE_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.platformFee")) - 1));
+    assert(_LEGACY_WITHDRAWAL_FEE_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.withdrawalFee")) - 1));
+    assert(_LEGACY_MAX_INVESTMENT_IN_STRATEGIES_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.maxInvestmentInStrategies")) - 1));
+    assert(_LEGACY_TOTAL_WEIGHT_IN_STRATEGIES_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.totalWeightInStrategies")) - 1));
+    assert(_LEGACY_TOTAL_ACCOUNTED_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.totalAccounted")) - 1));
+    assert(_LEGACY_TOTAL_INVESTED_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.totalInvested")) - 1));
+    assert(_LEGACY_DEPOSITS_PAUSED_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.depositsPaused")) - 1));
+    assert(_LEGACY_SHOULD_REBALANCE_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.shouldRebalance")) - 1));
+    assert(_LEGACY_LAST_HARDWORK_TIMESTAMP_SLOT == bytes32(uint256(keccak256("eip1967.mesh.finance.fundStorage.lastHardworkTimestamp")) - 1));
   }
 
 
@@ -54,6 +187,7 @@ contract FundStorage is Initializable {
     _setUnderlyingUnit(_underlyingUnit);
     _setFundManager(_fundManager);
     _setPlatformRewards(_platformRewards);
+    _setFactory(msg.sender);
     _setDepositLimit(0);
     _setDepositLimitTxMax(0);
     _setDepositLimitTxMin(0);
@@ -67,6 +201,127 @@ contract FundStorage is Initializable {
     _setDepositsPaused(false);
     _setShouldRebalance(false);
     _setLastHardworkTimestamp(0);
+    _setUseCachedBalances(false);
+    _setMaxCachedBalanceAge(0);
+    _setTotalLastBalance(0);
+    _setQueuedMode(false);
+    _setCurrentEpoch(0);
+    _setClaimableUnderlying(0);
+    _setTotalAccruedFees(0);
+    _setPreserveStrategyOrder(false);
+    _setHardWorkCursor(0);
+    _setFeesInShares(false);
+    setUint256(_STORAGE_VERSION_SLOT, STORAGE_VERSION);
+  }
+
+  /**
+  * Moves the parameters of storage version 0 into the packed slots. Does nothing on funds already migrated.
+  */
+  function migrateFundStorage() internal {
+    if (getUint256(_STORAGE_VERSION_SLOT) >= STORAGE_VERSION) {
+      return;
+    }
+    _setDepositLimitTxMax(takeUint256(_LEGACY_DEPOSIT_LIMIT_TX_MAX_SLOT));
+    _setDepositLimitTxMin(takeUint256(_LEGACY_DEPOSIT_LIMIT_TX_MIN_SLOT));
+    _setPerformanceFeeFund(takeUint256(_LEGACY_PERFORMANCE_FEE_FUND_SLOT));
+    _setPlatformFee(takeUint256(_LEGACY_PLATFORM_FEE_SLOT));
+    _setWithdrawalFee(takeUint256(_LEGACY_WITHDRAWAL_FEE_SLOT));
+    _setMaxInvestmentInStrategies(takeUint256(_LEGACY_MAX_INVESTMENT_IN_STRATEGIES_SLOT));
+    _setTotalWeightInStrategies(takeUint256(_LEGACY_TOTAL_WEIGHT_IN_STRATEGIES_SLOT));
+    _setTotalAccounted(takeUint256(_LEGACY_TOTAL_ACCOUNTED_SLOT));
+    _setTotalInvested(takeUint256(_LEGACY_TOTAL_INVESTED_SLOT));
+    _setDepositsPaused(takeUint256(_LEGACY_DEPOSITS_PAUSED_SLOT) == 1);
+    _setShouldRebalance(takeUint256(_LEGACY_SHOULD_REBALANCE_SLOT) == 1);
+    _setLastHardworkTimestamp(takeUint256(_LEGACY_LAST_HARDWORK_TIMESTAMP_SLOT));
+    setUint256(_STORAGE_VERSION_SLOT, STORAGE_VERSION);
+  }
+
+  // contract that initialized the fund, FundFactory for the funds it created
+  function _setFactory(address _address) internal {
+    setAddress(_FACTORY_SLOT, _address);
+  }
+
+  function _factory() internal view returns (address) {
+    return getAddress(_FACTORY_SLOT);
+  }
+
+  function _storageVersion() internal view returns (uint256) {
+    return getUint256(_STORAGE_VERSION_SLOT);
+  }
+
+  function _loadConfig() internal view returns (FundConfig memory config) {
+    config.underlying = _underlying();
+    config.feesWord = getUint256(_FEES_SLOT);
+    config.stateWord = getUint256(_STATE_SLOT);
+    config.totalsWord = getUint256(_TOTALS_SLOT);
+
+    config.performanceFeeFund = fieldOf(config.feesWord, PERFORMANCE_FEE_FUND_OFFSET, BPS_BITS);
+    config.platformFee = fieldOf(config.feesWord, PLATFORM_FEE_OFFSET, BPS_BITS);
+    config.withdrawalFee = fieldOf(config.feesWord, WITHDRAWAL_FEE_OFFSET, BPS_BITS);
+    config.maxInvestmentInStrategies = fieldOf(config.feesWord, MAX_INVESTMENT_IN_STRATEGIES_OFFSET, BPS_BITS);
+    config.totalWeightInStrategies = fieldOf(config.feesWord, TOTAL_WEIGHT_IN_STRATEGIES_OFFSET, BPS_BITS);
+    config.reserveTarget = fieldOf(config.feesWord, RESERVE_TARGET_OFFSET, BPS_BITS);
+    config.reserveFloor = fieldOf(config.feesWord, RESERVE_FLOOR_OFFSET, BPS_BITS);
+    config.reserveCeiling = fieldOf(config.feesWord, RESERVE_CEILING_OFFSET, BPS_BITS);
+
+    config.lastHardworkTimestamp = fieldOf(config.stateWord, LAST_HARDWORK_TIMESTAMP_OFFSET, TIMESTAMP_BITS);
+    config.maxCachedBalanceAge = fieldOf(config.stateWord, MAX_CACHED_BALANCE_AGE_OFFSET, TIMESTAMP_BITS);
+    config.depositsPaused = fieldOf(config.stateWord, DEPOSITS_PAUSED_OFFSET, FLAG_BITS) == 1;
+    config.shouldRebalance = fieldOf(config.stateWord, SHOULD_REBALANCE_OFFSET, FLAG_BITS) == 1;
+    config.useCachedBalances = fieldOf(config.stateWord, USE_CACHED_BALANCES_OFFSET, FLAG_BITS) == 1;
+    config.queuedMode = fieldOf(config.stateWord, QUEUED_MODE_OFFSET, FLAG_BITS) == 1;
+    config.preserveStrategyOrder = fieldOf(config.stateWord, PRESERVE_STRATEGY_ORDER_OFFSET, FLAG_BITS) == 1;
+    config.hardWorkCycleRebalance = fieldOf(config.stateWord, HARD_WORK_CYCLE_REBALANCE_OFFSET, FLAG_BITS) == 1;
+    config.feesInShares = fieldOf(config.stateWord, FEES_IN_SHARES_OFFSET, FLAG_BITS) == 1;
+    config.hardWorkCursor = fieldOf(config.stateWord, HARD_WORK_CURSOR_OFFSET, INDEX_BITS);
+    config.ppsCheckpointCount = fieldOf(config.stateWord, PPS_CHECKPOINT_COUNT_OFFSET, INDEX_BITS);
+
+    config.totalAccounted = fieldOf(config.totalsWord, TOTAL_ACCOUNTED_OFFSET, AMOUNT_BITS);
+    config.totalInvested = fieldOf(config.totalsWord, TOTAL_INVESTED_OFFSET, AMOUNT_BITS);
+  }
+
+  /**
+  * Writes back the packed slots whose fields changed in config. The underlying is not written.
+  */
+  function _storeConfig(FundConfig memory config) internal {
+    uint256 word = config.feesWord;
+    word = withField(word, PERFORMANCE_FEE_FUND_OFFSET, BPS_BITS, config.performanceFeeFund);
+    word = withField(word, PLATFORM_FEE_OFFSET, BPS_BITS, config.platformFee);
+    word = withField(word, WITHDRAWAL_FEE_OFFSET, BPS_BITS, config.withdrawalFee);
+    word = withField(word, MAX_INVESTMENT_IN_STRATEGIES_OFFSET, BPS_BITS, config.maxInvestmentInStrategies);
+    word = withField(word, TOTAL_WEIGHT_IN_STRATEGIES_OFFSET, BPS_BITS, config.totalWeightInStrategies);
+    word = withField(word, RESERVE_TARGET_OFFSET, BPS_BITS, config.reserveTarget);
+    word = withField(word, RESERVE_FLOOR_OFFSET, BPS_BITS, config.reserveFloor);
+    word = withField(word, RESERVE_CEILING_OFFSET, BPS_BITS, config.reserveCeiling);
+    if (word != config.feesWord) {
+      setUint256(_FEES_SLOT, word);
+      config.feesWord = word;
+    }
+
+    word = config.stateWord;
+    word = withField(word, LAST_HARDWORK_TIMESTAMP_OFFSET, TIMESTAMP_BITS, config.lastHardworkTimestamp);
+    word = withField(word, MAX_CACHED_BALANCE_AGE_OFFSET, TIMESTAMP_BITS, config.maxCachedBalanceAge);
+    word = withField(word, DEPOSITS_PAUSED_OFFSET, FLAG_BITS, config.depositsPaused ? 1 : 0);
+    word = withField(word, SHOULD_REBALANCE_OFFSET, FLAG_BITS, config.shouldRebalance ? 1 : 0);
+    word = withField(word, USE_CACHED_BALANCES_OFFSET, FLAG_BITS, config.useCachedBalances ? 1 : 0);
+    word = withField(word, QUEUED_MODE_OFFSET, FLAG_BITS, config.queuedMode ? 1 : 0);
+    word = withField(word, PRESERVE_STRATEGY_ORDER_OFFSET, FLAG_BITS, config.preserveStrategyOrder ? 1 : 0);
+    word = withField(word, HARD_WORK_CYCLE_REBALANCE_OFFSET, FLAG_BITS, config.hardWorkCycleRebalance ? 1 : 0);
+    word = withField(word, FEES_IN_SHARES_OFFSET, FLAG_BITS, config.feesInShares ? 1 : 0);
+    word = withField(word, HARD_WORK_CURSOR_OFFSET, INDEX_BITS, config.hardWorkCursor);
+    word = withField(word, PPS_CHECKPOINT_COUNT_OFFSET, INDEX_BITS, config.ppsCheckpointCount);
+    if (word != config.stateWord) {
+      setUint256(_STATE_SLOT, word);
+      config.stateWord = word;
+    }
+
+    word = config.totalsWord;
+    word = withField(word, TOTAL_ACCOUNTED_OFFSET, AMOUNT_BITS, config.totalAccounted);
+    word = withField(word, TOTAL_INVESTED_OFFSET, AMOUNT_BITS, config.totalInvested);
+    if (word != config.totalsWord) {
+      setUint256(_TOTALS_SLOT, word);
+      config.totalsWord = word;
+    }
   }
 
   function _setUnderlying(address _address) internal {
@@ -110,99 +365,291 @@ contract FundStorage is Initializable {
   }
 
   function _setDepositLimitTxMax(uint256 _value) internal {
-    setUint256(_DEPOSIT_LIMIT_TX_MAX_SLOT, _value);
+    setField(_DEPOSIT_LIMITS_TX_SLOT, DEPOSIT_LIMIT_TX_MAX_OFFSET, AMOUNT_BITS, clamp(_value, AMOUNT_BITS));
   }
 
   function _depositLimitTxMax() internal view returns (uint256) {
-    return getUint256(_DEPOSIT_LIMIT_TX_MAX_SLOT);
+    return getField(_DEPOSIT_LIMITS_TX_SLOT, DEPOSIT_LIMIT_TX_MAX_OFFSET, AMOUNT_BITS);
   }
 
   function _setDepositLimitTxMin(uint256 _value) internal {
-    setUint256(_DEPOSIT_LIMIT_TX_MIN_SLOT, _value);
+    setField(_DEPOSIT_LIMITS_TX_SLOT, DEPOSIT_LIMIT_TX_MIN_OFFSET, AMOUNT_BITS, clamp(_value, AMOUNT_BITS));
   }
 
   function _depositLimitTxMin() internal view returns (uint256) {
-    return getUint256(_DEPOSIT_LIMIT_TX_MIN_SLOT);
+    return getField(_DEPOSIT_LIMITS_TX_SLOT, DEPOSIT_LIMIT_TX_MIN_OFFSET, AMOUNT_BITS);
   }
 
   function _setPerformanceFeeFund(uint256 _value) internal {
-    setUint256(_PERFORMANCE_FEE_FUND_SLOT, _value);
+    setField(_FEES_SLOT, PERFORMANCE_FEE_FUND_OFFSET, BPS_BITS, _value);
   }
 
   function _performanceFeeFund() internal view returns (uint256) {
-    return getUint256(_PERFORMANCE_FEE_FUND_SLOT);
+    return getField(_FEES_SLOT, PERFORMANCE_FEE_FUND_OFFSET, BPS_BITS);
   }
 
   function _setPlatformFee(uint256 _value) internal {
-    setUint256(_PLATFORM_FEE_SLOT, _value);
+    setField(_FEES_SLOT, PLATFORM_FEE_OFFSET, BPS_BITS, _value);
   }
 
   function _platformFee() internal view returns (uint256) {
-    return getUint256(_PLATFORM_FEE_SLOT);
+    return getField(_FEES_SLOT, PLATFORM_FEE_OFFSET, BPS_BITS);
   }
 
   function _setWithdrawalFee(uint256 _value) internal {
-    setUint256(_WITHDRAWAL_FEE_SLOT, _value);
+    setField(_FEES_SLOT, WITHDRAWAL_FEE_OFFSET, BPS_BITS, _value);
   }
 
   function _withdrawalFee() internal view returns (uint256) {
-    return getUint256(_WITHDRAWAL_FEE_SLOT);
+    return getField(_FEES_SLOT, WITHDRAWAL_FEE_OFFSET, BPS_BITS);
   }
 
   function _setMaxInvestmentInStrategies(uint256 _value) internal {
-    setUint256(_MAX_INVESTMENT_IN_STRATEGIES_SLOT, _value);
+    setField(_FEES_SLOT, MAX_INVESTMENT_IN_STRATEGIES_OFFSET, BPS_BITS, _value);
   }
 
   function _maxInvestmentInStrategies() internal view returns (uint256) {
-    return getUint256(_MAX_INVESTMENT_IN_STRATEGIES_SLOT);
+    return getField(_FEES_SLOT, MAX_INVESTMENT_IN_STRATEGIES_OFFSET, BPS_BITS);
   }
 
   function _setTotalWeightInStrategies(uint256 _value) internal {
-    setUint256(_TOTAL_WEIGHT_IN_STRATEGIES_SLOT, _value);
+    setField(_FEES_SLOT, TOTAL_WEIGHT_IN_STRATEGIES_OFFSET, BPS_BITS, _value);
   }
 
   function _totalWeightInStrategies() internal view returns (uint256) {
-    return getUint256(_TOTAL_WEIGHT_IN_STRATEGIES_SLOT);
+    return getField(_FEES_SLOT, TOTAL_WEIGHT_IN_STRATEGIES_OFFSET, BPS_BITS);
+  }
+
+  function _setReservePolicy(uint256 target, uint256 floor, uint256 ceiling) internal {
+    setField(_FEES_SLOT, RESERVE_TARGET_OFFSET, BPS_BITS, target);
+    setField(_FEES_SLOT, RESERVE_FLOOR_OFFSET, BPS_BITS, floor);
+    setField(_FEES_SLOT, RESERVE_CEILING_OFFSET, BPS_BITS, ceiling);
+  }
+
+  function _reservePolicy() internal view returns (uint256 target, uint256 floor, uint256 ceiling) {
+    uint256 word = getUint256(_FEES_SLOT);
+    target = fieldOf(word, RESERVE_TARGET_OFFSET, BPS_BITS);
+    floor = fieldOf(word, RESERVE_FLOOR_OFFSET, BPS_BITS);
+    ceiling = fieldOf(word, RESERVE_CEILING_OFFSET, BPS_BITS);
   }
 
   function _setTotalAccounted(uint256 _value) internal {
-    setUint256(_TOTAL_ACCOUNTED_SLOT, _value);
+    setField(_TOTALS_SLOT, TOTAL_ACCOUNTED_OFFSET, AMOUNT_BITS, _value);
   }
 
   function _totalAccounted() internal view returns (uint256) {
-    return getUint256(_TOTAL_ACCOUNTED_SLOT);
+    return getField(_TOTALS_SLOT, TOTAL_ACCOUNTED_OFFSET, AMOUNT_BITS);
   }
 
   function _setTotalInvested(uint256 _value) internal {
-    setUint256(_TOTAL_INVESTED_SLOT, _value);
+    setField(_TOTALS_SLOT, TOTAL_INVESTED_OFFSET, AMOUNT_BITS, _value);
   }
 
   function _totalInvested() internal view returns (uint256) {
-    return getUint256(_TOTAL_INVESTED_SLOT);
+    return getField(_TOTALS_SLOT, TOTAL_INVESTED_OFFSET, AMOUNT_BITS);
   }
 
   function _setDepositsPaused(bool _value) internal {
-    setBool(_DEPOSITS_PAUSED_SLOT, _value);
+    setFlag(DEPOSITS_PAUSED_OFFSET, _value);
   }
 
   function _depositsPaused() internal view returns (bool) {
-    return getBool(_DEPOSITS_PAUSED_SLOT);
+    return getFlag(DEPOSITS_PAUSED_OFFSET);
   }
 
   function _setShouldRebalance(bool _value) internal {
-    setBool(_SHOULD_REBALANCE_SLOT, _value);
+    setFlag(SHOULD_REBALANCE_OFFSET, _value);
   }
 
   function _shouldRebalance() internal view returns (bool) {
-    return getBool(_SHOULD_REBALANCE_SLOT);
+    return getFlag(SHOULD_REBALANCE_OFFSET);
   }
 
   function _setLastHardworkTimestamp(uint256 _value) internal {
-    setUint256(_LAST_HARDWORK_TIMESTAMP_SLOT, _value);
+    setField(_STATE_SLOT, LAST_HARDWORK_TIMESTAMP_OFFSET, TIMESTAMP_BITS, _value);
   }
 
   function _lastHardworkTimestamp() internal view returns (uint256) {
-    return getUint256(_LAST_HARDWORK_TIMESTAMP_SLOT);
+    return getField(_STATE_SLOT, LAST_HARDWORK_TIMESTAMP_OFFSET, TIMESTAMP_BITS);
+  }
+
+  function _setUseCachedBalances(bool _value) internal {
+    setFlag(USE_CACHED_BALANCES_OFFSET, _value);
+  }
+
+  function _useCachedBalances() internal view returns (bool) {
+    return getFlag(USE_CACHED_BALANCES_OFFSET);
+  }
+
+  function _setMaxCachedBalanceAge(uint256 _value) internal {
+    setField(_STATE_SLOT, MAX_CACHED_BALANCE_AGE_OFFSET, TIMESTAMP_BITS, clamp(_value, TIMESTAMP_BITS));
+  }
+
+  function _maxCachedBalanceAge() internal view returns (uint256) {
+    return getField(_STATE_SLOT, MAX_CACHED_BALANCE_AGE_OFFSET, TIMESTAMP_BITS);
+  }
+
+  function _setTotalLastBalance(uint256 _value) internal {
+    setUint256(_TOTAL_LAST_BALANCE_SLOT, _value);
+  }
+
+  function _totalLastBalance() internal view returns (uint256) {
+    return getUint256(_TOTAL_LAST_BALANCE_SLOT);
+  }
+
+  function _setQueuedMode(bool _value) internal {
+    setFlag(QUEUED_MODE_OFFSET, _value);
+  }
+
+  function _queuedMode() internal view returns (bool) {
+    return getFlag(QUEUED_MODE_OFFSET);
+  }
+
+  function _setCurrentEpoch(uint256 _value) internal {
+    setUint256(_CURRENT_EPOCH_SLOT, _value);
+  }
+
+  function _currentEpoch() internal view returns (uint256) {
+    return getUint256(_CURRENT_EPOCH_SLOT);
+  }
+
+  function _setClaimableUnderlying(uint256 _value) internal {
+    setUint256(_CLAIMABLE_UNDERLYING_SLOT, _value);
+  }
+
+  function _claimableUnderlying() internal view returns (uint256) {
+    return getUint256(_CLAIMABLE_UNDERLYING_SLOT);
+  }
+
+  function _setTotalAccruedFees(uint256 _value) internal {
+    setUint256(_TOTAL_ACCRUED_FEES_SLOT, _value);
+  }
+
+  function _totalAccruedFees() internal view returns (uint256) {
+    return getUint256(_TOTAL_ACCRUED_FEES_SLOT);
+  }
+
+  function _setPreserveStrategyOrder(bool _value) internal {
+    setFlag(PRESERVE_STRATEGY_ORDER_OFFSET, _value);
+  }
+
+  function _preserveStrategyOrder() internal view returns (bool) {
+    return getFlag(PRESERVE_STRATEGY_ORDER_OFFSET);
+  }
+
+  function _setFeesInShares(bool _value) internal {
+    setFlag(FEES_IN_SHARES_OFFSET, _value);
+  }
+
+  function _feesInShares() internal view returns (bool) {
+    return getFlag(FEES_IN_SHARES_OFFSET);
+  }
+
+  function _setHardWorkCursor(uint256 _value) internal {
+    setField(_STATE_SLOT, HARD_WORK_CURSOR_OFFSET, INDEX_BITS, _value);
+  }
+
+  function _hardWorkCursor() internal view returns (uint256) {
+    return getField(_STATE_SLOT, HARD_WORK_CURSOR_OFFSET, INDEX_BITS);
+  }
+
+  function _setHardWorkCycleAmount(uint256 _value) internal {
+    setField(_HARD_WORK_CYCLE_SLOT, HARD_WORK_CYCLE_AMOUNT_OFFSET, AMOUNT_BITS, _value);
+  }
+
+  function _hardWorkCycleAmount() internal view returns (uint256) {
+    return getField(_HARD_WORK_CYCLE_SLOT, HARD_WORK_CYCLE_AMOUNT_OFFSET, AMOUNT_BITS);
+  }
+
+  function _setHardWorkProfitToFund(uint256 _value) internal {
+    setField(_HARD_WORK_CYCLE_SLOT, HARD_WORK_PROFIT_TO_FUND_OFFSET, AMOUNT_BITS, _value);
+  }
+
+  function _hardWorkProfitToFund() internal view returns (uint256) {
+    return getField(_HARD_WORK_CYCLE_SLOT, HARD_WORK_PROFIT_TO_FUND_OFFSET, AMOUNT_BITS);
+  }
+
+  function _setRebalanceBand(uint256 threshold, uint256 minAmount) internal {
+    uint256 word = withField(0, REBALANCE_THRESHOLD_OFFSET, BPS_BITS, threshold);
+    setUint256(_REBALANCE_BAND_SLOT, withField(word, REBALANCE_MIN_AMOUNT_OFFSET, AMOUNT_BITS, minAmount));
+  }
+
+  function _rebalanceBand() internal view returns (uint256 threshold, uint256 minAmount) {
+    uint256 word = getUint256(_REBALANCE_BAND_SLOT);
+    threshold = fieldOf(word, REBALANCE_THRESHOLD_OFFSET, BPS_BITS);
+    minAmount = fieldOf(word, REBALANCE_MIN_AMOUNT_OFFSET, AMOUNT_BITS);
+  }
+
+  /**
+  * Writes a checkpoint over the oldest one once the buffer is full. The count is only updated in config,
+  * it is written with the state slot by _storeConfig. Amounts above 96 bits are stored as the 96 bit maximum.
+  */
+  function _writePpsCheckpoint(FundConfig memory config, uint256 pricePerShare, uint256 totalValueLocked) internal {
+    uint256 maxAmount = (uint256(1) << CHECKPOINT_AMOUNT_BITS) - 1;
+    uint256 word = withField(0, CHECKPOINT_TIMESTAMP_OFFSET, TIMESTAMP_BITS, block.timestamp);
+    word = withField(word, CHECKPOINT_PRICE_PER_SHARE_OFFSET, CHECKPOINT_AMOUNT_BITS, pricePerShare < maxAmount ? pricePerShare : maxAmount);
+    word = withField(word, CHECKPOINT_TOTAL_VALUE_LOCKED_OFFSET, CHECKPOINT_AMOUNT_BITS, totalValueLocked < maxAmount ? totalValueLocked : maxAmount);
+    setUint256(ppsCheckpointSlot(config.ppsCheckpointCount), word);
+    config.ppsCheckpointCount = config.ppsCheckpointCount + 1;
+  }
+
+  function _ppsCheckpointCount() internal view returns (uint256) {
+    return getField(_STATE_SLOT, PPS_CHECKPOINT_COUNT_OFFSET, INDEX_BITS);
+  }
+
+  // checkpoint number `index` since the fund was created, only the last PPS_CHECKPOINT_CAPACITY are kept
+  function _ppsCheckpoint(uint256 index) internal view returns (PpsCheckpoint memory checkpoint) {
+    uint256 word = getUint256(ppsCheckpointSlot(index));
+    checkpoint.timestamp = fieldOf(word, CHECKPOINT_TIMESTAMP_OFFSET, TIMESTAMP_BITS);
+    checkpoint.pricePerShare = fieldOf(word, CHECKPOINT_PRICE_PER_SHARE_OFFSET, CHECKPOINT_AMOUNT_BITS);
+    checkpoint.totalValueLocked = fieldOf(word, CHECKPOINT_TOTAL_VALUE_LOCKED_OFFSET, CHECKPOINT_AMOUNT_BITS);
+  }
+
+  function ppsCheckpointSlot(uint256 index) private pure returns (bytes32) {
+    return bytes32(uint256(_PPS_CHECKPOINTS_SLOT) + index % PPS_CHECKPOINT_CAPACITY);
+  }
+
+  function setFlag(uint256 offset, bool _value) private {
+    setField(_STATE_SLOT, offset, FLAG_BITS, _value ? 1 : 0);
+  }
+
+  function getFlag(uint256 offset) private view returns (bool) {
+    return getField(_STATE_SLOT, offset, FLAG_BITS) == 1;
+  }
+
+  function setField(bytes32 slot, uint256 offset, uint256 size, uint256 _value) private {
+    setUint256(slot, withField(getUint256(slot), offset, size, _value));
+  }
+
+  function getField(bytes32 slot, uint256 offset, uint256 size) private view returns (uint256) {
+    return fieldOf(getUint256(slot), offset, size);
+  }
+
+  function withField(uint256 word, uint256 offset, uint256 size, uint256 _value) private pure returns (uint256) {
+    uint256 mask = (uint256(1) << size) - 1;
+    require(_value <= mask, "Value does not fit in storage");
+    return (word & ~(mask << offset)) | (_value << offset);
+  }
+
+  function fieldOf(uint256 word, uint256 offset, uint256 size) private pure returns (uint256) {
+    return (word >> offset) & ((uint256(1) << size) - 1);
+  }
+
+  /*
+  * Caps limits and ages to the largest value of their field. Storage version 0 and the setters took any uint256,
+  * e.g. type(uint256).max for no limit, and the largest value of the field has the same effect.
+  */
+  function clamp(uint256 _value, uint256 size) private pure returns (uint256) {
+    uint256 max = (uint256(1) << size) - 1;
+    return _value > max ? max : _value;
+  }
+
+  // reads a slot of storage version 0 and clears it
+  function takeUint256(bytes32 slot) private returns (uint256 _value) {
+    _value = getUint256(slot);
+    if (_value != 0) {
+      setUint256(slot, 0);
+    }
   }
 
   function setAddress(bytes32 slot, address _address) private {
@@ -219,14 +666,6 @@ contract FundStorage is Initializable {
     }
   }
 
-  function setBool(bytes32 slot, bool _value) internal {
-    setUint256(slot, _value ? 1 : 0);
-  }
-
-  function getBool(bytes32 slot) internal view returns (bool) {
-    return (getUint256(slot) == 1);
-  }
-
   function getAddress(bytes32 slot) private view returns (address str) {
     // solhint-disable-next-line no-inline-assembly
     assembly {
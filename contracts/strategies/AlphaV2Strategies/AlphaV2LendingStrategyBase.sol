@@ -23,6 +23,8 @@ contract AlphaV2LendingStrategyBase is IStrategy {
   using Address for address;
   using SafeMath for uint256;
 
+  uint256 internal constant MAX_BPS = 10000;   // 100% in basis points
+
   address public override underlying;
   address public override fund;
   address public override creator;
@@ -38,6 +40,9 @@ contract AlphaV2LendingStrategyBase is IStrategy {
 
   bool public investActivated;
 
+  // share of the invested balance kept as loose underlying to serve small withdrawals without the vault (in BPS)
+  uint256 public liquidityBuffer;
+
   constructor(
     address _fund,
     address _aBox,
@@ -87,9 +92,15 @@ contract AlphaV2LendingStrategyBase is IStrategy {
     investActivated = _investActivated;
   }
 
+  function setLiquidityBuffer(uint256 _liquidityBuffer) external onlyFundOrGovernance {
+    require(_liquidityBuffer <= MAX_BPS, "Buffer greater than 100%");
+    liquidityBuffer = _liquidityBuffer;
+  }
+
   /**
   * Withdraws an underlying asset from the strategy to the fund in the specified amount.
-  * It tries to withdraw from the strategy contract if this has enough balance.
+  * It tries to withdraw from the strategy contract if this has enough balance, which the liquidity buffer keeps
+  * for small withdrawals.
   * Otherwise, we withdraw shares from the Alpha V2 Lending Box. Transfer the required underlying amount to fund, 
   * and reinvest the rest. We can make it better by calculating the correct amount and withdrawing only that much.
   */
@@ -102,7 +113,11 @@ contract AlphaV2LendingStrategyBase is IStrategy {
       return;
     }
 
-    uint256 shares = shareValueFromUnderlying(underlyingAmount.sub(underlyingBalanceBefore));
+    // redeem enough to refill the liquidity buffer of the remaining balance, so the next small withdrawals skip the vault
+    uint256 balance = underlyingBalanceInVault().add(underlyingBalanceBefore);
+    uint256 remainingBalance = balance > underlyingAmount ? balance - underlyingAmount : 0;
+    uint256 toRedeem = underlyingAmount.sub(underlyingBalanceBefore).add(liquidityBufferTarget(remainingBalance));
+    uint256 shares = shareValueFromUnderlying(toRedeem);
     IAlphaV2(aBox).withdraw(shares);
     
     // we can transfer the asset to the fund
@@ -125,7 +140,7 @@ contract AlphaV2LendingStrategyBase is IStrategy {
   }
 
   /**
-  * Invests all underlying assets into our Alpha V2 Lending Box.
+  * Invests all underlying assets into our Alpha V2 Lending Box, except for the liquidity buffer.
   */
   function investAllUnderlying() internal {
     if(!investActivated) {
@@ -133,7 +148,9 @@ contract AlphaV2LendingStrategyBase is IStrategy {
     }
 
     uint256 underlyingBalance = IERC20(underlying).balanceOf(address(this));
-    if (underlyingBalance > 0) {
+    uint256 buffer = liquidityBufferTarget(underlyingBalanceInVault().add(underlyingBalance));
+    if (underlyingBalance > buffer) {
+      underlyingBalance = underlyingBalance - buffer;
       IERC20(underlying).safeApprove(aBox, 0);
       IERC20(underlying).safeApprove(aBox, underlyingBalance);
       // deposits the entire balance to Alpha V2 Lending Box
@@ -166,12 +183,19 @@ contract AlphaV2LendingStrategyBase is IStrategy {
   * plus the current balance of the underlying asset.
   */
   function investedUnderlyingBalance() external override view returns (uint256) {
+    return underlyingBalanceInVault().add(IERC20(underlying).balanceOf(address(this)));
+  }
+
+  function underlyingBalanceInVault() internal view returns (uint256) {
     uint256 shares = IERC20(aBox).balanceOf(address(this));
     address cToken = IAlphaV2(aBox).cToken();
     uint256 exchangeRate = ICErc20(cToken).exchangeRateStored();
     uint256 precision = 10 ** 18;
-    uint256 underlyingBalanceinABox = shares.mul(exchangeRate).div(precision);
-    return underlyingBalanceinABox.add(IERC20(underlying).balanceOf(address(this)));
+    return shares.mul(exchangeRate).div(precision);
+  }
+
+  function liquidityBufferTarget(uint256 balance) internal view returns (uint256) {
+    return balance.mul(liquidityBuffer).div(MAX_BPS);
   }
 
   /**
@@ -22,6 +22,8 @@ contract YearnV2StrategyBase is IStrategy {
   using Address for address;
   using SafeMath for uint256;
 
+  uint256 internal constant MAX_BPS = 10000;   // 100% in basis points
+
   address public override underlying;
   address public override fund;
   address public override creator;
@@ -37,6 +39,9 @@ contract YearnV2StrategyBase is IStrategy {
 
   bool public investActivated;
 
+  // share of the invested balance kept as loose underlying to serve small withdrawals without the vault (in BPS)
+  uint256 public liquidityBuffer;
+
   constructor(
     address _fund,
     address _yVault,
@@ -86,9 +91,15 @@ contract YearnV2StrategyBase is IStrategy {
     investActivated = _investActivated;
   }
 
+  function setLiquidityBuffer(uint256 _liquidityBuffer) external onlyFundOrGovernance {
+    require(_liquidityBuffer <= MAX_BPS, "Buffer greater than 100%");
+    liquidityBuffer = _liquidityBuffer;
+  }
+
   /**
   * Withdraws an underlying asset from the strategy to the fund in the specified amount.
-  * It tries to withdraw from the strategy contract if this has enough balance.
+  * It tries to withdraw from the strategy contract if this has enough balance, which the liquidity buffer keeps
+  * for small withdrawals.
   * Otherwise, we withdraw shares from the yv2 vault. Transfer the required underlying amount to fund, 
   * and reinvest the rest. We can make it better by calculating the correct amount and withdrawing only that much.
   */
@@ -101,7 +112,11 @@ contract YearnV2StrategyBase is IStrategy {
       return;
     }
 
-    uint256 shares = shareValueFromUnderlying(underlyingAmount.sub(underlyingBalanceBefore));
+    // redeem enough to refill the liquidity buffer of the remaining balance, so the next small withdrawals skip the vault
+    uint256 balance = underlyingBalanceInVault().add(underlyingBalanceBefore);
+    uint256 remainingBalance = balance > underlyingAmount ? balance - underlyingAmount : 0;
+    uint256 toRedeem = underlyingAmount.sub(underlyingBalanceBefore).add(liquidityBufferTarget(remainingBalance));
+    uint256 shares = shareValueFromUnderlying(toRedeem);
     IYVaultV2(yVault).withdraw(shares);
     
     // we can transfer the asset to the fund
@@ -124,7 +139,7 @@ contract YearnV2StrategyBase is IStrategy {
   }
 
   /**
-  * Invests all underlying assets into our yv2 vault.
+  * Invests all underlying assets into our yv2 vault, except for the liquidity buffer.
   */
   function investAllUnderlying() internal {
     if(!investActivated) {
@@ -134,7 +149,9 @@ contract YearnV2StrategyBase is IStrategy {
     require(!IYVaultV2(yVault).emergencyShutdown(), "Vault is emergency shutdown");
 
     uint256 underlyingBalance = IERC20(underlying).balanceOf(address(this));
-    if (underlyingBalance > 0) {
+    uint256 buffer = liquidityBufferTarget(underlyingBalanceInVault().add(underlyingBalance));
+    if (underlyingBalance > buffer) {
+      underlyingBalance = underlyingBalance - buffer;
       IERC20(underlying).safeApprove(yVault, 0);
       IERC20(underlying).safeApprove(yVault, underlyingBalance);
       // deposits the entire balance to yv2 vault
@@ -161,11 +178,18 @@ contract YearnV2StrategyBase is IStrategy {
   * plus the current balance of the underlying asset.
   */
   function investedUnderlyingBalance() external override view returns (uint256) {
+    return underlyingBalanceInVault().add(IERC20(underlying).balanceOf(address(this)));
+  }
+
+  function underlyingBalanceInVault() internal view returns (uint256) {
     uint256 shares = IERC20(yVault).balanceOf(address(this));
     uint256 price = IYVaultV2(yVault).pricePerShare();
     uint256 precision = 10 ** 18;
-    uint256 underlyingBalanceinYVault = shares.mul(price).div(precision);
-    return underlyingBalanceinYVault.add(IERC20(underlying).balanceOf(address(this)));
+    return shares.mul(price).div(precision);
+  }
+
+  function liquidityBufferTarget(uint256 balance) internal view returns (uint256) {
+    return balance.mul(liquidityBuffer).div(MAX_BPS);
   }
 
 
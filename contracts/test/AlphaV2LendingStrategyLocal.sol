@@ -0,0 +1,20 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+import "../strategies/AlphaV2Strategies/AlphaV2LendingStrategyBase.sol";
+import "./MockAlphaV2.sol";
+
+/**
+* AlphaV2LendingStrategyBase on a given lending box, e.g. MockAlphaV2, without mainnet addresses
+*/
+contract AlphaV2LendingStrategyLocal is AlphaV2LendingStrategyBase {
+
+  constructor(
+    address _fund,
+    address _aBox
+  )
+  AlphaV2LendingStrategyBase(_fund, _aBox, 0)
+  public {
+    require(MockAlphaV2(_aBox).token() == underlying, "underlying not supported: aBox is for another token");
+  }
+}
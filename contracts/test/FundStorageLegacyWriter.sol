@@ -0,0 +1,27 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+/**
+* Implementation a FundProxy can be upgraded to in tests, to write storage slots directly
+* (e.g. the layout of storage version 0) before upgrading back to Fund.
+*/
+contract FundStorageLegacyWriter {
+
+  function shouldUpgrade() external view returns (bool, address) {
+    return (true, address(this));
+  }
+
+  function finalizeUpgrade() external {
+  }
+
+  function writeSlots(bytes32[] memory slots, uint256[] memory values) external {
+    for (uint256 i=0; i<slots.length; i++) {
+      bytes32 slot = slots[i];
+      uint256 value = values[i];
+      // solhint-disable-next-line no-inline-assembly
+      assembly {
+        sstore(slot, value)
+      }
+    }
+  }
+}
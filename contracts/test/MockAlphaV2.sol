@@ -0,0 +1,51 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/math/SafeMath.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/token/ERC20/ERC20.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/token/ERC20/IERC20.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/token/ERC20/SafeERC20.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/presets/ERC20PresetMinterPauser.sol";
+import "./MockCErc20.sol";
+
+/**
+* Local stand-in for an Alpha V2 lending box (IAlphaV2). Shares are minted one to one with the cToken,
+* so a share is worth exchangeRateStored / 1e18 underlying. The interest is minted when withdrawing,
+* we assume that this contract is a minter on token.
+*/
+contract MockAlphaV2 is ERC20 {
+  using SafeERC20 for IERC20;
+  using SafeMath for uint256;
+
+  uint256 internal constant PRECISION = 10 ** 18;
+
+  address public token;
+  address public cToken;
+
+  constructor(address _token, address _cToken) ERC20("Mock Interest Bearing Token", "ibMOCK") public {
+    token = _token;
+    cToken = _cToken;
+  }
+
+  function deposit(uint256 amount) external {
+    MockCErc20(cToken).accrueInterest();
+    uint256 shares = amount.mul(PRECISION).div(MockCErc20(cToken).exchangeRateStored());
+    IERC20(token).safeTransferFrom(msg.sender, address(this), amount);
+    _mint(msg.sender, shares);
+  }
+
+  function withdraw(uint256 shares) external {
+    MockCErc20(cToken).accrueInterest();
+    uint256 amount = shares.mul(MockCErc20(cToken).exchangeRateStored()).div(PRECISION);
+    _burn(msg.sender, shares);
+    uint256 balance = IERC20(token).balanceOf(address(this));
+    if (amount > balance) {
+      ERC20PresetMinterPauser(token).mint(address(this), amount.sub(balance));
+    }
+    IERC20(token).safeTransfer(msg.sender, amount);
+  }
+
+  // rewards are not modelled
+  function claim(uint256 totalReward, bytes32[] memory proof) external {
+  }
+}
@@ -0,0 +1,45 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/math/SafeMath.sol";
+
+/**
+* Local stand-in for the Compound style cToken behind an Alpha V2 lending box (ICErc20).
+* The exchange rate grows by supplyRatePerSecond (1e18 precision) every second once accrueInterest is called.
+*/
+contract MockCErc20 {
+  using SafeMath for uint256;
+
+  uint256 internal constant PRECISION = 10 ** 18;
+
+  address public underlying;
+  uint256 public exchangeRateStored;
+  uint256 public supplyRatePerSecond;
+  uint256 public accrualTimestamp;
+
+  constructor(address _underlying) public {
+    underlying = _underlying;
+    exchangeRateStored = PRECISION;
+    accrualTimestamp = block.timestamp;
+  }
+
+  function exchangeRateCurrent() public view returns (uint256) {
+    uint256 interest = exchangeRateStored.mul(supplyRatePerSecond).mul(block.timestamp.sub(accrualTimestamp)).div(PRECISION);
+    return exchangeRateStored.add(interest);
+  }
+
+  function accrueInterest() public {
+    exchangeRateStored = exchangeRateCurrent();
+    accrualTimestamp = block.timestamp;
+  }
+
+  function setExchangeRate(uint256 exchangeRate) external {
+    exchangeRateStored = exchangeRate;
+    accrualTimestamp = block.timestamp;
+  }
+
+  function setSupplyRatePerSecond(uint256 _supplyRatePerSecond) external {
+    accrueInterest();
+    supplyRatePerSecond = _supplyRatePerSecond;
+  }
+}
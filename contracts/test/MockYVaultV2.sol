@@ -0,0 +1,79 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/math/SafeMath.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/token/ERC20/ERC20.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/token/ERC20/IERC20.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/token/ERC20/SafeERC20.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/presets/ERC20PresetMinterPauser.sol";
+
+/**
+* Local stand-in for a Yearn V2 vault (IYVaultV2). The assets grow by yieldPerSecond (1e18 precision) of the
+* assets held every second, the yield is minted on the next interaction. We assume that this contract is a minter on token.
+*/
+contract MockYVaultV2 is ERC20 {
+  using SafeERC20 for IERC20;
+  using SafeMath for uint256;
+
+  uint256 internal constant PRECISION = 10 ** 18;
+
+  address public token;
+  bool public emergencyShutdown;
+  uint256 public yieldPerSecond;
+  uint256 public lastAccrual;
+
+  constructor(address _token) ERC20("Mock Yearn Vault", "yvMOCK") public {
+    token = _token;
+    lastAccrual = block.timestamp;
+  }
+
+  function pendingYield() public view returns (uint256) {
+    return IERC20(token).balanceOf(address(this)).mul(yieldPerSecond).mul(block.timestamp.sub(lastAccrual)).div(PRECISION);
+  }
+
+  function totalAssets() public view returns (uint256) {
+    return IERC20(token).balanceOf(address(this)).add(pendingYield());
+  }
+
+  function pricePerShare() external view returns (uint256) {
+    return totalSupply() == 0 ? PRECISION : totalAssets().mul(PRECISION).div(totalSupply());
+  }
+
+  function accrue() public {
+    uint256 pending = pendingYield();
+    lastAccrual = block.timestamp;
+    if (pending > 0) {
+      ERC20PresetMinterPauser(token).mint(address(this), pending);
+    }
+  }
+
+  // one-off yield, e.g. a harvest of the vault strategies
+  function addYield(uint256 amount) external {
+    accrue();
+    ERC20PresetMinterPauser(token).mint(address(this), amount);
+  }
+
+  function setYieldPerSecond(uint256 _yieldPerSecond) external {
+    accrue();
+    yieldPerSecond = _yieldPerSecond;
+  }
+
+  function setEmergencyShutdown(bool _emergencyShutdown) external {
+    emergencyShutdown = _emergencyShutdown;
+  }
+
+  function deposit(uint256 amount) external {
+    require(!emergencyShutdown, "Vault is emergency shutdown");
+    accrue();
+    uint256 shares = totalSupply() == 0 ? amount : amount.mul(totalSupply()).div(totalAssets());
+    IERC20(token).safeTransferFrom(msg.sender, address(this), amount);
+    _mint(msg.sender, shares);
+  }
+
+  function withdraw(uint256 shares) external {
+    accrue();
+    uint256 amount = shares.mul(totalAssets()).div(totalSupply());
+    _burn(msg.sender, shares);
+    IERC20(token).safeTransfer(msg.sender, amount);
+  }
+}
@@ -0,0 +1,15 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/presets/ERC20PresetMinterPauser.sol";
+import "OpenZeppelin/openzeppelin-contracts@3.4.0/contracts/drafts/ERC20Permit.sol";
+
+contract PermitToken is ERC20PresetMinterPauser, ERC20Permit {
+    constructor(string memory _name, string memory _symbol)
+     ERC20PresetMinterPauser(_name, _symbol) ERC20Permit(_name) public {
+    }
+
+    function _beforeTokenTransfer(address from, address to, uint256 amount) internal override(ERC20, ERC20PresetMinterPauser) {
+        super._beforeTokenTransfer(from, to, amount);
+    }
+}
@@ -0,0 +1,20 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+import "../strategies/YearnV2Strategies/YearnV2StrategyBase.sol";
+import "./MockYVaultV2.sol";
+
+/**
+* YearnV2StrategyBase on a given yv2 vault, e.g. MockYVaultV2, without mainnet addresses
+*/
+contract YearnV2StrategyLocal is YearnV2StrategyBase {
+
+  constructor(
+    address _fund,
+    address _yVault
+  )
+  YearnV2StrategyBase(_fund, _yVault, 0)
+  public {
+    require(MockYVaultV2(_yVault).token() == underlying, "underlying not supported: yVault is for another token");
+  }
+}
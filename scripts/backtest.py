@@ -0,0 +1,246 @@
+#!/usr/bin/python3
+"""
+Vectorized backtester of the Fund fee and allocation settings over price per share histories.
+
+Every strategy is modelled as a position in a vault (e.g. the Yearn vault or Alpha Homora bank used by
+the strategy) whose price per share is given by the history. Thousands of configurations of weightages,
+per strategy performance fees, fund performance fee, platform fee, hard work interval and rebalance policy
+are evaluated at once: the `processFees` and hard work math of `Fund` runs on arrays of shape
+(configurations, strategies) for every time step of the history.
+
+Amounts are floats, so results match the contract up to rounding. A hard work whose fees exceed the
+underlying kept in the fund is skipped, as the contract would revert.
+
+    python scripts/backtest.py history.csv --weightages 3000,3000 4500,4500 --hardwork-intervals 86400 604800
+
+The history is a CSV or Parquet file with a `timestamp` column (seconds) and one price per share column
+per strategy.
+"""
+
+import argparse
+import itertools
+import os
+
+import numpy as np
+
+MAX_BPS = 10000
+SECS_PER_YEAR = 31556952
+
+
+def load_history(path, columns=None):
+    """Returns (timestamps, price_per_share, names) from a CSV or Parquet file.
+    price_per_share has shape (time steps, strategies)."""
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        import pandas as pd
+        frame = pd.read_parquet(path)
+        names = columns or [name for name in frame.columns if name != "timestamp"]
+        timestamps = frame["timestamp"].to_numpy(dtype=np.int64)
+        price_per_share = frame[names].to_numpy(dtype=np.float64)
+    else:
+        data = np.genfromtxt(path, delimiter=",", names=True, dtype=np.float64)
+        names = columns or [name for name in data.dtype.names if name != "timestamp"]
+        timestamps = data["timestamp"].astype(np.int64)
+        price_per_share = np.column_stack([data[name] for name in names])
+
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], price_per_share[order], list(names)
+
+
+class Configurations:
+    """Fee and allocation settings, one row per configuration. Fees and weightages are in BPS."""
+
+    def __init__(self, weightage, performance_fee_strategy, performance_fee_fund, platform_fee, hardwork_interval, rebalance):
+        self.weightage = np.asarray(weightage, dtype=np.float64)
+        self.performance_fee_strategy = np.asarray(performance_fee_strategy, dtype=np.float64)
+        self.performance_fee_fund = np.asarray(performance_fee_fund, dtype=np.float64)
+        self.platform_fee = np.asarray(platform_fee, dtype=np.float64)
+        self.hardwork_interval = np.asarray(hardwork_interval, dtype=np.int64)
+        self.rebalance = np.asarray(rebalance, dtype=bool)
+
+        count, strategy_count = self.weightage.shape
+        assert self.performance_fee_strategy.shape == (count, strategy_count), "One performance fee per strategy expected"
+        for values in (self.performance_fee_fund, self.platform_fee, self.hardwork_interval, self.rebalance):
+            assert values.shape == (count,), "One value per configuration expected"
+        assert (self.weightage.sum(axis=1) <= MAX_BPS).all(), "Total weightage above 100%"
+
+    def __len__(self):
+        return len(self.performance_fee_fund)
+
+    @classmethod
+    def grid(cls, weightages, performance_fees_strategy=((0,),), performance_fees_fund=(0,), platform_fees=(0,), hardwork_intervals=(86400,), rebalance=(False,)):
+        """Cartesian product of the given settings. `weightages` and `performance_fees_strategy` hold one
+        value per strategy, a single performance fee is used for every strategy."""
+        strategy_count = len(weightages[0])
+        rows = list(itertools.product(weightages, performance_fees_strategy, performance_fees_fund, platform_fees, hardwork_intervals, rebalance))
+        strategy_fees = [fees * strategy_count if len(fees) == 1 else fees for _, fees, *_ in rows]
+        return cls(
+            weightage=[row[0] for row in rows],
+            performance_fee_strategy=strategy_fees,
+            performance_fee_fund=[row[2] for row in rows],
+            platform_fee=[row[3] for row in rows],
+            hardwork_interval=[row[4] for row in rows],
+            rebalance=[row[5] for row in rows],
+        )
+
+    def describe(self, index):
+        return {
+            "weightage": self.weightage[index].tolist(),
+            "performanceFeeStrategy": self.performance_fee_strategy[index].tolist(),
+            "performanceFeeFund": float(self.performance_fee_fund[index]),
+            "platformFee": float(self.platform_fee[index]),
+            "hardworkInterval": int(self.hardwork_interval[index]),
+            "rebalance": bool(self.rebalance[index]),
+        }
+
+
+class BacktestResult:
+
+    def __init__(self, timestamps, price_per_share, strategy_creator_fees, fund_manager_fees, platform_fees, hardworks, skipped_hardworks):
+        self.timestamps = timestamps
+        self.price_per_share = price_per_share  # fund price per share, shape (time steps, configurations)
+        self.strategy_creator_fees = strategy_creator_fees  # shape (configurations, strategies)
+        self.fund_manager_fees = fund_manager_fees
+        self.platform_fees = platform_fees
+        self.hardworks = hardworks
+        self.skipped_hardworks = skipped_hardworks
+
+    @property
+    def total_return(self):
+        return self.price_per_share[-1] / self.price_per_share[0] - 1
+
+    @property
+    def annualized_return(self):
+        elapsed = max(int(self.timestamps[-1] - self.timestamps[0]), 1)
+        return (self.price_per_share[-1] / self.price_per_share[0]) ** (SECS_PER_YEAR / elapsed) - 1
+
+    @property
+    def max_drawdown(self):
+        peaks = np.maximum.accumulate(self.price_per_share, axis=0)
+        return (1 - self.price_per_share / peaks).max(axis=0)
+
+
+def run_backtest(timestamps, vault_price_per_share, configurations, initial_deposit=1.0):
+    """Deposits `initial_deposit` at the first time step and runs the hard works of every configuration.
+    The first hard work always rebalances, as adding strategies sets the rebalance flag."""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    vault_price_per_share = np.asarray(vault_price_per_share, dtype=np.float64)
+    step_count, strategy_count = vault_price_per_share.shape
+    count = len(configurations)
+    assert configurations.weightage.shape[1] == strategy_count, "One weightage per strategy in the history expected"
+
+    weightage = configurations.weightage / MAX_BPS
+    performance_fee_strategy = configurations.performance_fee_strategy / MAX_BPS
+    performance_fee_fund = configurations.performance_fee_fund / MAX_BPS
+    platform_fee = configurations.platform_fee / MAX_BPS
+
+    vault_shares = np.zeros((count, strategy_count))
+    last_balance = np.zeros((count, strategy_count))
+    underlying_in_fund = np.full(count, float(initial_deposit))
+    total_invested = np.zeros(count)
+    total_accounted = np.zeros(count)
+    last_hardwork_timestamp = np.zeros(count, dtype=np.int64)
+    hardworks = np.zeros(count, dtype=np.int64)
+    skipped_hardworks = np.zeros(count, dtype=np.int64)
+
+    strategy_creator_fees = np.zeros((count, strategy_count))
+    fund_manager_fees = np.zeros(count)
+    platform_fees = np.zeros(count)
+    price_per_share = np.empty((step_count, count))
+
+    for step in range(step_count):
+        timestamp = timestamps[step]
+        vault_price = vault_price_per_share[step]
+        balance = vault_shares * vault_price
+
+        due = (hardworks == 0) | (timestamp - last_hardwork_timestamp >= configurations.hardwork_interval)
+        if due.any():
+            # processFees, only after the first hard work
+            charged = due & (hardworks > 0)
+            profit = np.where(charged[:, None], np.maximum(balance - last_balance, 0), 0)
+            creator_fee = profit * performance_fee_strategy
+            profit_to_fund = (profit - creator_fee).sum(axis=1)
+            manager_fee = profit_to_fund * performance_fee_fund
+            elapsed = np.where(charged, timestamp - last_hardwork_timestamp, 0)
+            platform_fee_due = total_invested * elapsed * platform_fee / SECS_PER_YEAR
+            fees = creator_fee.sum(axis=1) + manager_fee + platform_fee_due
+
+            # the fees are paid from the underlying kept in the fund, otherwise the hard work reverts
+            skipped = due & (fees > underlying_in_fund)
+            due &= ~skipped
+            skipped_hardworks += skipped
+            paid = due.astype(np.float64)
+            strategy_creator_fees += creator_fee * paid[:, None]
+            fund_manager_fees += manager_fee * paid
+            platform_fees += platform_fee_due * paid
+            underlying_in_fund -= fees * paid
+
+            rebalance = due & ((hardworks == 0) | configurations.rebalance)
+            invest = due & ~rebalance
+
+            # doHardWorkWithRebalance
+            total = underlying_in_fund + balance.sum(axis=1)
+            target = total[:, None] * weightage
+            moved = np.where(rebalance[:, None], target - balance, 0)
+            total_accounted = np.where(rebalance, total, total_accounted)
+            total_invested = np.where(rebalance, target.sum(axis=1), total_invested)
+
+            # doHardWorkWithoutRebalance
+            last_reserve = np.where(total_accounted > 0, total_accounted - total_invested, 0)
+            available = np.where(invest, np.maximum(underlying_in_fund - last_reserve, 0), 0)
+            added = available[:, None] * weightage
+            total_accounted = total_accounted + available
+            total_invested = total_invested + added.sum(axis=1)
+
+            moved = moved + added
+            vault_shares += moved / vault_price
+            underlying_in_fund -= moved.sum(axis=1)
+            balance = vault_shares * vault_price
+            last_balance = np.where(due[:, None], balance, last_balance)
+            last_hardwork_timestamp = np.where(due, timestamp, last_hardwork_timestamp)
+            hardworks += due
+
+        price_per_share[step] = (underlying_in_fund + balance.sum(axis=1)) / initial_deposit
+
+    return BacktestResult(timestamps, price_per_share, strategy_creator_fees, fund_manager_fees, platform_fees, hardworks, skipped_hardworks)
+
+
+def parse_bps_list(value):
+    return [int(item) for item in value.split(",")]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Backtest fund fee and allocation settings over price per share histories")
+    parser.add_argument("history", help="CSV or Parquet file with a timestamp column and one price per share column per strategy")
+    parser.add_argument("--columns", type=lambda value: value.split(","), help="price per share columns to use, in strategy order")
+    parser.add_argument("--weightages", nargs="+", type=parse_bps_list, required=True, help="comma separated weightage per strategy, in BPS")
+    parser.add_argument("--performance-fees-strategy", nargs="+", type=parse_bps_list, default=[[0]])
+    parser.add_argument("--performance-fees-fund", nargs="+", type=int, default=[0])
+    parser.add_argument("--platform-fees", nargs="+", type=int, default=[0])
+    parser.add_argument("--hardwork-intervals", nargs="+", type=int, default=[86400], help="seconds between hard works")
+    parser.add_argument("--rebalance", nargs="+", type=lambda value: value.lower() in ("1", "true", "yes"), default=[False])
+    parser.add_argument("--top", type=int, default=10)
+    options = parser.parse_args(args)
+
+    timestamps, vault_price_per_share, names = load_history(options.history, options.columns)
+    configurations = Configurations.grid(
+        options.weightages,
+        options.performance_fees_strategy,
+        options.performance_fees_fund,
+        options.platform_fees,
+        options.hardwork_intervals,
+        options.rebalance,
+    )
+    result = run_backtest(timestamps, vault_price_per_share, configurations)
+
+    print(f"{len(configurations)} configurations over {len(timestamps)} steps of {', '.join(names)}")
+    for index in np.argsort(-result.annualized_return)[:options.top]:
+        print(
+            f"{result.annualized_return[index]:+.4%} apy",
+            f"{result.max_drawdown[index]:.4%} max drawdown",
+            f"{result.hardworks[index]} hard works ({result.skipped_hardworks[index]} skipped)",
+            configurations.describe(index),
+        )
+
+
+if __name__ == "__main__":
+    main()
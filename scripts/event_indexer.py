@@ -0,0 +1,254 @@
+#!/usr/bin/python3
+"""
+Incremental indexer of Fund and FundFactory events into a local SQLite database.
+
+Logs are fetched in block ranges whose size adapts to the node: the range is halved when the node
+rejects a query or returns more than `target_logs` logs, and doubled while queries stay small.
+The last indexed block and its hash are stored as a resume cursor. When the hash of the cursor block
+changed on chain, the last `reorg_depth` blocks are rolled back and indexed again.
+
+Funds are discovered from the `NewFund` events of the given factories and can also be given directly.
+uint256 values are stored as decimal strings as they do not fit SQLite integers.
+
+    brownie run event_indexer main <database> <factory> [start block] --network <network>
+"""
+
+import sqlite3
+
+import eth_abi
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+
+# eth-abi 2 names it decode_abi
+decode_abi = getattr(eth_abi, "decode", None) or eth_abi.decode_abi
+
+
+def to_hex(value):
+    return "0x" + bytes(HexBytes(value)).hex()
+
+
+class Event:
+
+    def __init__(self, table, signature, indexed, data):
+        self.table = table
+        self.signature = signature
+        self.topic = HexBytes(keccak(text=signature))
+        self.indexed = indexed  # (column, type) of the indexed arguments, in order
+        self.data = data  # (column, type) of the other arguments, in order
+
+    @property
+    def columns(self):
+        return [column for column, _ in self.indexed + self.data]
+
+    def decode(self, log):
+        values = {}
+        for (column, abi_type), topic in zip(self.indexed, log["topics"][1:]):
+            values[column] = decode_abi([abi_type], HexBytes(topic))[0]
+        decoded = decode_abi([abi_type for _, abi_type in self.data], HexBytes(log["data"]))
+        for (column, _), value in zip(self.data, decoded):
+            values[column] = value
+        return {column: normalize(value) for column, value in values.items()}
+
+
+def normalize(value):
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, str) and value.startswith("0x") and len(value) == 42:
+        return to_checksum_address(value)
+    return value
+
+
+FUND_EVENTS = [
+    Event("deposits", "Deposit(address,uint256)", [("holder", "address")], [("amount", "uint256")]),
+    Event("withdrawals", "Withdraw(address,uint256,uint256)", [("holder", "address")], [("amount", "uint256"), ("fee", "uint256")]),
+    Event("strategy_rewards", "StrategyRewards(address,uint256,uint256)", [], [("strategy", "address"), ("profit", "uint256"), ("strategy_creator_fee", "uint256")]),
+    Event("fund_manager_rewards", "FundManagerRewards(uint256,uint256)", [], [("profit_total", "uint256"), ("fund_manager_fee", "uint256")]),
+    Event("platform_rewards", "PlatformRewards(uint256,uint256,uint256)", [], [("last_balance", "uint256"), ("time_elapsed", "uint256"), ("platform_fee", "uint256")]),
+    Event("fee_claims", "FeesClaimed(address,uint256)", [("recipient", "address")], [("amount", "uint256")]),
+    Event("hard_works", "HardWorkDone(uint256,uint256)", [], [("total_value_locked", "uint256"), ("price_per_share", "uint256")]),
+    Event("transfers", "Transfer(address,address,uint256)", [("sender", "address"), ("recipient", "address")], [("value", "uint256")]),
+    Event("deposit_requests", "DepositRequested(address,uint256,uint256)", [("holder", "address")], [("amount", "uint256"), ("epoch", "uint256")]),
+    Event("withdraw_requests", "WithdrawRequested(address,uint256,uint256)", [("holder", "address")], [("shares", "uint256"), ("epoch", "uint256")]),
+    Event("settled_epochs", "EpochSettled(uint256,uint256,uint256,uint256)", [], [("epoch", "uint256"), ("price_per_share", "uint256"), ("minted_shares", "uint256"), ("withdrawn_underlying", "uint256")]),
+    Event("claims", "Claim(address,uint256,uint256,uint256)", [("holder", "address")], [("shares", "uint256"), ("amount", "uint256"), ("fee", "uint256")]),
+    Event("fee_mints", "FeesMinted(address,uint256,uint256)", [("recipient", "address")], [("amount", "uint256"), ("shares", "uint256")]),
+]
+
+NEW_FUND_EVENT = Event("funds", "NewFund(address)", [], [("fund", "address")])
+
+# columns indexed besides fund and block_number
+HOLDER_COLUMNS = {
+    "deposits": ["holder"],
+    "withdrawals": ["holder"],
+    "strategy_rewards": ["strategy"],
+    "fee_claims": ["recipient"],
+    "transfers": ["sender", "recipient"],
+    "deposit_requests": ["holder"],
+    "withdraw_requests": ["holder"],
+    "claims": ["holder"],
+    "fee_mints": ["recipient"],
+}
+
+
+class EventIndexer:
+
+    def __init__(self, web3, database, factories=(), funds=(), start_block=0, confirmations=0, reorg_depth=64,
+                 initial_batch=1000, min_batch=1, max_batch=100000, target_logs=5000):
+        self.web3 = web3
+        self.db = sqlite3.connect(database) if isinstance(database, str) else database
+        self.factories = [to_checksum_address(str(factory)) for factory in factories]
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.reorg_depth = reorg_depth
+        self.batch = initial_batch
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.target_logs = target_logs
+        self.fund_topics = [event.topic for event in FUND_EVENTS]
+        self.events_by_topic = {event.topic: event for event in FUND_EVENTS}
+        self.block_timestamps = {}
+        self.create_schema()
+        for fund in funds:
+            self.add_fund(to_checksum_address(str(fund)), None, None, None, None)
+        self.db.commit()
+
+    def create_schema(self):
+        self.db.execute("CREATE TABLE IF NOT EXISTS cursor (id INTEGER PRIMARY KEY CHECK (id = 0), block_number INTEGER, block_hash TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS blocks (block_number INTEGER PRIMARY KEY, block_hash TEXT, timestamp INTEGER)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS funds (fund TEXT PRIMARY KEY, factory TEXT, block_number INTEGER, transaction_hash TEXT, log_index INTEGER)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS funds_block_number ON funds (block_number)")
+        for event in FUND_EVENTS:
+            columns = ", ".join(f"{column} TEXT" for column in event.columns)
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {event.table} (fund TEXT, {columns}, block_number INTEGER, "
+                f"transaction_hash TEXT, log_index INTEGER, PRIMARY KEY (transaction_hash, log_index))"
+            )
+            for column in ["fund", "block_number"] + HOLDER_COLUMNS.get(event.table, []):
+                self.db.execute(f"CREATE INDEX IF NOT EXISTS {event.table}_{column} ON {event.table} ({column})")
+        self.db.commit()
+
+    # cursor
+
+    def cursor(self):
+        """Returns the last indexed block number and hash, or None before the first sync."""
+        return self.db.execute("SELECT block_number, block_hash FROM cursor WHERE id = 0").fetchone()
+
+    def set_cursor(self, block_number, block_hash):
+        self.db.execute("INSERT OR REPLACE INTO cursor (id, block_number, block_hash) VALUES (0, ?, ?)", (block_number, block_hash))
+
+    def funds(self):
+        return [row[0] for row in self.db.execute("SELECT fund FROM funds ORDER BY rowid")]
+
+    def add_fund(self, fund, factory, block_number, transaction_hash, log_index):
+        self.db.execute(
+            "INSERT OR IGNORE INTO funds (fund, factory, block_number, transaction_hash, log_index) VALUES (?, ?, ?, ?, ?)",
+            (fund, factory, block_number, transaction_hash, log_index)
+        )
+
+    # sync
+
+    def sync(self, to_block=None):
+        """Indexes up to `to_block` (default the head minus confirmations) and returns the last indexed block."""
+        head = self.web3.eth.block_number - self.confirmations
+        to_block = head if to_block is None else min(to_block, head)
+        self.check_reorg()
+
+        cursor = self.cursor()
+        from_block = self.start_block if cursor is None else cursor[0] + 1
+        while from_block <= to_block:
+            end_block = min(from_block + self.batch - 1, to_block)
+            try:
+                logs = self.fetch_logs(from_block, end_block)
+            except ValueError:
+                # the node rejected the range, usually too many results or a timeout
+                if self.batch <= self.min_batch:
+                    raise
+                self.batch = max(self.batch // 2, self.min_batch)
+                continue
+            if len(logs) > self.target_logs and self.batch > self.min_batch:
+                self.batch = max(self.batch // 2, self.min_batch)
+                continue
+
+            self.store_logs(logs)
+            self.set_cursor(end_block, to_hex(self.web3.eth.get_block(end_block)["hash"]))
+            self.db.commit()
+
+            if len(logs) < self.target_logs // 4:
+                self.batch = min(self.batch * 2, self.max_batch)
+            from_block = end_block + 1
+        cursor = self.cursor()
+        return None if cursor is None else cursor[0]
+
+    def fetch_logs(self, from_block, to_block):
+        logs = []
+        if self.factories:
+            new_funds = self.web3.eth.get_logs({
+                "fromBlock": from_block, "toBlock": to_block,
+                "address": self.factories, "topics": [to_hex(NEW_FUND_EVENT.topic)]
+            })
+            for log in new_funds:
+                fund = NEW_FUND_EVENT.decode(log)["fund"]
+                self.add_fund(fund, to_checksum_address(log["address"]), log["blockNumber"], to_hex(log["transactionHash"]), log["logIndex"])
+        funds = self.funds()
+        if funds:
+            logs = self.web3.eth.get_logs({
+                "fromBlock": from_block, "toBlock": to_block,
+                "address": funds, "topics": [[to_hex(topic) for topic in self.fund_topics]]
+            })
+        return logs
+
+    def store_logs(self, logs):
+        for log in logs:
+            event = self.events_by_topic.get(HexBytes(log["topics"][0]))
+            # Transfer logs of ERC20 contracts with the same topic but different indexed arguments are skipped
+            if event is None or len(log["topics"]) != len(event.indexed) + 1:
+                continue
+            values = event.decode(log)
+            columns = ["fund"] + event.columns + ["block_number", "transaction_hash", "log_index"]
+            row = [to_checksum_address(log["address"])] + [values[column] for column in event.columns]
+            row += [log["blockNumber"], to_hex(log["transactionHash"]), log["logIndex"]]
+            self.db.execute(
+                f"INSERT OR IGNORE INTO {event.table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                row
+            )
+            self.store_block(log["blockNumber"], to_hex(log["blockHash"]))
+
+    def store_block(self, block_number, block_hash):
+        if block_number not in self.block_timestamps:
+            self.block_timestamps[block_number] = self.web3.eth.get_block(block_number)["timestamp"]
+        self.db.execute(
+            "INSERT OR REPLACE INTO blocks (block_number, block_hash, timestamp) VALUES (?, ?, ?)",
+            (block_number, block_hash, self.block_timestamps[block_number])
+        )
+
+    # reorgs
+
+    def check_reorg(self):
+        """Rolls back the last `reorg_depth` blocks when the cursor block is no longer on chain."""
+        cursor = self.cursor()
+        if cursor is None:
+            return False
+        block_number, block_hash = cursor
+        if block_number <= self.web3.eth.block_number and to_hex(self.web3.eth.get_block(block_number)["hash"]) == block_hash:
+            return False
+        self.rollback(max(block_number - self.reorg_depth + 1, self.start_block))
+        return True
+
+    def rollback(self, from_block):
+        """Deletes everything indexed from `from_block` on and moves the cursor before it."""
+        for table in [event.table for event in FUND_EVENTS] + ["funds", "blocks"]:
+            self.db.execute(f"DELETE FROM {table} WHERE block_number >= ?", (from_block,))
+        self.block_timestamps = {number: timestamp for number, timestamp in self.block_timestamps.items() if number < from_block}
+        if from_block <= self.start_block:
+            self.db.execute("DELETE FROM cursor")
+        else:
+            self.set_cursor(from_block - 1, to_hex(self.web3.eth.get_block(from_block - 1)["hash"]))
+        self.db.commit()
+
+
+def main(database, factory, start_block=0):
+    from brownie import web3
+    indexer = EventIndexer(web3, database, factories=[factory], start_block=int(start_block))
+    print(f"indexed up to block {indexer.sync()}, {len(indexer.funds())} funds")
@@ -0,0 +1,255 @@
+#!/usr/bin/python3
+"""
+Asyncio client reading many funds with batched JSON-RPC calls.
+
+Requests made concurrently are collected and sent as one JSON-RPC batch per event loop iteration, at most
+`max_batch` requests per batch, over an aiohttp session pooling `max_connections` connections. Fund reads are
+`eth_call`s at the block number of the refresh, so the values of one refresh are consistent with each other.
+
+Values set by `initializeFund` and never changed afterwards (underlying, underlying unit and decimals, name
+and symbol) are cached for the lifetime of the client. The configuration (strategies, fees, limits and flags)
+is cached with the block it was read at and read again once it is more than `config_max_age` blocks old.
+The NAV (TVL, price per share and total supply) is read on every refresh.
+
+    brownie run fund_client main <fund>,<fund>... --network <network>
+"""
+
+import asyncio
+import itertools
+
+import aiohttp
+import eth_abi
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+from hexbytes import HexBytes
+
+# eth-abi 2 names them encode_abi and decode_abi
+encode_abi = getattr(eth_abi, "encode", None) or eth_abi.encode_abi
+decode_abi = getattr(eth_abi, "decode", None) or eth_abi.decode_abi
+
+# FundFactory.FundInfo: fund, underlying, creation block, beacon, implementation
+FUND_INFO_TYPE = "(address,address,uint64,bool,address)[]"
+
+# name: (function signature, output type)
+IMMUTABLES = {
+    "underlying": ("underlying()", "address"),
+    "underlyingUnit": ("underlyingUnit()", "uint256"),
+    "name": ("name()", "string"),
+    "symbol": ("symbol()", "string"),
+}
+CONFIG = {
+    "strategies": ("getStrategyList()", "address[]"),
+    "performanceFeeFund": ("performanceFeeFund()", "uint256"),
+    "platformFee": ("platformFee()", "uint256"),
+    "withdrawalFee": ("withdrawalFee()", "uint256"),
+    "maxInvestmentInStrategies": ("maxInvestmentInStrategies()", "uint256"),
+    "totalWeightInStrategies": ("totalWeightInStrategies()", "uint256"),
+    "depositLimit": ("depositLimit()", "uint256"),
+    "depositLimitTxMax": ("depositLimitTxMax()", "uint256"),
+    "depositLimitTxMin": ("depositLimitTxMin()", "uint256"),
+    "shouldRebalance": ("shouldRebalance()", "bool"),
+    "depositsPaused": ("depositsPaused()", "bool"),
+    "feesInShares": ("feesInShares()", "bool"),
+}
+NAV = {
+    "totalValueLocked": ("totalValueLocked()", "uint256"),
+    "pricePerShare": ("getPricePerShare()", "uint256"),
+    "totalSupply": ("totalSupply()", "uint256"),
+}
+
+
+class JsonRpcError(Exception):
+
+    def __init__(self, message, error=None):
+        super().__init__(message)
+        self.error = error
+
+
+def normalize(value):
+    if isinstance(value, str) and value.startswith("0x") and len(value) == 42:
+        return to_checksum_address(value)
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    return value
+
+
+class BatchedRpc:
+    """JSON-RPC client batching the requests made in the same event loop iteration. Counts the batches and requests it sent."""
+
+    def __init__(self, url, max_batch=100, max_connections=8, timeout=30):
+        self.url = url
+        self.max_batch = max_batch
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.session = None
+        self.pending = []
+        self.flush_scheduled = False
+        # the event loop only keeps weak references to the tasks sending batches
+        self.tasks = set()
+        self.ids = itertools.count(1)
+        self.batches = 0
+        self.requests = 0
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+    async def close(self):
+        """Waits for the batches already sent before closing the session."""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def request(self, method, params):
+        """Returns a future of the result of the request, sent with the other requests of this loop iteration."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((next(self.ids), method, params, future))
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            loop.call_soon(self.flush)
+        return future
+
+    def flush(self):
+        self.flush_scheduled = False
+        pending, self.pending = self.pending, []
+        for i in range(0, len(pending), self.max_batch):
+            task = asyncio.ensure_future(self.send(pending[i:i + self.max_batch]))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def send(self, requests):
+        payload = [{"jsonrpc": "2.0", "id": id_, "method": method, "params": params} for id_, method, params, _ in requests]
+        self.batches += 1
+        self.requests += len(requests)
+        try:
+            await self.open()
+            async with self.session.post(self.url, json=payload) as response:
+                response.raise_for_status()
+                responses = await response.json(content_type=None)
+        except Exception as e:
+            for _, _, _, future in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # some nodes answer a batch they reject with a single error
+        if isinstance(responses, dict):
+            responses = [responses]
+        by_id = {response.get("id"): response for response in responses}
+        for id_, method, _, future in requests:
+            if future.done():
+                continue
+            response = by_id.get(id_)
+            if response is None:
+                future.set_exception(JsonRpcError(f"No response to {method}"))
+            elif "error" in response:
+                future.set_exception(JsonRpcError(response["error"].get("message", str(response["error"])), response["error"]))
+            else:
+                future.set_result(response["result"])
+
+    async def block_number(self):
+        return int(await self.request("eth_blockNumber", []), 16)
+
+    async def call(self, to, signature, output_type, args=(), input_types=(), block="latest"):
+        """Calls `signature` on `to` and returns its single output decoded."""
+        data = function_signature_to_4byte_selector(signature) + encode_abi(list(input_types), list(args))
+        block = hex(block) if isinstance(block, int) else block
+        result = await self.request("eth_call", [{"to": str(to), "data": "0x" + data.hex()}, block])
+        if HexBytes(result) == b"":
+            raise JsonRpcError(f"{signature} returned no data at {to}")
+        return normalize(decode_abi([output_type], HexBytes(result))[0])
+
+
+class FundClient:
+    """Reads funds through a BatchedRpc, caching the immutables of every fund and its configuration by block."""
+
+    def __init__(self, rpc, config_max_age=0):
+        self.rpc = rpc
+        self.config_max_age = config_max_age
+        self.immutables_cache = {}  # fund => future of its immutables, shared by concurrent readers
+        self.config_cache = {}  # fund => (block number, configuration)
+
+    async def read(self, fund, getters, block="latest"):
+        values = await asyncio.gather(*[
+            self.rpc.call(fund, signature, output_type, block=block) for signature, output_type in getters.values()
+        ])
+        return dict(zip(getters, values))
+
+    async def immutables(self, fund):
+        fund = to_checksum_address(str(fund))
+        if fund not in self.immutables_cache:
+            self.immutables_cache[fund] = asyncio.ensure_future(self.read_immutables(fund))
+        try:
+            return await self.immutables_cache[fund]
+        except Exception:
+            self.immutables_cache.pop(fund, None)
+            raise
+
+    async def read_immutables(self, fund):
+        values = await self.read(fund, IMMUTABLES)
+        values["decimals"] = await self.rpc.call(values["underlying"], "decimals()", "uint8")
+        return values
+
+    async def config(self, fund, block=None):
+        fund = to_checksum_address(str(fund))
+        block = await self.rpc.block_number() if block is None else block
+        cached = self.config_cache.get(fund)
+        if cached is not None and 0 <= block - cached[0] <= self.config_max_age:
+            return cached[1]
+        values = await self.read(fund, CONFIG, block)
+        self.config_cache[fund] = (block, values)
+        return values
+
+    def invalidate(self, fund=None):
+        """Drops the cached configuration of `fund`, or of every fund, e.g. after sending a governance transaction."""
+        if fund is None:
+            self.config_cache.clear()
+        else:
+            self.config_cache.pop(to_checksum_address(str(fund)), None)
+
+    async def nav(self, fund, block=None):
+        block = await self.rpc.block_number() if block is None else block
+        return await self.read(to_checksum_address(str(fund)), NAV, block)
+
+    async def fund_state(self, fund, block):
+        immutables, config, nav = await asyncio.gather(self.immutables(fund), self.config(fund, block), self.nav(fund, block))
+        return {"fund": to_checksum_address(str(fund)), "block": block, **immutables, **config, **nav}
+
+    async def refresh(self, funds):
+        """Returns the state of every fund at the latest block, the funds read concurrently."""
+        block = await self.rpc.block_number()
+        return await asyncio.gather(*[self.fund_state(fund, block) for fund in funds])
+
+    async def factory_funds(self, factory, page_size=100):
+        """Returns the funds created by `factory`, read from its registry with the pages requested concurrently."""
+        count = await self.rpc.call(factory, "fundCount()", "uint256")
+        pages = await asyncio.gather(*[
+            self.rpc.call(factory, "getFunds(uint256,uint256)", FUND_INFO_TYPE, [start, page_size], ["uint256", "uint256"])
+            for start in range(0, count, page_size)
+        ])
+        return [info[0] for page in pages for info in page]
+
+
+async def refresh_funds(url, funds, **kwargs):
+    async with BatchedRpc(url, **kwargs) as rpc:
+        return await FundClient(rpc).refresh(funds)
+
+
+def main(funds):
+    from brownie import web3
+
+    states = asyncio.run(refresh_funds(web3.provider.endpoint_uri, funds.split(",")))
+    for state in states:
+        print(state["fund"], state["symbol"], f"TVL {state['totalValueLocked']}", f"price per share {state['pricePerShare']}")
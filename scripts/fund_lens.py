@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+Helpers to read the full state of one or more funds through FundLens in a single eth_call.
+
+    brownie run fund_lens main <fund> [holder] [lens] --network <network>
+
+The address of a deployed FundLens is required outside development networks.
+"""
+
+from pprint import pprint
+
+from brownie import FundLens, accounts
+from brownie._config import CONFIG
+
+
+def get_lens(address=None, deployer=None):
+    """
+    Returns the FundLens at `address`. On development networks only, defaults to the last deployed
+    FundLens or deploys a new one from `deployer`.
+    """
+    if address is not None:
+        return FundLens.at(address)
+    if CONFIG.network_type != "development":
+        raise ValueError("The address of a deployed FundLens is required outside development networks")
+    if len(FundLens) > 0:
+        return FundLens[-1]
+    return FundLens.deploy({'from': deployer or accounts[0]})
+
+
+def decode(value, abi):
+    """Converts a value returned for an ABI output into plain python dicts and lists."""
+    abi_type = abi["type"]
+    if abi_type.endswith("]"):
+        item_abi = dict(abi, type=abi_type[:abi_type.rindex("[")])
+        return [decode(item, item_abi) for item in value]
+    if abi_type == "tuple":
+        return {component["name"]: decode(item, component) for component, item in zip(abi["components"], value)}
+    return value
+
+
+def call(method, *args):
+    outputs = method.abi["outputs"]
+    value = method(*args)
+    if len(outputs) == 1:
+        return decode(value, outputs[0])
+    return {output["name"]: decode(item, output) for output, item in zip(outputs, value)}
+
+
+def fund_state(fund, holder=None, lens=None):
+    """Returns the fund configuration, strategies with live balances, TVL and price per share.
+    When `holder` is given, returns a dict with `fundState` and `holderState`."""
+    lens = lens or get_lens()
+    if holder is None:
+        return call(lens.getFundState, fund)
+    return call(lens.getFundStateForHolder, fund, holder)
+
+
+def fund_states(funds, lens=None):
+    lens = lens or get_lens()
+    return call(lens.getFundStates, list(funds))
+
+
+def main(fund, holder=None, lens=None):
+    pprint(fund_state(fund, holder, get_lens(lens)))
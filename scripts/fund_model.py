@@ -0,0 +1,662 @@
+#!/usr/bin/python3
+"""
+In-process model of the Fund accounting using the same integer arithmetic as the contracts.
+
+Mirrors deposits, withdrawals (including the withdrawal queue), fee processing and hard work
+with and without rebalance of `Fund`, together with the yield of `ProfitStrategy`, so that fee
+settings, weightages and rebalance policies can be explored without a chain.
+Fees accrue in a ledger and stay in the fund until claimed, as in the contract, or with `fees_in_shares`
+the fund manager and platform fees are paid in shares minted at the current price per share.
+Queued mode, chunked hard works and access control are not modelled, every call is assumed to come from governance.
+
+Reverts are raised as `ModelRevert` carrying the revert message of the contract, and the state
+is left untouched as it would be on chain.
+"""
+
+import functools
+
+MAX_BPS = 10000
+SECS_PER_YEAR = 31556952
+
+MAX_PLATFORM_FEE = 500
+MAX_PERFORMANCE_FEE_FUND = 1000
+MAX_PERFORMANCE_FEE_STRATEGY = 1000
+MAX_WITHDRAWAL_FEE = 100
+
+
+class ModelRevert(Exception):
+    pass
+
+
+def require(condition, message):
+    if not condition:
+        raise ModelRevert(message)
+
+
+def sub(a, b):
+    # SafeMath.sub
+    require(b <= a, "SafeMath: subtraction overflow")
+    return a - b
+
+
+def transaction(method):
+    """Applies `timestamp` as the block timestamp and restores the state when the call reverts."""
+    @functools.wraps(method)
+    def wrapper(self, *args, timestamp=None, **kwargs):
+        if timestamp is not None:
+            self.timestamp = timestamp
+        snapshot = self.snapshot()
+        try:
+            return method(self, *args, **kwargs)
+        except ModelRevert:
+            self.restore(snapshot)
+            raise
+    return wrapper
+
+
+class StrategyParams:
+    __slots__ = ("weightage", "performance_fee_strategy", "activation", "last_balance")
+
+    def __init__(self, weightage, performance_fee_strategy, activation, last_balance=0):
+        self.weightage = weightage
+        self.performance_fee_strategy = performance_fee_strategy
+        self.activation = activation
+        self.last_balance = last_balance
+
+    def copy(self):
+        return StrategyParams(self.weightage, self.performance_fee_strategy, self.activation, self.last_balance)
+
+
+class ProfitStrategyModel:
+    """Model of `ProfitStrategy`: `invest_all_underlying` adds `profit_perc` BPS of the new underlying."""
+    __slots__ = ("fund", "address", "profit_perc", "creator", "accounted_balance")
+
+    def __init__(self, fund, address, profit_perc, creator):
+        self.fund = fund
+        self.address = address
+        self.profit_perc = profit_perc
+        self.creator = creator
+        self.accounted_balance = 0
+
+    def invested_underlying_balance(self):
+        return self.fund.balance_of(self.address)
+
+    def invest_all_underlying(self):
+        contribution = sub(self.fund.balance_of(self.address), self.accounted_balance)
+        self.fund.mint(self.address, contribution * self.profit_perc // MAX_BPS)
+        self.accounted_balance = self.fund.balance_of(self.address)
+
+    def withdraw_all_to_fund(self):
+        self.fund.transfer(self.address, self.fund.address, self.fund.balance_of(self.address))
+        self.accounted_balance = self.fund.balance_of(self.address)
+
+    def withdraw_to_fund(self, amount):
+        self.fund.transfer(self.address, self.fund.address, amount)
+        self.accounted_balance = self.fund.balance_of(self.address)
+
+    def do_hard_work(self):
+        pass
+
+
+class FundModel:
+
+    def __init__(self, address="fund", governance="governance", underlying_unit=10**18, timestamp=0):
+        self.address = address
+        self.governance = governance
+        self.fund_manager = governance
+        self.platform_rewards = governance
+        self.underlying_unit = underlying_unit
+        self.timestamp = timestamp
+
+        self.balances = {}  # underlying token balances of every account
+        self.shares = {}
+        self.total_supply = 0
+
+        self.deposit_limit = 0
+        self.deposit_limit_tx_max = 0
+        self.deposit_limit_tx_min = 0
+        self.performance_fee_fund = 0
+        self.platform_fee = 0
+        self.withdrawal_fee = 0
+        self.max_investment_in_strategies = 9000
+        self.total_weight_in_strategies = 0
+        self.total_accounted = 0
+        self.total_invested = 0
+        self.deposits_paused = False
+        self.should_rebalance = False
+        self.last_hardwork_timestamp = 0
+        self.use_cached_balances = False
+        self.max_cached_balance_age = 0
+        self.total_last_balance = 0
+        self.preserve_strategy_order = False
+        self.fees_in_shares = False
+        self.accrued_fees = {}
+        self.total_accrued_fees = 0
+        self.rebalance_band = (0, 0)  # threshold in BPS, min amount
+        self.reserve_policy = (0, 0, 0)  # target, floor, ceiling in BPS of the TVL
+        self.strategy_rebalance_bands = {}
+
+        self.strategies = {}
+        self.strategy_list = []
+        self.strategy_models = {}
+        self.withdrawal_queue = []
+        self.withdrawal_cost_hint = {}
+
+    def snapshot(self):
+        state = dict(self.__dict__)
+        state["balances"] = dict(self.balances)
+        state["shares"] = dict(self.shares)
+        state["strategies"] = {strategy: params.copy() for strategy, params in self.strategies.items()}
+        state["strategy_list"] = list(self.strategy_list)
+        state["withdrawal_queue"] = list(self.withdrawal_queue)
+        state["withdrawal_cost_hint"] = dict(self.withdrawal_cost_hint)
+        state["accrued_fees"] = dict(self.accrued_fees)
+        state["strategy_rebalance_bands"] = dict(self.strategy_rebalance_bands)
+        state["accounted_balances"] = {strategy: model.accounted_balance for strategy, model in self.strategy_models.items()}
+        return state
+
+    def restore(self, state):
+        timestamp = self.timestamp
+        accounted_balances = state.pop("accounted_balances")
+        self.__dict__.update(state)
+        for strategy, accounted_balance in accounted_balances.items():
+            self.strategy_models[strategy].accounted_balance = accounted_balance
+        self.timestamp = timestamp
+
+    # underlying token
+
+    def balance_of(self, account):
+        return self.balances.get(account, 0)
+
+    def mint(self, account, amount):
+        self.balances[account] = self.balance_of(account) + amount
+
+    def transfer(self, sender, recipient, amount):
+        balance = self.balance_of(sender)
+        require(balance >= amount, "ERC20: transfer amount exceeds balance")
+        self.balances[sender] = balance - amount
+        self.balances[recipient] = self.balance_of(recipient) + amount
+
+    # fund shares
+
+    def share_balance_of(self, account):
+        return self.shares.get(account, 0)
+
+    def mint_shares(self, account, amount):
+        self.shares[account] = self.share_balance_of(account) + amount
+        self.total_supply += amount
+
+    def burn_shares(self, account, amount):
+        balance = self.share_balance_of(account)
+        require(balance >= amount, "ERC20: burn amount exceeds balance")
+        self.shares[account] = balance - amount
+        self.total_supply -= amount
+
+    # strategies
+
+    def create_profit_strategy(self, address, profit_perc, creator=None):
+        strategy = ProfitStrategyModel(self, address, profit_perc, creator or self.governance)
+        self.strategy_models[address] = strategy
+        return strategy
+
+    def strategy(self, address):
+        return self.strategy_models[address]
+
+    def is_active_strategy(self, strategy):
+        return strategy in self.strategies
+
+    def update_last_balance(self, strategy, new_balance):
+        params = self.strategies[strategy]
+        self.total_last_balance = self.total_last_balance - params.last_balance + new_balance
+        params.last_balance = new_balance
+
+    # views
+
+    def underlying_balance_in_fund(self):
+        balance = self.balance_of(self.address)
+        return balance - self.total_accrued_fees if balance > self.total_accrued_fees else 0
+
+    def cached_balances_valid(self):
+        return (self.use_cached_balances
+            and self.last_hardwork_timestamp > 0
+            and self.timestamp <= self.last_hardwork_timestamp + self.max_cached_balance_age)
+
+    def underlying_balance_with_investment(self):
+        if self.cached_balances_valid():
+            return self.underlying_balance_in_fund() + self.total_last_balance
+        return self.underlying_balance_with_investment_live()
+
+    def underlying_balance_with_investment_live(self):
+        balance = self.underlying_balance_in_fund()
+        for strategy in self.strategy_list:
+            balance += self.strategy_models[strategy].invested_underlying_balance()
+        return balance
+
+    def price_per_share(self):
+        if self.total_supply == 0:
+            return self.underlying_unit
+        return self.underlying_unit * self.underlying_balance_with_investment() // self.total_supply
+
+    def total_value_locked(self):
+        return self.underlying_balance_with_investment()
+
+    def underlying_balance_with_investment_for_holder(self, holder):
+        if self.total_supply == 0:
+            return 0
+        return self.underlying_balance_with_investment() * self.share_balance_of(holder) // self.total_supply
+
+    # strategy management
+
+    @transaction
+    def add_strategy(self, strategy, weightage, performance_fee_strategy):
+        require(not self.is_active_strategy(strategy), "This strategy is already active in this fund")
+        require(weightage > 0, "The weightage should be greater than 0")
+        require(self.total_weight_in_strategies + weightage <= self.max_investment_in_strategies, "Total investment can't be above 90%")
+        require(performance_fee_strategy <= MAX_PERFORMANCE_FEE_STRATEGY, "Performance fee too high")
+
+        self.strategies[strategy] = StrategyParams(weightage, performance_fee_strategy, self.timestamp)
+        self.total_weight_in_strategies += weightage
+        self.strategy_list.append(strategy)
+        self.should_rebalance = True
+
+    @transaction
+    def remove_strategy(self, strategy):
+        require(self.is_active_strategy(strategy), "This strategy is not active in this fund")
+
+        self.total_weight_in_strategies -= self.strategies[strategy].weightage
+        index = self.strategy_list.index(strategy)
+        if self.preserve_strategy_order:
+            del self.strategy_list[index]
+        else:
+            self.strategy_list[index] = self.strategy_list[-1]
+            self.strategy_list.pop()
+        if strategy in self.withdrawal_cost_hint:
+            del self.withdrawal_cost_hint[strategy]
+            self.withdrawal_queue.remove(strategy)
+        self.update_last_balance(strategy, 0)
+        del self.strategies[strategy]
+        self.strategy_rebalance_bands.pop(strategy, None)
+        self.strategy_models[strategy].withdraw_all_to_fund()
+        self.should_rebalance = True
+
+    @transaction
+    def update_strategy_weightage(self, strategy, weightage):
+        require(self.is_active_strategy(strategy), "This strategy is not active in this fund")
+        require(weightage > 0, "The weightage should be greater than 0")
+        total_weight = self.total_weight_in_strategies - self.strategies[strategy].weightage + weightage
+        require(total_weight <= self.max_investment_in_strategies, "Total investment can't be above 90%")
+
+        self.total_weight_in_strategies = total_weight
+        self.strategies[strategy].weightage = weightage
+        self.should_rebalance = True
+
+    @transaction
+    def update_strategy_performance_fee(self, strategy, performance_fee_strategy):
+        require(self.is_active_strategy(strategy), "This strategy is not active in this fund")
+        require(performance_fee_strategy <= MAX_PERFORMANCE_FEE_STRATEGY, "Performance fee too high")
+        self.strategies[strategy].performance_fee_strategy = performance_fee_strategy
+
+    @transaction
+    def set_withdrawal_queue(self, queue, cost_hints):
+        require(len(queue) == len(cost_hints), "Queue and cost hints must have the same length")
+        self.withdrawal_queue = []
+        self.withdrawal_cost_hint = {}
+        for i, strategy in enumerate(queue):
+            require(self.is_active_strategy(strategy), "This strategy is not active in this fund")
+            require(strategy not in self.withdrawal_cost_hint, "Strategy is already in the queue")
+            require(i == 0 or cost_hints[i] >= cost_hints[i - 1], "Withdrawal queue must be ordered by cost")
+            require(cost_hints[i] > 0, "Cost hint should be greater than 0")
+            self.withdrawal_queue.append(strategy)
+            self.withdrawal_cost_hint[strategy] = cost_hints[i]
+
+    # hard work
+
+    def accrue_fee(self, recipient, amount):
+        self.accrued_fees[recipient] = self.accrued_fees.get(recipient, 0) + amount
+
+    def process_fees(self):
+        profit_to_fund = 0
+        total_fees = 0
+        platform_fee = self.total_invested * (self.timestamp - self.last_hardwork_timestamp) * self.platform_fee // MAX_BPS // SECS_PER_YEAR
+        invested_balance = 0
+
+        for strategy in self.strategy_list:
+            model = self.strategy_models[strategy]
+            current_balance = model.invested_underlying_balance()
+            invested_balance += current_balance
+            params = self.strategies[strategy]
+            profit = current_balance - params.last_balance if current_balance > params.last_balance else 0
+
+            if profit > 0:
+                strategy_creator_fee = profit * params.performance_fee_strategy // MAX_BPS
+                if strategy_creator_fee > 0:
+                    self.accrue_fee(model.creator, strategy_creator_fee)
+                    total_fees += strategy_creator_fee
+                profit_to_fund += profit - strategy_creator_fee
+
+        fund_manager_fee = profit_to_fund * self.performance_fee_fund // MAX_BPS
+        if self.fees_in_shares:
+            self.reserve_fees(total_fees)
+            self.mint_fee_shares(self.underlying_balance_in_fund() + invested_balance, fund_manager_fee, platform_fee)
+            return
+        if fund_manager_fee > 0:
+            self.accrue_fee(self.fund_manager_rewards(), fund_manager_fee)
+            total_fees += fund_manager_fee
+        if platform_fee > 0:
+            self.accrue_fee(self.platform_rewards, platform_fee)
+            total_fees += platform_fee
+        self.reserve_fees(total_fees)
+
+    def reserve_fees(self, total_fees):
+        if total_fees > 0:
+            require(total_fees <= self.underlying_balance_in_fund(), "Fees exceed underlying in fund")
+            self.total_accrued_fees += total_fees
+
+    def fund_manager_rewards(self):
+        return self.platform_rewards if self.fund_manager == self.governance else self.fund_manager
+
+    def mint_fee_shares(self, total_value, fund_manager_fee, platform_fee):
+        total_fees = fund_manager_fee + platform_fee
+        if total_fees == 0:
+            return
+        require(total_fees < total_value, "Fees exceed total value")
+        if self.total_supply == 0:
+            shares = total_fees
+        else:
+            shares = total_fees * self.total_supply // (total_value - total_fees)
+        fund_manager_shares = shares * fund_manager_fee // total_fees
+        if fund_manager_shares > 0:
+            self.mint_shares(self.fund_manager_rewards(), fund_manager_shares)
+        if shares > fund_manager_shares:
+            self.mint_shares(self.platform_rewards, shares - fund_manager_shares)
+
+    def pay_accrued_fees(self, recipient):
+        amount = self.accrued_fees.pop(recipient, 0)
+        if amount > 0:
+            self.transfer(self.address, recipient, amount)
+        return amount
+
+    @transaction
+    def claim_fees(self, recipient):
+        self.total_accrued_fees = sub(self.total_accrued_fees, self.pay_accrued_fees(recipient))
+
+    @transaction
+    def claim_fees_batch(self, recipients):
+        claimed = sum(self.pay_accrued_fees(recipient) for recipient in recipients)
+        self.total_accrued_fees = sub(self.total_accrued_fees, claimed)
+
+    @transaction
+    def do_hard_work(self):
+        require(len(self.strategy_list) > 0, "Strategies must be defined")
+        if self.last_hardwork_timestamp > 0:
+            self.process_fees()
+
+        if self.should_rebalance:
+            self.should_rebalance = False
+            self.do_hard_work_with_rebalance()
+        else:
+            self.do_hard_work_without_rebalance()
+        self.last_hardwork_timestamp = self.timestamp
+
+    def do_hard_work_without_rebalance(self):
+        available_amount_to_invest = self.amount_to_invest()
+        for strategy in self.strategy_list:
+            model = self.strategy_models[strategy]
+            available_amount_for_strategy = available_amount_to_invest * self.strategies[strategy].weightage // MAX_BPS
+            if available_amount_for_strategy > 0:
+                self.transfer(self.address, strategy, available_amount_for_strategy)
+                self.total_invested += available_amount_for_strategy
+            model.do_hard_work()
+            self.update_last_balance(strategy, model.invested_underlying_balance())
+
+    def amount_to_invest(self):
+        last_reserve = sub(self.total_accounted, self.total_invested) if self.total_accounted > 0 else 0
+        underlying_in_fund = self.underlying_balance_in_fund()
+        available_amount_to_invest = underlying_in_fund - last_reserve if underlying_in_fund > last_reserve else 0
+        self.total_accounted += available_amount_to_invest
+        target, floor, ceiling = self.reserve_policy
+        if ceiling == 0:
+            return available_amount_to_invest
+
+        total_underlying_with_investment = self.underlying_balance_with_investment()
+        reserve_target = total_underlying_with_investment * target // MAX_BPS
+        if underlying_in_fund * MAX_BPS > total_underlying_with_investment * ceiling:
+            return (underlying_in_fund - reserve_target) * MAX_BPS // self.total_weight_in_strategies
+        if underlying_in_fund * MAX_BPS < total_underlying_with_investment * floor:
+            missing = reserve_target - underlying_in_fund
+            self.withdraw_from_strategies(missing, self.total_weight_in_strategies)
+            self.total_invested -= min(missing, self.total_invested)
+        return 0
+
+    def do_hard_work_with_rebalance(self):
+        total_underlying_with_investment = self.underlying_balance_with_investment_live()
+        self.total_accounted = total_underlying_with_investment
+        self.total_invested = 0
+        to_deposit = {}
+
+        for strategy in self.strategy_list:
+            model = self.strategy_models[strategy]
+            should_be_in_strategy = total_underlying_with_investment * self.strategies[strategy].weightage // MAX_BPS
+            currently_in_strategy = model.invested_underlying_balance()
+            if self.is_within_rebalance_band(strategy, should_be_in_strategy, currently_in_strategy):
+                self.total_invested += currently_in_strategy
+                self.update_last_balance(strategy, currently_in_strategy)
+                continue
+            if currently_in_strategy > should_be_in_strategy:
+                model.withdraw_to_fund(currently_in_strategy - should_be_in_strategy)
+                self.total_invested += should_be_in_strategy
+                to_deposit[strategy] = 0
+            else:
+                self.total_invested += currently_in_strategy
+                to_deposit[strategy] = should_be_in_strategy - currently_in_strategy
+
+        for strategy in self.strategy_list:
+            if strategy not in to_deposit:
+                continue
+            model = self.strategy_models[strategy]
+            # capped to the underlying in the fund, the rest is invested by the next hard work
+            amount = min(to_deposit[strategy], self.underlying_balance_in_fund())
+            self.total_accounted = sub(self.total_accounted, to_deposit[strategy] - amount)
+            self.total_invested += amount
+            if amount > 0:
+                self.transfer(self.address, strategy, amount)
+            model.do_hard_work()
+            self.update_last_balance(strategy, model.invested_underlying_balance())
+
+    def is_within_rebalance_band(self, strategy, should_be_in_strategy, currently_in_strategy):
+        threshold, min_amount = self.strategy_rebalance_bands.get(strategy, (0, 0))
+        if threshold == 0 and min_amount == 0:
+            threshold, min_amount = self.rebalance_band
+        if threshold == 0 and min_amount == 0:
+            return False
+        difference = abs(currently_in_strategy - should_be_in_strategy)
+        return difference * MAX_BPS <= should_be_in_strategy * threshold or difference < min_amount
+
+    @transaction
+    def refresh_strategy_balances(self):
+        require(len(self.strategy_list) > 0, "Strategies must be defined")
+        if self.last_hardwork_timestamp > 0:
+            self.process_fees()
+        for strategy in self.strategy_list:
+            self.update_last_balance(strategy, self.strategy_models[strategy].invested_underlying_balance())
+        self.last_hardwork_timestamp = self.timestamp
+
+    # deposits and withdrawals
+
+    def check_deposit_limits(self, amount, total_underlying_with_investment):
+        if self.deposit_limit > 0:
+            require(total_underlying_with_investment + amount <= self.deposit_limit, "Total deposit limit hit")
+        if self.deposit_limit_tx_max > 0:
+            require(amount <= self.deposit_limit_tx_max, "Maximum transaction deposit limit hit")
+        if self.deposit_limit_tx_min > 0:
+            require(amount >= self.deposit_limit_tx_min, "Minimum transaction deposit limit hit")
+
+    @transaction
+    def deposit(self, sender, amount, beneficiary=None):
+        require(not self.deposits_paused, "Deposits are paused")
+        require(amount > 0, "Cannot deposit 0")
+        beneficiary = beneficiary or sender
+
+        total_underlying_with_investment = self.underlying_balance_with_investment()
+        self.check_deposit_limits(amount, total_underlying_with_investment)
+
+        to_mint = amount if self.total_supply == 0 else amount * self.total_supply // total_underlying_with_investment
+        self.mint_shares(beneficiary, to_mint)
+        self.transfer(sender, self.address, amount)
+        return to_mint
+
+    def withdraw_from_strategies(self, missing, total_weight):
+        if self.withdrawal_queue:
+            self.withdraw_from_queue(missing)
+            return
+        for strategy in list(self.strategy_list):
+            weightage = self.strategies[strategy].weightage
+            missing_for_strategy = min(missing * weightage // total_weight, self.strategy_models[strategy].invested_underlying_balance())
+            if missing_for_strategy > 0:
+                self.pull_from_strategy(strategy, missing_for_strategy)
+
+    def withdraw_from_queue(self, missing):
+        for strategy in self.withdrawal_queue:
+            if missing == 0:
+                break
+            # ProfitStrategy keeps all of its underlying loose
+            amount = min(missing, self.balance_of(strategy))
+            if amount > 0:
+                self.pull_from_strategy(strategy, amount)
+                missing -= amount
+        for strategy in self.withdrawal_queue:
+            if missing == 0:
+                break
+            amount = min(missing, self.strategy_models[strategy].invested_underlying_balance())
+            if amount > 0:
+                self.pull_from_strategy(strategy, amount)
+                missing -= amount
+        # the strategies out of the queue cover the rest, in list order
+        for strategy in list(self.strategy_list):
+            if missing == 0:
+                break
+            if strategy in self.withdrawal_cost_hint:
+                continue
+            amount = min(missing, self.strategy_models[strategy].invested_underlying_balance())
+            if amount > 0:
+                self.pull_from_strategy(strategy, amount)
+                missing -= amount
+
+    def pull_from_strategy(self, strategy, amount):
+        self.strategy_models[strategy].withdraw_to_fund(amount)
+        last_balance = self.strategies[strategy].last_balance
+        self.update_last_balance(strategy, last_balance - min(amount, last_balance))
+
+    @transaction
+    def withdraw(self, sender, number_of_shares):
+        require(self.total_supply > 0, "Fund has no shares")
+        require(number_of_shares > 0, "numberOfShares must be greater than 0")
+
+        total_supply = self.total_supply
+        self.burn_shares(sender, number_of_shares)
+
+        underlying_amount_to_withdraw = self.underlying_balance_with_investment() * number_of_shares // total_supply
+
+        underlying_in_fund = self.underlying_balance_in_fund()
+        if underlying_amount_to_withdraw > underlying_in_fund:
+            self.withdraw_from_strategies(underlying_amount_to_withdraw - underlying_in_fund, self.total_weight_in_strategies)
+            underlying_amount_to_withdraw = min(underlying_amount_to_withdraw, self.underlying_balance_in_fund())
+
+        withdrawal_fee = underlying_amount_to_withdraw * self.withdrawal_fee // MAX_BPS
+        underlying_amount_to_withdraw -= withdrawal_fee
+
+        self.transfer(self.address, sender, underlying_amount_to_withdraw)
+        if withdrawal_fee > 0:
+            self.accrue_fee(self.platform_rewards, withdrawal_fee)
+            self.total_accrued_fees += withdrawal_fee
+        return underlying_amount_to_withdraw, withdrawal_fee
+
+    # settings
+
+    @transaction
+    def set_performance_fee_fund(self, fee):
+        require(fee <= MAX_PERFORMANCE_FEE_FUND, "Fee greater than max limit")
+        self.performance_fee_fund = fee
+
+    @transaction
+    def set_platform_fee(self, fee):
+        require(fee <= MAX_PLATFORM_FEE, "Fee greater than max limit")
+        self.platform_fee = fee
+
+    @transaction
+    def set_fees_in_shares(self, trigger):
+        self.fees_in_shares = trigger
+
+    @transaction
+    def set_withdrawal_fee(self, fee):
+        require(fee <= MAX_WITHDRAWAL_FEE, "Fee greater than max limit")
+        self.withdrawal_fee = fee
+
+    @transaction
+    def set_max_investment_in_strategies(self, value):
+        require(value < MAX_BPS, "Value greater than 100%")
+        self.max_investment_in_strategies = value
+
+    @transaction
+    def set_deposit_limit(self, limit):
+        self.deposit_limit = limit
+
+    @transaction
+    def set_deposit_limit_tx_max(self, limit):
+        self.deposit_limit_tx_max = limit
+
+    @transaction
+    def set_deposit_limit_tx_min(self, limit):
+        self.deposit_limit_tx_min = limit
+
+    @transaction
+    def set_fund_manager(self, fund_manager):
+        self.fund_manager = fund_manager
+
+    @transaction
+    def set_platform_rewards(self, platform_rewards):
+        self.platform_rewards = platform_rewards
+
+    @transaction
+    def set_should_rebalance(self, trigger):
+        self.should_rebalance = trigger
+
+    @transaction
+    def pause_deposits(self, trigger):
+        self.deposits_paused = trigger
+
+    @transaction
+    def set_use_cached_balances(self, trigger):
+        self.use_cached_balances = trigger
+
+    @transaction
+    def set_max_cached_balance_age(self, max_age):
+        self.max_cached_balance_age = max_age
+
+    @transaction
+    def set_reserve_policy(self, target, floor, ceiling):
+        require(ceiling <= MAX_BPS, "Value greater than 100%")
+        require(floor <= target <= ceiling, "Reserve target must be between floor and ceiling")
+        self.reserve_policy = (target, floor, ceiling)
+
+    def reserve_coverage(self, withdrawal_size):
+        require(withdrawal_size > 0, "Withdrawal size must be greater than 0")
+        return self.underlying_balance_in_fund() // withdrawal_size
+
+    @transaction
+    def set_rebalance_band(self, threshold, min_amount):
+        require(threshold <= MAX_BPS, "Value greater than 100%")
+        self.rebalance_band = (threshold, min_amount)
+
+    @transaction
+    def set_strategy_rebalance_band(self, strategy, threshold, min_amount):
+        require(self.is_active_strategy(strategy), "This strategy is not active in this fund")
+        require(threshold <= MAX_BPS, "Value greater than 100%")
+        if threshold == 0 and min_amount == 0:
+            self.strategy_rebalance_bands.pop(strategy, None)
+        else:
+            self.strategy_rebalance_bands[strategy] = (threshold, min_amount)
+
+    @transaction
+    def set_preserve_strategy_order(self, trigger):
+        self.preserve_strategy_order = trigger
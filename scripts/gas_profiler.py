@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+"""
+Gas profiler breaking transactions down by call tree, from the traces brownie expands for them.
+
+Every step of a trace is charged to its stack of frames: the external calls (contract, function and address)
+and, inside each of them, the internal functions brownie resolved from the source maps. Steps are charged
+their own gas only. A CALL, STATICCALL, DELEGATECALL or CREATE step is charged the gas it took minus the gas
+used by the callee, which is charged to the frames of the callee. The intrinsic gas and the storage refunds
+are the difference between the gas used and the traced gas, kept apart as `overhead`.
+
+Profiles of many transactions add up, e.g. a sample of hard works replayed on a fork, and are written as
+collapsed stacks for flamegraph.pl or speedscope, or summed by strategy: the gas of every call into a
+strategy, its own calls to vaults and tokens included.
+
+    brownie run gas_profiler main <tx hash>,<tx hash>... [fund] [flame graph file] --network <network>
+"""
+
+from collections import Counter, defaultdict
+
+CALL_OPCODES = ("CALL", "CALLCODE", "STATICCALL", "DELEGATECALL", "CREATE", "CREATE2")
+
+
+class Frame:
+    """A function on the call stack. `external` frames are entered through a call into `address`."""
+
+    __slots__ = ("address", "fn", "external")
+
+    def __init__(self, address, fn, external):
+        self.address = str(address)
+        self.fn = fn
+        self.external = external
+
+    def key(self):
+        return (self.address, self.fn, self.external)
+
+
+def step_costs(trace):
+    """
+    Yields `(frames, opcode, gas)` for every step of an expanded brownie trace (`tx.trace`), `frames` being
+    a tuple of Frame keys from the outermost call. The gas of a step calling into another contract excludes the callee.
+    """
+    internal = {}  # internal function stack of every call depth
+    open_calls = []  # [depth, gas before the call, frames, opcode, gas used by the callee]
+    for i, step in enumerate(trace):
+        depth = step["depth"]
+        while open_calls and depth <= open_calls[-1][0]:
+            call_depth, gas_before, frames, opcode, callee_gas = open_calls.pop()
+            total = gas_before - step["gas"]
+            yield frames, opcode, total - callee_gas
+            if open_calls:
+                open_calls[-1][4] += total
+
+        stack = internal.setdefault(depth, [])
+        if not stack:
+            # entering a call, the frames of the previous call at this depth were dropped on its return
+            stack[:] = [Frame(step["address"], step["fn"], True)]
+        else:
+            del stack[step["jumpDepth"] + 1:]
+            if len(stack) <= step["jumpDepth"]:
+                stack.append(Frame(step["address"], step["fn"], False))
+            elif stack[-1].fn != step["fn"]:
+                stack[-1] = Frame(step["address"], step["fn"], stack[-1].external)
+        for deeper in [d for d in internal if d > depth]:
+            del internal[deeper]
+        frames = tuple(frame.key() for d in sorted(internal) for frame in internal[d])
+
+        next_step = trace[i + 1] if i + 1 < len(trace) else None
+        if next_step is not None and next_step["depth"] > depth and step["op"] in CALL_OPCODES:
+            open_calls.append([depth, step["gas"], frames, step["op"], 0])
+            continue
+        if next_step is not None and next_step["depth"] == depth:
+            # exact for calls to precompiles and accounts without code, whose gasCost includes the forwarded gas
+            gas = step["gas"] - next_step["gas"]
+        else:
+            gas = step["gasCost"]
+        if open_calls:
+            open_calls[-1][4] += gas
+        yield frames, step["op"], gas
+
+
+class GasProfile:
+    """
+    Gas of one or many transactions by stack of frames. `labels` maps addresses to names shown
+    instead of the contract name in the flame graph and the tables, e.g. to tell strategies apart.
+    """
+
+    def __init__(self, labels=None):
+        self.labels = {str(address): label for address, label in (labels or {}).items()}
+        self.stacks = Counter()  # gas by frames
+        self.opcodes = Counter()  # gas by (function, opcode), for the storage accesses and calls of each function
+        self.transactions = 0
+        self.gas_used = 0
+        self.overhead = 0
+
+    def add_trace(self, trace, gas_used):
+        traced = 0
+        for frames, opcode, gas in step_costs(trace):
+            self.stacks[frames] += gas
+            if frames:
+                self.opcodes[(self.frame_name(frames[-1]), opcode)] += gas
+            traced += gas
+        self.transactions += 1
+        self.gas_used += gas_used
+        self.overhead += gas_used - traced
+
+    def add(self, tx):
+        """Adds a brownie TransactionReceipt, fetching its trace from the node if needed."""
+        self.add_trace(tx.trace, tx.gas_used)
+
+    def frame_name(self, frame):
+        address, fn, external = frame
+        if external and address in self.labels:
+            return f"{fn}[{self.labels[address]}]"
+        return fn
+
+    def by_function(self):
+        """Returns `{function: (own gas, gas including the functions it called)}`, recursion counted once."""
+        own = Counter()
+        inclusive = Counter()
+        for frames, gas in self.stacks.items():
+            if not frames:
+                continue
+            names = [self.frame_name(frame) for frame in frames]
+            own[names[-1]] += gas
+            for name in set(names):
+                inclusive[name] += gas
+        return {name: (own[name], inclusive[name]) for name in inclusive}
+
+    def by_strategy(self, strategies):
+        """
+        Returns a row per strategy, most expensive first, with the gas of all calls into the strategy
+        and of their own calls, split by strategy function.
+        """
+        strategies = [str(strategy) for strategy in strategies]
+        gas = Counter()
+        functions = defaultdict(Counter)
+        for frames, cost in self.stacks.items():
+            seen = set()
+            for address, fn, external in frames:
+                if external and address in strategies and address not in seen:
+                    seen.add(address)
+                    gas[address] += cost
+                    functions[address][fn] += cost
+        rows = [{
+            "strategy": strategy,
+            "label": self.labels.get(strategy, strategy),
+            "gas": gas[strategy],
+            "gas_per_tx": gas[strategy] // self.transactions if self.transactions else 0,
+            "share": gas[strategy] / self.gas_used if self.gas_used else 0.0,
+            "functions": dict(functions[strategy].most_common()),
+        } for strategy in strategies]
+        return sorted(rows, key=lambda row: row["gas"], reverse=True)
+
+    def collapsed_stacks(self):
+        """Lines of `frame;frame;frame gas`, the input of flamegraph.pl and speedscope."""
+        # stacks of contracts without a label are merged across addresses
+        merged = Counter()
+        for frames, gas in self.stacks.items():
+            if frames:
+                merged[";".join(self.frame_name(frame) for frame in frames)] += gas
+        lines = [f"{stack} {gas}" for stack, gas in sorted(merged.items()) if gas > 0]
+        if self.overhead > 0:
+            lines.append(f"<intrinsic and refunds> {self.overhead}")
+        return lines
+
+    def write_flame_graph(self, path):
+        with open(path, "w") as f:
+            f.write("\n".join(self.collapsed_stacks()) + "\n")
+
+
+def format_function_table(profile, limit=20):
+    rows = sorted(profile.by_function().items(), key=lambda item: item[1][1], reverse=True)[:limit]
+    width = max([len(name) for name, _ in rows] + [8])
+    lines = [f"{'function':<{width}} {'own gas':>12} {'total gas':>12}"]
+    lines += [f"{name:<{width}} {own:>12} {inclusive:>12}" for name, (own, inclusive) in rows]
+    return "\n".join(lines)
+
+
+def format_strategy_table(rows):
+    width = max([len(row["label"]) for row in rows] + [8])
+    lines = [f"{'strategy':<{width}} {'gas':>12} {'gas per tx':>12} {'share':>7}  most expensive"]
+    for row in rows:
+        top = next(iter(row["functions"]), "")
+        lines.append(f"{row['label']:<{width}} {row['gas']:>12} {row['gas_per_tx']:>12} {row['share']:>7.1%}  {top}")
+    return "\n".join(lines)
+
+
+def profile_transactions(txs, labels=None):
+    """Returns the GasProfile of transaction receipts or hashes, traced by the node of the active network."""
+    from brownie import chain
+
+    profile = GasProfile(labels)
+    for tx in txs:
+        profile.add(chain.get_transaction(tx) if isinstance(tx, str) else tx)
+    return profile
+
+
+def main(txs, fund=None, flame_graph=None):
+    from brownie import Fund
+
+    strategies = Fund.at(fund).getStrategyList() if fund else []
+    labels = {strategy: f"strategy {i}" for i, strategy in enumerate(strategies)}
+    profile = profile_transactions(txs.split(","), labels)
+    print(f"{profile.transactions} transactions, {profile.gas_used} gas, {profile.overhead} intrinsic and refunds")
+    print(format_function_table(profile))
+    if strategies:
+        print(format_strategy_table(profile.by_strategy(strategies)))
+    if flame_graph:
+        profile.write_flame_graph(flame_graph)
@@ -0,0 +1,240 @@
+#!/usr/bin/python3
+"""
+Keeper calling `doHardWork` on many funds, only when the hard work is worth its gas.
+
+The state of every fund is read through FundLens in a single call. The value of a hard work is
+estimated in underlying, with the same integer math as the contract:
+- the idle underlying it would invest, which earns `apr` until the keeper checks again `interval` seconds later,
+  with a reserve policy only the reserve above its ceiling, back to its target,
+- the strategy creator and fund manager fees on the profit of the strategies since their `lastBalance`,
+- the platform fee accrued since the last hard work.
+The value is converted to wei with the price of the underlying and compared to the gas of the hard work,
+simulated with `eth_call` and `eth_estimateGas`, times the gas price. Funds that should rebalance, whose reserve
+is below its floor or whose last hard work is older than `max_interval` are always worked. Queued deposits waiting for the hard work are not valued.
+
+Transactions are sent back to back with consecutive nonces handed out by the keeper, without waiting
+for confirmations, and their receipts are awaited concurrently.
+
+    brownie run keeper main <fund>,<fund>... <wei per underlying token> [apr] [account] [lens] --network <network>
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from brownie import Fund, accounts, chain, web3
+from brownie.exceptions import VirtualMachineError
+
+from scripts.fund_lens import fund_states, get_lens
+
+MAX_BPS = 10000
+SECS_PER_YEAR = 31556952
+
+
+def cached_balances_valid(state, timestamp):
+    return (state["useCachedBalances"]
+        and state["lastHardworkTimestamp"] > 0
+        and timestamp <= state["lastHardworkTimestamp"] + state["maxCachedBalanceAge"])
+
+
+class HardWorkEstimate:
+    """Value of a hard work of one fund, amounts in underlying. `should_run` and `reason` are set by the keeper."""
+
+    def __init__(self, fund, underlying, underlying_unit, to_invest, to_refill, idle_yield, profit, strategy_creator_fees, fund_manager_fee, platform_fee, forced):
+        self.fund = fund
+        self.underlying = underlying
+        self.underlying_unit = underlying_unit
+        self.to_invest = to_invest
+        self.to_refill = to_refill
+        self.idle_yield = idle_yield
+        self.profit = profit
+        self.strategy_creator_fees = strategy_creator_fees
+        self.fund_manager_fee = fund_manager_fee
+        self.platform_fee = platform_fee
+        self.forced = forced
+        self.gas = None
+        self.gas_cost = None
+        self.value_in_wei = None
+        self.should_run = False
+        self.reason = None
+
+    @property
+    def fees(self):
+        return self.strategy_creator_fees + self.fund_manager_fee + self.platform_fee
+
+    @property
+    def value(self):
+        return self.idle_yield + self.fees
+
+
+def estimate_hard_work(state, timestamp, apr, interval, max_interval=None):
+    """Returns the HardWorkEstimate of a hard work at `timestamp` of the fund `state` returned by FundLens."""
+    strategies = state["strategies"]
+    live_invested = sum(strategy["investedUnderlyingBalance"] for strategy in strategies)
+    counted_invested = sum(strategy["lastBalance"] for strategy in strategies) if cached_balances_valid(state, timestamp) else live_invested
+    # the TVL excludes queued deposits, unclaimed withdrawals and accrued fees, as underlyingBalanceInFund
+    in_fund = max(state["totalValueLocked"] - counted_invested, 0)
+
+    total_weight = sum(strategy["weightage"] for strategy in strategies)
+    to_refill = 0
+    if state["shouldRebalance"]:
+        target = (in_fund + live_invested) * total_weight // MAX_BPS
+        to_invest = max(target - live_invested, 0)
+    elif state["reserveCeiling"] == 0:
+        last_reserve = state["totalAccounted"] - state["totalInvested"] if state["totalAccounted"] > 0 else 0
+        to_invest = max(in_fund - last_reserve, 0) * total_weight // MAX_BPS
+    else:
+        # as amountToInvest with a reserve policy, the total is underlyingBalanceWithInvestment
+        total = in_fund + counted_invested
+        reserve_target = total * state["reserveTarget"] // MAX_BPS
+        to_invest = 0
+        if in_fund * MAX_BPS > total * state["reserveCeiling"] and total_weight > 0:
+            to_invest = (in_fund - reserve_target) * MAX_BPS // total_weight * total_weight // MAX_BPS
+        elif in_fund * MAX_BPS < total * state["reserveFloor"]:
+            to_refill = reserve_target - in_fund
+    idle_yield = int(to_invest * apr * interval / SECS_PER_YEAR)
+
+    profit = strategy_creator_fees = fund_manager_fee = platform_fee = 0
+    if state["lastHardworkTimestamp"] > 0:
+        profit_to_fund = 0
+        for strategy in strategies:
+            strategy_profit = max(strategy["investedUnderlyingBalance"] - strategy["lastBalance"], 0)
+            strategy_creator_fee = strategy_profit * strategy["performanceFeeStrategy"] // MAX_BPS
+            profit += strategy_profit
+            strategy_creator_fees += strategy_creator_fee
+            profit_to_fund += strategy_profit - strategy_creator_fee
+        fund_manager_fee = profit_to_fund * state["performanceFeeFund"] // MAX_BPS
+        time_elapsed = timestamp - state["lastHardworkTimestamp"]
+        platform_fee = state["totalInvested"] * time_elapsed * state["platformFee"] // MAX_BPS // SECS_PER_YEAR
+
+    overdue = max_interval is not None and timestamp - state["lastHardworkTimestamp"] >= max_interval
+    return HardWorkEstimate(
+        state["fund"], state["underlying"], state["underlyingUnit"], to_invest, to_refill, idle_yield, profit,
+        strategy_creator_fees, fund_manager_fee, platform_fee, forced=state["shouldRebalance"] or to_refill > 0 or overdue
+    )
+
+
+class NonceManager:
+    """Hands out consecutive nonces of an account, starting from its pending transaction count."""
+
+    def __init__(self, address):
+        self.address = str(address)
+        self.lock = threading.Lock()
+        self.next_nonce = None
+
+    def next(self):
+        with self.lock:
+            if self.next_nonce is None:
+                self.next_nonce = web3.eth.get_transaction_count(self.address, "pending")
+            nonce = self.next_nonce
+            self.next_nonce += 1
+            return nonce
+
+    def reset(self):
+        """Reads the pending transaction count again on the next nonce, after a transaction failed to be sent."""
+        with self.lock:
+            self.next_nonce = None
+
+
+class Keeper:
+    """`underlying_prices` maps underlying addresses to the price of one underlying token in wei."""
+
+    def __init__(self, account, funds, underlying_prices, lens=None, apr=0.05, interval=3600, max_interval=7 * 86400,
+                 gas_price=None, min_profit_ratio=1.0, gas_buffer=1.2, max_workers=16):
+        self.account = account
+        self.funds = [str(fund) for fund in funds]
+        self.underlying_prices = {str(underlying): price for underlying, price in underlying_prices.items()}
+        self.lens = lens or get_lens()
+        self.apr = apr
+        self.interval = interval
+        self.max_interval = max_interval
+        self.gas_price = gas_price
+        self.min_profit_ratio = min_profit_ratio
+        self.gas_buffer = gas_buffer
+        self.max_workers = max_workers
+        self.nonces = NonceManager(account)
+        self.contracts = {}
+
+    def contract(self, fund):
+        if fund not in self.contracts:
+            self.contracts[fund] = Fund.at(fund)
+        return self.contracts[fund]
+
+    def simulate(self, estimate):
+        do_hard_work = self.contract(estimate.fund).doHardWork
+        try:
+            # estimate_gas returns the reverting gas limit on development networks instead of raising
+            do_hard_work.call({'from': self.account})
+            estimate.gas = do_hard_work.estimate_gas({'from': self.account})
+        except (ValueError, VirtualMachineError) as e:
+            estimate.reason = f"hard work reverts: {getattr(e, 'revert_msg', None) or e}"
+
+    def estimate(self, timestamp=None):
+        """Returns the HardWorkEstimate of every fund, with `should_run` set."""
+        timestamp = chain.time() if timestamp is None else timestamp
+        gas_price = self.gas_price if self.gas_price is not None else web3.eth.gas_price
+        estimates = [
+            estimate_hard_work(state, timestamp, self.apr, self.interval, self.max_interval)
+            for state in fund_states(self.funds, self.lens) if state["strategies"]
+        ]
+        for estimate in estimates:
+            self.contract(estimate.fund)
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            list(executor.map(self.simulate, estimates))
+
+        for estimate in estimates:
+            if estimate.gas is None:
+                continue
+            estimate.gas_cost = estimate.gas * gas_price
+            price = self.underlying_prices.get(str(estimate.underlying))
+            if price is not None:
+                estimate.value_in_wei = estimate.value * price // estimate.underlying_unit
+            if estimate.forced:
+                estimate.should_run, estimate.reason = True, "rebalance, reserve refill or max interval"
+            elif price is None:
+                estimate.reason = "no price for the underlying"
+            elif estimate.value_in_wei >= estimate.gas_cost * self.min_profit_ratio:
+                estimate.should_run, estimate.reason = True, "profitable"
+            else:
+                estimate.reason = "not profitable"
+        return estimates
+
+    def dispatch(self, estimates):
+        """Sends the hard works of the estimates that should run and returns their confirmed transactions."""
+        gas_price = self.gas_price if self.gas_price is not None else web3.eth.gas_price
+        pending = []
+        for estimate in estimates:
+            if not estimate.should_run:
+                continue
+            try:
+                tx = self.contract(estimate.fund).doHardWork({
+                    'from': self.account,
+                    'nonce': self.nonces.next(),
+                    'gas_limit': int(estimate.gas * self.gas_buffer),
+                    'gas_price': gas_price,
+                    'required_confs': 0,
+                })
+            except (ValueError, VirtualMachineError) as e:
+                self.nonces.reset()
+                estimate.should_run, estimate.reason = False, f"hard work not sent: {e}"
+                continue
+            pending.append(tx)
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            list(executor.map(lambda tx: tx.wait(1), pending))
+        return pending
+
+    def run_once(self, timestamp=None):
+        estimates = self.estimate(timestamp)
+        return estimates, self.dispatch(estimates)
+
+
+def main(funds, underlying_price, apr=0.05, account=None, lens=None):
+    keeper_account = accounts.load(account) if account else accounts[0]
+    funds = funds.split(",")
+    lens = get_lens(lens)
+    states = fund_states(funds, lens)
+    prices = {state["underlying"]: int(underlying_price) for state in states}
+    keeper = Keeper(keeper_account, funds, prices, lens=lens, apr=float(apr))
+    estimates, txs = keeper.run_once()
+    for estimate in estimates:
+        print(estimate.fund, estimate.reason, f"value {estimate.value_in_wei} wei", f"gas cost {estimate.gas_cost} wei")
+    print(f"{len(txs)} hard works sent")
@@ -1,6 +1,12 @@
 #!/usr/bin/python3
 
 import pytest, brownie
+import scenarios
+from gas_benchmark import GasRecorder
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "scenario(name): scenario from tests/scenarios.py returned by the world fixture")
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -9,6 +15,29 @@ def isolate(fn_isolation):
     # https://eth-brownie.readthedocs.io/en/v1.10.3/tests-pytest-intro.html#isolation-fixtures
     pass
 
+@pytest.fixture(scope="module")
+def scenario(module_isolation, accounts):
+    # only call from module scoped fixtures, a world built inside a test is reverted when the test ends
+    worlds = {}
+    def get(name):
+        if name not in worlds:
+            worlds[name] = scenarios.build(name, accounts)
+        return worlds[name]
+    return get
+
+@pytest.fixture(scope="module")
+def world(request, scenario):
+    marker = request.node.get_closest_marker("scenario")
+    if marker is None:
+        raise ValueError("Set the scenario of the module with pytestmark = pytest.mark.scenario(name)")
+    return scenario(marker.args[0])
+
+@pytest.fixture(scope="session")
+def gas_recorder():
+    recorder = GasRecorder()
+    yield recorder
+    recorder.save()
+
 @pytest.fixture(scope="module")
 def token(Token, accounts):
     return Token.deploy("Stable Token", "STAB", {'from': accounts[0]})
@@ -17,6 +46,11 @@ def token(Token, accounts):
 def token_2(Token, accounts):
     return Token.deploy("Stable Token 2", "STAB2", {'from': accounts[0]})
 
+@pytest.fixture(scope="module")
+def permit_token(PermitToken, accounts):
+    # same as Token with EIP-2612 permit
+    return PermitToken.deploy("Permit Stable Token", "PSTAB", {'from': accounts[0]})
+
 @pytest.fixture(scope="module")
 def fund(Fund, accounts):
     return Fund.deploy({'from': accounts[0]})
@@ -36,6 +70,10 @@ def fund_factory(FundFactory, accounts):
     fund_factory = FundFactory.deploy({'from': accounts[0]})
     return fund_factory
 
+@pytest.fixture(scope="module")
+def fund_lens(FundLens, accounts):
+    return FundLens.deploy({'from': accounts[0]})
+
 @pytest.fixture(scope="module")
 def fund_proxy(fund_factory, fund, token, accounts):
     fund_name = "Mudrex Generic Fund"
@@ -66,4 +104,28 @@ def profit_strategy_80(ProfitStrategy, fund_through_proxy, accounts):
 
 @pytest.fixture(scope="module")
 def profit_strategy_10_fund_2(ProfitStrategy, fund_2, accounts):
-    return ProfitStrategy.deploy(fund_2, 1000, {'from': accounts[0]})
\ No newline at end of file
+    return ProfitStrategy.deploy(fund_2, 1000, {'from': accounts[0]})
+
+@pytest.fixture(scope="module")
+def mock_yvault(MockYVaultV2, token, accounts):
+    yvault = MockYVaultV2.deploy(token, {'from': accounts[0]})
+    token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), yvault, {'from': accounts[0]})
+    return yvault
+
+@pytest.fixture(scope="module")
+def mock_ctoken(MockCErc20, token, accounts):
+    return MockCErc20.deploy(token, {'from': accounts[0]})
+
+@pytest.fixture(scope="module")
+def mock_abox(MockAlphaV2, token, mock_ctoken, accounts):
+    abox = MockAlphaV2.deploy(token, mock_ctoken, {'from': accounts[0]})
+    token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), abox, {'from': accounts[0]})
+    return abox
+
+@pytest.fixture(scope="module")
+def yearn_strategy(YearnV2StrategyLocal, fund_through_proxy, mock_yvault, accounts):
+    return YearnV2StrategyLocal.deploy(fund_through_proxy, mock_yvault, {'from': accounts[0]})
+
+@pytest.fixture(scope="module")
+def alpha_strategy(AlphaV2LendingStrategyLocal, fund_through_proxy, mock_abox, accounts):
+    return AlphaV2LendingStrategyLocal.deploy(fund_through_proxy, mock_abox, {'from': accounts[0]})
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+
+import json, os
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gas_baseline.json")
+UPDATE_BASELINE_ENV = "GAS_BASELINE_UPDATE"
+
+class GasRecorder:
+    """
+    Collects `gas_used` of benchmarked transactions and compares them against the
+    baseline stored in `tests/gas_baseline.json`.
+
+    A benchmark fails when it costs more than `baseline * (1 + tolerance_bps / 10000)`.
+    Benchmarks missing from the baseline fail too, so that a new benchmark is committed together
+    with its baseline. Run the suite with `GAS_BASELINE_UPDATE=1` to record every benchmark
+    without comparing and write the measured values back into the baseline file. A baseline without
+    any benchmark was never recorded, the first run records it the same way.
+    """
+
+    def __init__(self, path=BASELINE_PATH):
+        self.path = path
+        self.baseline = {"tolerance_bps": 200, "benchmarks": {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.baseline.update(json.load(f))
+        self.results = {}
+        self.update = os.environ.get(UPDATE_BASELINE_ENV) == "1" or not self.baseline["benchmarks"]
+
+    @property
+    def tolerance_bps(self):
+        return self.baseline["tolerance_bps"]
+
+    def allowed(self, name):
+        expected = self.baseline["benchmarks"].get(name)
+        if expected is None:
+            return None
+        return expected * (10000 + self.tolerance_bps) // 10000
+
+    def record(self, name, tx_or_gas):
+        gas_used = getattr(tx_or_gas, "gas_used", tx_or_gas)
+        self.results[name] = gas_used
+        if self.update:
+            return gas_used
+        allowed = self.allowed(name)
+        assert allowed is not None, f"{name} is missing from the gas baseline, run with {UPDATE_BASELINE_ENV}=1 to record it"
+        assert gas_used <= allowed, \
+            f"{name} regressed: {gas_used} gas used, baseline {self.baseline['benchmarks'][name]} (+{self.tolerance_bps} bps)"
+        return gas_used
+
+    def save(self):
+        if not self.results or not self.update:
+            return
+        self.baseline["benchmarks"].update(self.results)
+        self.baseline["benchmarks"] = dict(sorted(self.baseline["benchmarks"].items()))
+        with open(self.path, "w") as f:
+            json.dump(self.baseline, f, indent=2)
+            f.write("\n")
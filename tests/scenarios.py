@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""
+Named deployed-world scenarios shared by the test modules.
+
+A scenario builds on its parent, e.g. "funded_two_strategies_after_hardwork" is "funded_two_strategies"
+followed by a hard work. Scenarios are built through the `scenario` fixture in conftest.py, at most once per
+test module, each on its own contracts. Every test starts from a reverted copy of the chain taken after the
+module fixtures ran, so changes made by a test are not seen by the next one.
+"""
+
+import brownie
+
+DEPOSIT_AMOUNT = 50000000
+
+SCENARIOS = {}
+
+
+def scenario(name, parent=None):
+    def register(builder):
+        SCENARIOS[name] = (parent, builder)
+        return builder
+    return register
+
+
+class World:
+    """Contracts and accounts of a scenario, available as attributes."""
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.governance = accounts[0]
+        self.holder = accounts[1]
+        self.strategies = []
+
+
+def build(name, accounts):
+    """Deploys a new world and runs the builders of the scenario `name` and of its parents on it."""
+    if name not in SCENARIOS:
+        raise KeyError(f"Unknown scenario {name}, expected one of {sorted(SCENARIOS)}")
+    builders = []
+    while name is not None:
+        parent, builder = SCENARIOS[name]
+        builders.insert(0, builder)
+        name = parent
+    world = World(accounts)
+    for builder in builders:
+        builder(world)
+    return world
+
+
+@scenario("empty_fund")
+def empty_fund(world):
+    world.token = brownie.Token.deploy("Stable Token", "STAB", {'from': world.governance})
+    world.fund = brownie.Fund.deploy({'from': world.governance})
+    world.fund_factory = brownie.FundFactory.deploy({'from': world.governance})
+    tx = world.fund_factory.createFund(world.fund, world.token, "Mudrex Generic Fund", "MDXGF", {'from': world.governance})
+    world.fund_through_proxy = brownie.Fund.at(tx.new_contracts[0])
+
+
+@scenario("funded", parent="empty_fund")
+def funded(world):
+    world.token.mint(world.holder, 2 * DEPOSIT_AMOUNT, {'from': world.governance})
+    world.token.approve(world.fund_through_proxy, 2 * DEPOSIT_AMOUNT, {'from': world.holder})
+    world.fund_through_proxy.deposit(DEPOSIT_AMOUNT, {'from': world.holder})
+
+
+@scenario("funded_two_strategies", parent="funded")
+def funded_two_strategies(world):
+    for profit_perc, weightage in [(1000, 5000), (5000, 2000)]:
+        strategy = brownie.ProfitStrategy.deploy(world.fund_through_proxy, profit_perc, {'from': world.governance})
+        world.token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), strategy, {'from': world.governance})
+        world.fund_through_proxy.addStrategy(strategy, weightage, 500, {'from': world.governance})
+        world.strategies.append(strategy)
+
+
+@scenario("funded_two_strategies_after_hardwork", parent="funded_two_strategies")
+def funded_two_strategies_after_hardwork(world):
+    world.fund_through_proxy.doHardWork({'from': world.governance})
+
+
+@scenario("funded_two_strategies_with_profit", parent="funded_two_strategies_after_hardwork")
+def funded_two_strategies_with_profit(world):
+    for strategy in world.strategies:
+        strategy.investAllUnderlying({'from': world.governance})
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from scripts.backtest import Configurations, load_history, run_backtest, SECS_PER_YEAR
+
+DAY = 86400
+
+def single_configuration(weightage, performance_fee_strategy=0, performance_fee_fund=0, platform_fee=0, hardwork_interval=DAY, rebalance=False):
+    return Configurations.grid(
+        [weightage],
+        [[performance_fee_strategy]],
+        [performance_fee_fund],
+        [platform_fee],
+        [hardwork_interval],
+        [rebalance]
+    )
+
+def test_constant_price_per_share():
+    timestamps = np.arange(10) * DAY
+    result = run_backtest(timestamps, np.ones((10, 2)), single_configuration([3000, 3000], 1000, 1000))
+
+    assert np.allclose(result.price_per_share, 1)
+    assert result.hardworks[0] == 10
+    assert result.fund_manager_fees[0] == 0
+
+def test_performance_fees():
+    timestamps = np.array([0, DAY])
+    vault_price_per_share = np.array([[1.0], [1.1]])
+    result = run_backtest(timestamps, vault_price_per_share, single_configuration([5000], 1000, 1000))
+
+    # 0.5 invested, profit of 0.05 paid from the underlying kept in the fund
+    assert result.strategy_creator_fees[0, 0] == pytest.approx(0.005)
+    assert result.fund_manager_fees[0] == pytest.approx(0.0045)
+    assert result.price_per_share[-1, 0] == pytest.approx(0.5 - 0.005 - 0.0045 + 0.55)
+
+def test_platform_fee():
+    timestamps = np.array([0, SECS_PER_YEAR])
+    result = run_backtest(timestamps, np.ones((2, 1)), single_configuration([8000], platform_fee=500, hardwork_interval=SECS_PER_YEAR))
+
+    assert result.platform_fees[0] == pytest.approx(0.8 * 0.05)
+
+def test_hardwork_skipped_when_fees_exceed_fund_balance():
+    timestamps = np.array([0, DAY, 2 * DAY])
+    vault_price_per_share = np.array([[1.0], [2.0], [2.0]])
+    result = run_backtest(timestamps, vault_price_per_share, single_configuration([9000], 1000, 1000))
+
+    # fees of 0.171 on a profit of 0.9, only 0.1 is kept in the fund
+    assert result.skipped_hardworks[0] == 2
+    assert result.hardworks[0] == 1
+    assert result.fund_manager_fees[0] == 0
+
+def test_hardwork_interval():
+    timestamps = np.arange(8) * DAY
+    configurations = Configurations.grid([[5000]], hardwork_intervals=[DAY, 2 * DAY, 7 * DAY])
+    result = run_backtest(timestamps, np.ones((8, 1)), configurations)
+
+    assert result.hardworks.tolist() == [8, 4, 2]
+
+def test_configurations_evaluated_independently():
+    rng = np.random.default_rng(0)
+    timestamps = np.arange(200) * 3600
+    vault_price_per_share = np.cumprod(1 + rng.normal(0.0002, 0.002, size=(200, 3)), axis=0)
+    configurations = Configurations.grid(
+        [[3000, 3000, 3000], [6000, 2000, 1000], [1000, 1000, 7000]],
+        [[0], [500, 1000, 0]],
+        [0, 1000],
+        [0, 200],
+        [3600, 6 * 3600],
+        [False, True]
+    )
+    result = run_backtest(timestamps, vault_price_per_share, configurations)
+    assert result.price_per_share.shape == (200, len(configurations))
+
+    for index in range(len(configurations)):
+        config = configurations.describe(index)
+        single = Configurations(
+            [config["weightage"]],
+            [config["performanceFeeStrategy"]],
+            [config["performanceFeeFund"]],
+            [config["platformFee"]],
+            [config["hardworkInterval"]],
+            [config["rebalance"]]
+        )
+        expected = run_backtest(timestamps, vault_price_per_share, single)
+        assert np.allclose(result.price_per_share[:, index], expected.price_per_share[:, 0])
+
+def test_load_history_csv(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text("timestamp,yearn,alpha\n86400,1.01,1.1\n0,1.0,1.0\n")
+
+    timestamps, price_per_share, names = load_history(str(path))
+
+    assert timestamps.tolist() == [0, 86400]
+    assert names == ["yearn", "alpha"]
+    assert price_per_share.tolist() == [[1.0, 1.0], [1.01, 1.1]]
+
+def test_load_history_parquet(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "history.parquet"
+    pd.DataFrame({"timestamp": [0, 86400], "yearn": [1.0, 1.01], "alpha": [1.0, 1.1]}).to_parquet(path)
+
+    timestamps, price_per_share, names = load_history(str(path), columns=["alpha"])
+
+    assert names == ["alpha"]
+    assert price_per_share.tolist() == [[1.0], [1.1]]
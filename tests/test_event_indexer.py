@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+from scripts.event_indexer import EventIndexer
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+def populate_fund(fund_through_proxy, accounts, token, profit_strategy_10):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), profit_strategy_10, {'from': accounts[0]})
+    fund_through_proxy.setPerformanceFeeFund(1000, {'from': accounts[0]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    fund_through_proxy.withdraw(10000000, {'from': accounts[1]})
+
+def populate_queued_fund(fund_through_proxy, accounts, token, profit_strategy_10):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), profit_strategy_10, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.setQueuedMode(True, {'from': accounts[0]})
+    fund_through_proxy.setFundManager(accounts[6], {'from': accounts[0]})
+    fund_through_proxy.setPerformanceFeeFund(1000, {'from': accounts[0]})
+    fund_through_proxy.setFeesInShares(True, {'from': accounts[0]})
+    fund_through_proxy.requestDeposit(50000000, {'from': accounts[1]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    fund_through_proxy.claim({'from': accounts[1]})
+    profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+    fund_through_proxy.requestWithdraw(10000000, {'from': accounts[1]})
+    settled = fund_through_proxy.doHardWork({'from': accounts[0]})
+    fund_through_proxy.claim({'from': accounts[1]})
+    return settled
+
+def rows(indexer, table, columns="*"):
+    return indexer.db.execute(f"SELECT {columns} FROM {table} ORDER BY block_number, log_index").fetchall()
+
+def test_index_fund_events(fund_factory, fund_through_proxy, accounts, token, profit_strategy_10):
+    populate_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    indexer = EventIndexer(brownie.web3, ":memory:", factories=[fund_factory])
+
+    assert indexer.sync() == brownie.web3.eth.block_number
+    assert fund_through_proxy in indexer.funds()
+    assert rows(indexer, "deposits", "fund, holder, amount") == [(fund_through_proxy, accounts[1], "50000000")]
+    # a fifth of the 52137500 left after the fees
+    assert rows(indexer, "withdrawals", "holder, amount, fee") == [(accounts[1], "10427500", "0")]
+    assert len(rows(indexer, "hard_works")) == 2
+    assert rows(indexer, "strategy_rewards", "strategy, profit, strategy_creator_fee")[-1] == (profit_strategy_10, "2500000", "125000")
+    assert rows(indexer, "fund_manager_rewards", "profit_total, fund_manager_fee") == [("2375000", "237500")]
+    assert rows(indexer, "transfers", "sender, recipient, value") == [
+        (ZERO_ADDRESS, accounts[1], "50000000"),
+        (accounts[1], ZERO_ADDRESS, "10000000"),
+    ]
+    # underlying token transfers are not indexed as the token is not a fund
+    assert indexer.db.execute("SELECT COUNT(*) FROM transfers WHERE fund != ?", (str(fund_through_proxy),)).fetchone()[0] == 0
+
+def test_index_queued_fund_events(fund_factory, fund_through_proxy, accounts, token, profit_strategy_10):
+    settled = populate_queued_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    indexer = EventIndexer(brownie.web3, ":memory:", factories=[fund_factory])
+    indexer.sync()
+
+    epoch = settled.events["EpochSettled"]
+    assert rows(indexer, "deposit_requests", "fund, holder, amount, epoch") == [(fund_through_proxy, accounts[1], "50000000", "0")]
+    assert rows(indexer, "withdraw_requests", "holder, shares, epoch") == [(accounts[1], "10000000", "1")]
+    assert rows(indexer, "settled_epochs", "epoch, price_per_share, minted_shares, withdrawn_underlying") == [
+        ("0", str(fund_through_proxy.underlyingUnit()), "50000000", "0"),
+        tuple(str(value) for value in epoch.values()),
+    ]
+    assert rows(indexer, "claims", "holder, shares, amount, fee") == [
+        (accounts[1], "50000000", "0", "0"),
+        (accounts[1], "0", str(epoch["withdrawnUnderlying"]), "0"),
+    ]
+    # 10% of the profit of 2500000 left after the 5% strategy creator fee
+    assert rows(indexer, "fee_mints", "recipient, amount, shares") == [(accounts[6], "237500", str(settled.events["FeesMinted"]["shares"]))]
+    indexes = [row[0] for row in indexer.db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert {"deposit_requests_holder", "withdraw_requests_holder", "claims_holder", "fee_mints_recipient"} <= set(indexes)
+
+def test_index_resumes_from_cursor(fund_factory, fund_through_proxy, accounts, token, profit_strategy_10, tmp_path):
+    database = str(tmp_path / "events.db")
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(10000000, {'from': accounts[1]})
+    first_block = EventIndexer(brownie.web3, database, factories=[fund_factory]).sync()
+
+    fund_through_proxy.deposit(20000000, {'from': accounts[1]})
+    indexer = EventIndexer(brownie.web3, database, factories=[fund_factory])
+
+    assert indexer.cursor()[0] == first_block
+    indexer.sync()
+    assert [row[0] for row in rows(indexer, "deposits", "amount")] == ["10000000", "20000000"]
+
+def test_index_with_adaptive_batches(fund_factory, fund_through_proxy, accounts, token, profit_strategy_10):
+    populate_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    expected = EventIndexer(brownie.web3, ":memory:", factories=[fund_factory])
+    expected.sync()
+
+    indexer = EventIndexer(brownie.web3, ":memory:", factories=[fund_factory], initial_batch=10**6, target_logs=1)
+    indexer.sync()
+
+    assert indexer.batch < 10**6
+    for table in ["deposits", "withdrawals", "strategy_rewards", "hard_works", "transfers"]:
+        assert rows(indexer, table) == rows(expected, table)
+
+def test_index_rolls_back_reorged_blocks(fund_factory, fund_through_proxy, accounts, token, chain):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.mint(accounts[2], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[2]})
+    indexer = EventIndexer(brownie.web3, ":memory:", factories=[fund_factory], reorg_depth=4)
+    indexer.sync()
+
+    fund_through_proxy.deposit(10000000, {'from': accounts[1]})
+    indexer.sync()
+    assert rows(indexer, "deposits", "holder") == [(accounts[1],)]
+
+    # replace the deposit with another one mined at the same height
+    chain.undo()
+    fund_through_proxy.deposit(20000000, {'from': accounts[2]})
+    indexer.sync()
+
+    assert rows(indexer, "deposits", "holder, amount") == [(accounts[2], "20000000")]
+    assert indexer.cursor()[1] == brownie.web3.eth.get_block("latest")["hash"].hex()
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+
+import asyncio
+import pytest, brownie
+from scripts.fund_client import BatchedRpc, FundClient, JsonRpcError, CONFIG, IMMUTABLES, NAV
+
+def create_funds(fund_factory, fund, token, accounts, count):
+    funds = []
+    for i in range(count):
+        tx = fund_factory.createFund(fund, token, f"Mudrex Generic Fund {i}", f"MDXGF{i}", {'from': accounts[0]})
+        funds.append(brownie.Fund.at(tx.new_contracts[0]))
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    for i, fund_through_proxy in enumerate(funds):
+        token.approve(fund_through_proxy, 10000000, {'from': accounts[1]})
+        fund_through_proxy.deposit(1000000 * (i + 1), {'from': accounts[1]})
+    return funds
+
+def run(test, **kwargs):
+    async def main():
+        async with BatchedRpc(brownie.web3.provider.endpoint_uri) as rpc:
+            return await test(rpc, FundClient(rpc, **kwargs))
+    return asyncio.run(main())
+
+def test_refresh_funds(fund_factory, fund, token, accounts):
+    funds = create_funds(fund_factory, fund, token, accounts, 3)
+
+    async def test(rpc, client):
+        return await client.refresh(funds), rpc.batches, rpc.requests
+    states, batches, requests = run(test)
+
+    for i, (fund_through_proxy, state) in enumerate(zip(funds, states)):
+        assert state["fund"] == fund_through_proxy
+        assert state["block"] == brownie.web3.eth.block_number
+        assert state["underlying"] == token
+        assert state["underlyingUnit"] == fund_through_proxy.underlyingUnit()
+        assert state["decimals"] == token.decimals()
+        assert state["symbol"] == f"MDXGF{i}"
+        assert state["strategies"] == []
+        assert state["maxInvestmentInStrategies"] == fund_through_proxy.maxInvestmentInStrategies()
+        assert state["totalValueLocked"] == 1000000 * (i + 1)
+        assert state["pricePerShare"] == fund_through_proxy.getPricePerShare()
+        assert state["totalSupply"] == fund_through_proxy.totalSupply()
+    # every read of a fund is made in a few batches, whatever the number of funds
+    assert batches <= 4
+    assert requests == 1 + len(funds) * (len(IMMUTABLES) + 1 + len(CONFIG) + len(NAV))
+
+def test_cached_immutables_and_config(fund_factory, fund, token, accounts):
+    funds = create_funds(fund_factory, fund, token, accounts, 2)
+
+    async def test(rpc, client):
+        await client.refresh(funds)
+        requests = rpc.requests
+        same_block = await client.refresh(funds)
+        same_block_requests = rpc.requests - requests
+
+        funds[0].setPerformanceFeeFund(500, {'from': accounts[0]})
+        requests = rpc.requests
+        next_block = await client.refresh(funds)
+        return same_block, same_block_requests, next_block, rpc.requests - requests
+
+    same_block, same_block_requests, next_block, next_block_requests = run(test)
+
+    # only the block number and the NAV are read again in the same block
+    assert same_block_requests == 1 + len(funds) * len(NAV)
+    assert same_block[0]["performanceFeeFund"] == 0
+    assert next_block_requests == 1 + len(funds) * (len(CONFIG) + len(NAV))
+    assert next_block[0]["performanceFeeFund"] == 500
+
+def test_config_max_age(fund_factory, fund, token, accounts):
+    funds = create_funds(fund_factory, fund, token, accounts, 1)
+
+    async def test(rpc, client):
+        await client.refresh(funds)
+        funds[0].setPerformanceFeeFund(500, {'from': accounts[0]})
+        stale = await client.refresh(funds)
+        client.invalidate(funds[0])
+        return stale, await client.refresh(funds)
+
+    stale, fresh = run(test, config_max_age=10)
+
+    assert stale[0]["performanceFeeFund"] == 0
+    assert fresh[0]["performanceFeeFund"] == 500
+
+def test_factory_funds(fund_factory, fund, token, accounts):
+    funds = create_funds(fund_factory, fund, token, accounts, 2)
+
+    async def test(rpc, client):
+        return await client.factory_funds(fund_factory, page_size=1)
+
+    assert run(test) == [info[0] for info in fund_factory.getFunds(0, 10)]
+    assert run(test)[-2:] == funds
+
+def test_rpc_errors(accounts):
+    async def test(rpc, client):
+        with pytest.raises(JsonRpcError):
+            await rpc.request("eth_unknownMethod", [])
+        with pytest.raises(JsonRpcError):
+            await client.nav(accounts[2])
+        return await rpc.block_number()
+
+    assert run(test) == brownie.web3.eth.block_number
+
+def test_close_waits_for_sent_batches():
+    async def main():
+        async with BatchedRpc(brownie.web3.provider.endpoint_uri) as rpc:
+            future = rpc.request("eth_blockNumber", [])
+            # lets the flush send the batch without awaiting its result
+            await asyncio.sleep(0)
+        return future, rpc
+
+    future, rpc = asyncio.run(main())
+    assert int(future.result(), 16) == brownie.web3.eth.block_number
+    assert rpc.tasks == set()
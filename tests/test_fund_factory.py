@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
 import pytest, brownie
+from eth_utils import to_checksum_address
 
 fund_name = "Mudrex Generic Fund"
 fund_symbol = "MDXGF"
@@ -38,3 +39,184 @@ def test_new_fund_event_fires(fund_factory, accounts, fund, token):
 
     assert len(tx.events) == 1
     assert tx.events["NewFund"].values() == [fund_proxy]
+
+def salt(i):
+    return "0x" + i.to_bytes(32, "big").hex()
+
+def storage_slot(name):
+    return int.from_bytes(brownie.web3.keccak(text=f"eip1967.mesh.finance.fundStorage.{name}"), "big") - 1
+
+def test_create_fund_deterministic_without_implementation(fund_factory, accounts, token):
+    with brownie.reverts("Fund implementation not set"):
+        fund_factory.createFundDeterministic(salt(1), token, fund_name, fund_symbol, {'from': accounts[0]})
+
+def test_set_fund_implementation(fund_factory, accounts, fund):
+    with brownie.reverts("Not governance"):
+        fund_factory.setFundImplementation(fund, {'from': accounts[1]})
+    with brownie.reverts("Implementation is not a contract"):
+        fund_factory.setFundImplementation(accounts[1], {'from': accounts[0]})
+
+    tx = fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    assert fund_factory.fundImplementation() == fund
+    assert fund_factory.implementation() == fund
+    assert tx.events["FundImplementationUpdated"].values() == [fund]
+
+def test_create_fund_deterministic(fund_factory, accounts, fund, token):
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    expected = fund_factory.computeFundAddress(salt(1))
+
+    tx = fund_factory.createFundDeterministic(salt(1), token, fund_name, fund_symbol, {'from': accounts[0]})
+    fund_through_beacon = brownie.Fund.at(tx.new_contracts[0])
+
+    assert fund_through_beacon == expected
+    assert tx.events["NewFund"].values() == [expected]
+    assert fund_through_beacon.name() == fund_name
+    assert fund_through_beacon.symbol() == fund_symbol
+    assert fund_through_beacon.underlying() == token
+    assert fund_through_beacon.governance() == accounts[0]
+
+def test_fund_address_computed_off_chain(fund_factory, accounts):
+    # CREATE2 address: keccak256(0xff ++ factory ++ salt ++ keccak256(creation code))[12:]
+    init_code_hash = brownie.web3.keccak(hexstr=brownie.FundBeaconProxy.bytecode)
+    data = b"\xff" + bytes.fromhex(fund_factory.address[2:]) + bytes.fromhex(salt(7)[2:]) + init_code_hash
+    address = to_checksum_address(bytes(brownie.web3.keccak(data)[12:]))
+
+    assert fund_factory.computeFundAddress(salt(7)) == address
+
+def test_create_fund_deterministic_twice_with_same_salt(fund_factory, accounts, fund, token):
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    fund_factory.createFundDeterministic(salt(1), token, fund_name, fund_symbol, {'from': accounts[0]})
+
+    with brownie.reverts():
+        fund_factory.createFundDeterministic(salt(1), token, fund_name, fund_symbol, {'from': accounts[0]})
+
+def test_create_funds(fund_factory, accounts, fund, token, token_2):
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    salts = [salt(i) for i in range(3)]
+    expected = [fund_factory.computeFundAddress(s) for s in salts]
+
+    with brownie.reverts("Array lengths do not match"):
+        fund_factory.createFunds(salts, [token, token_2], ["A", "B", "C"], ["A", "B", "C"], {'from': accounts[0]})
+    with brownie.reverts("Not governance"):
+        fund_factory.createFunds(salts, [token, token_2, token], ["A", "B", "C"], ["A", "B", "C"], {'from': accounts[1]})
+
+    tx = fund_factory.createFunds(salts, [token, token_2, token], ["A", "B", "C"], ["MA", "MB", "MC"], {'from': accounts[0]})
+
+    assert tx.return_value == expected
+    assert [event["fundProxy"] for event in tx.events["NewFund"]] == expected
+    for address, underlying, symbol in zip(expected, [token, token_2, token], ["MA", "MB", "MC"]):
+        created = brownie.Fund.at(address)
+        assert created.underlying() == underlying
+        assert created.symbol() == symbol
+
+def test_beacon_funds_follow_fund_implementation(Fund, fund_factory, accounts, fund, token):
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    tx = fund_factory.createFunds([salt(1), salt(2)], [token, token], ["A", "B"], ["MA", "MB"], {'from': accounts[0]})
+    funds = [brownie.Fund.at(address) for address in tx.return_value]
+    token.mint(accounts[1], 1000, {'from': accounts[0]})
+    token.approve(funds[0], 1000, {'from': accounts[1]})
+    funds[0].deposit(1000, {'from': accounts[1]})
+
+    new_implementation = Fund.deploy({'from': accounts[0]})
+    fund_factory.setFundImplementation(new_implementation, {'from': accounts[0]})
+    fund_factory.finalizeFunds(0, 10, {'from': accounts[0]})
+
+    # state is kept by the proxies across the upgrade
+    assert funds[0].balanceOf(accounts[1]) == 1000
+    assert funds[0].totalValueLocked() == 1000
+    assert funds[1].symbol() == "MB"
+    assert [info[4] for info in fund_factory.getFunds(0, 10)] == [new_implementation] * 2
+    assert fund_factory.getFundInfo(funds[0])[4] == new_implementation
+
+def test_finalize_funds_migrates_beacon_funds(FundStorageLegacyWriter, fund_factory, accounts, fund, fund_2, token):
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    tx = fund_factory.createFundDeterministic(salt(1), token, fund_name, fund_symbol, {'from': accounts[0]})
+    beacon_fund = brownie.Fund.at(tx.new_contracts[0])
+    tx = fund_factory.createFund(fund, token, fund_name, fund_symbol, {'from': accounts[0]})
+    proxy_fund = brownie.Fund.at(tx.new_contracts[0])
+
+    # put the beacon fund back on storage version 0, with a platform fee in its own slot
+    fund_factory.setFundImplementation(FundStorageLegacyWriter.deploy({'from': accounts[0]}), {'from': accounts[0]})
+    FundStorageLegacyWriter.at(beacon_fund.address).writeSlots(
+        [storage_slot("storageVersion"), storage_slot("fees"), storage_slot("platformFee")], [0, 0, 200], {'from': accounts[0]}
+    )
+    fund_factory.setFundImplementation(fund_2, {'from': accounts[0]})
+    assert beacon_fund.storageVersion() == 0
+
+    fund_factory.finalizeFunds(0, 2, {'from': accounts[0]})
+
+    assert beacon_fund.storageVersion() == 1
+    assert beacon_fund.platformFee() == 200
+    assert proxy_fund.storageVersion() == 1
+    assert fund_factory.getFundInfo(beacon_fund)[4] == fund_2
+    assert fund_factory.getFundInfo(proxy_fund)[4] == fund
+
+def test_finalize_funds_access(fund_factory, accounts, fund, token):
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    tx = fund_factory.createFundDeterministic(salt(1), token, fund_name, fund_symbol, {'from': accounts[0]})
+    beacon_fund = brownie.Fund.at(tx.new_contracts[0])
+
+    with brownie.reverts("Not governance"):
+        fund_factory.finalizeFunds(0, 1, {'from': accounts[1]})
+    with brownie.reverts("Not governance nor factory"):
+        beacon_fund.finalizeUpgrade({'from': accounts[1]})
+    with brownie.reverts("Page start out of range"):
+        fund_factory.finalizeFunds(2, 1, {'from': accounts[0]})
+    beacon_fund.finalizeUpgrade({'from': accounts[0]})
+
+def test_fund_registry(fund_factory, accounts, fund, token, token_2):
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    created = []
+    for i, underlying in enumerate([token, token_2, token]):
+        tx = fund_factory.createFund(fund, underlying, fund_name, f"MDXGF{i}", {'from': accounts[0]})
+        created.append((tx.new_contracts[0], underlying, tx.block_number, False, fund))
+    tx = fund_factory.createFundDeterministic(salt(1), token_2, fund_name, fund_symbol, {'from': accounts[0]})
+    created.append((tx.new_contracts[0], token_2, tx.block_number, True, fund))
+
+    assert fund_factory.fundCount() == 4
+    assert fund_factory.getFunds(0, 10) == created
+    assert fund_factory.getFunds(1, 2) == created[1:3]
+    assert fund_factory.getFunds(4, 2) == []
+    assert fund_factory.getFundInfo(created[3][0]) == created[3]
+    assert fund_factory.isFund(created[0][0])
+    assert not fund_factory.isFund(fund)
+
+    assert fund_factory.fundCountByUnderlying(token_2) == 2
+    assert fund_factory.getFundsByUnderlying(token_2, 0, 10) == [created[1], created[3]]
+    assert fund_factory.getFundsByUnderlying(token, 1, 1) == [created[2]]
+    assert fund_factory.getFundsByUnderlying(accounts[1], 0, 10) == []
+
+    with brownie.reverts("Page start out of range"):
+        fund_factory.getFunds(5, 1)
+    with brownie.reverts("Fund not created by this factory"):
+        fund_factory.getFundInfo(fund)
+
+def test_fund_summaries(fund_factory, accounts, fund, token, token_2):
+    funds = []
+    for underlying in [token, token_2]:
+        tx = fund_factory.createFund(fund, underlying, fund_name, fund_symbol, {'from': accounts[0]})
+        funds.append(brownie.Fund.at(tx.new_contracts[0]))
+    token_2.mint(accounts[1], 1000, {'from': accounts[0]})
+    token_2.approve(funds[1], 1000, {'from': accounts[1]})
+    funds[1].deposit(1000, {'from': accounts[1]})
+
+    assert fund_factory.getFundSummaries(0, 2) == [
+        (funds[0], token, 0, funds[0].underlyingUnit(), 0, False),
+        (funds[1], token_2, 1000, funds[1].underlyingUnit(), 1000, False),
+    ]
+    assert fund_factory.getFundSummaries(1, 5) == fund_factory.getFundSummaries(0, 5)[1:]
+
+def test_fund_summaries_flag_reverting_funds(FundStorageLegacyWriter, fund_factory, accounts, fund, token):
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    tx = fund_factory.createFundDeterministic(salt(1), token, fund_name, fund_symbol, {'from': accounts[0]})
+    beacon_fund = brownie.Fund.at(tx.new_contracts[0])
+    tx = fund_factory.createFund(fund, token, fund_name, fund_symbol, {'from': accounts[0]})
+    proxy_fund = brownie.Fund.at(tx.new_contracts[0])
+
+    # the beacon fund now runs an implementation without the fund functions
+    fund_factory.setFundImplementation(FundStorageLegacyWriter.deploy({'from': accounts[0]}), {'from': accounts[0]})
+
+    assert fund_factory.getFundSummaries(0, 2) == [
+        (beacon_fund, token, 0, 0, 0, True),
+        (proxy_fund, token, 0, proxy_fund.underlyingUnit(), 0, False),
+    ]
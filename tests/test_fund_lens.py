@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+from scripts.fund_lens import fund_state, fund_states
+
+def setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 50000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 300, {'from': accounts[0]})
+    fund_through_proxy.setWithdrawalQueue([profit_strategy_50], [10], {'from': accounts[0]})
+    fund_through_proxy.setDepositLimit(1000000000, {'from': accounts[0]})
+    fund_through_proxy.setWithdrawalFee(50, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+def test_fund_state_config(fund_lens, fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50)
+    state = fund_lens.getFundState(fund_through_proxy).dict()
+
+    assert state["fund"] == fund_through_proxy
+    assert state["name"] == fund_through_proxy.name()
+    assert state["symbol"] == fund_through_proxy.symbol()
+    assert state["underlying"] == token
+    assert state["underlyingUnit"] == fund_through_proxy.underlyingUnit()
+    assert state["governance"] == accounts[0]
+    assert state["fundManager"] == accounts[0]
+    assert state["platformRewards"] == fund_through_proxy.platformRewards()
+    assert state["depositLimit"] == 1000000000
+    assert state["withdrawalFee"] == 50
+    assert state["maxInvestmentInStrategies"] == fund_through_proxy.maxInvestmentInStrategies()
+    assert state["totalWeightInStrategies"] == 7000
+    assert state["depositsPaused"] == False
+    assert state["shouldRebalance"] == False
+    assert state["lastHardworkTimestamp"] == fund_through_proxy.lastHardworkTimestamp()
+    assert state["withdrawalQueue"] == [profit_strategy_50]
+
+def test_fund_state_policies_and_accounting(fund_lens, fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50)
+    fund_through_proxy.setReservePolicy(2000, 1000, 3000, {'from': accounts[0]})
+    fund_through_proxy.setRebalanceBand(500, 1000000, {'from': accounts[0]})
+    fund_through_proxy.setFeesInShares(True, {'from': accounts[0]})
+    profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    state = fund_lens.getFundState(fund_through_proxy).dict()
+
+    assert (state["reserveTarget"], state["reserveFloor"], state["reserveCeiling"]) == (2000, 1000, 3000)
+    assert (state["rebalanceThreshold"], state["rebalanceMinAmount"]) == (500, 1000000)
+    assert state["feesInShares"] == True
+    assert state["totalAccruedFees"] == fund_through_proxy.totalAccruedFees() > 0
+    assert state["claimableUnderlying"] == 0
+    assert state["hardWorkCursor"] == 0
+    assert state["ppsCheckpointCount"] == 2
+    assert state["storageVersion"] == 1
+
+def test_fund_state_balances(fund_lens, fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50)
+    profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+    state = fund_lens.getFundState(fund_through_proxy).dict()
+
+    assert state["totalSupply"] == 50000000
+    assert state["underlyingBalance"] == token.balanceOf(fund_through_proxy)
+    assert state["totalValueLocked"] == fund_through_proxy.totalValueLocked()
+    assert state["pricePerShare"] == fund_through_proxy.getPricePerShare()
+
+def test_fund_state_strategies(fund_lens, fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50)
+    strategies = fund_lens.getFundState(fund_through_proxy)["strategies"]
+
+    assert len(strategies) == 2
+    assert strategies[0][0] == profit_strategy_10
+    assert list(strategies[0][1:]) == list(fund_through_proxy.getStrategy(profit_strategy_10)) + [profit_strategy_10.investedUnderlyingBalance(), 0]
+    assert strategies[1][0] == profit_strategy_50
+    assert list(strategies[1][1:]) == list(fund_through_proxy.getStrategy(profit_strategy_50)) + [profit_strategy_50.investedUnderlyingBalance(), 10]
+
+def test_fund_state_without_strategies(fund_lens, fund_through_proxy):
+    state = fund_lens.getFundState(fund_through_proxy).dict()
+
+    assert state["strategies"] == []
+    assert state["totalValueLocked"] == 0
+    assert state["pricePerShare"] == fund_through_proxy.underlyingUnit()
+
+def test_fund_state_for_holder(fund_lens, fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50)
+    token.approve(fund_through_proxy, 1000, {'from': accounts[1]})
+    fund_state_, holder_state = fund_lens.getFundStateForHolder(fund_through_proxy, accounts[1])
+
+    assert fund_state_["fund"] == fund_through_proxy
+    assert list(holder_state) == [
+        accounts[1],
+        fund_through_proxy.balanceOf(accounts[1]),
+        fund_through_proxy.underlyingBalanceWithInvestmentForHolder(accounts[1]),
+        50000000,
+        1000,
+        0, 0, 0
+    ]
+
+def test_fund_lens_helper(fund_lens, fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50)
+
+    state = fund_state(fund_through_proxy, lens=fund_lens)
+    assert state["totalValueLocked"] == fund_through_proxy.totalValueLocked()
+    assert [strategy["strategy"] for strategy in state["strategies"]] == [profit_strategy_10, profit_strategy_50]
+    assert state["strategies"][1]["withdrawalCostHint"] == 10
+
+    state = fund_state(fund_through_proxy, accounts[1], lens=fund_lens)
+    assert state["fundState"]["fund"] == fund_through_proxy
+    assert state["holderState"]["shares"] == fund_through_proxy.balanceOf(accounts[1])
+
+    states = fund_states([fund_through_proxy, fund_through_proxy], lens=fund_lens)
+    assert len(states) == 2
+    assert states[0] == states[1]
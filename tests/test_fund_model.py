@@ -0,0 +1,212 @@
+#!/usr/bin/python3
+
+import random
+import pytest, brownie
+from brownie.exceptions import VirtualMachineError
+from scripts.fund_model import FundModel, ModelRevert
+
+MAX_UINT256 = 2**256 - 1
+PROFIT_PERCS = [1000, 5000, 8000]
+
+def to_model(value):
+    # the model identifies accounts and contracts by their address
+    if isinstance(value, (list, tuple)):
+        return [to_model(item) for item in value]
+    return str(value) if hasattr(value, "address") else value
+
+class Differential:
+    """Applies every operation to the deployed fund and to the model and checks that both end in the same state."""
+
+    def __init__(self, fund_through_proxy, token, strategies, accounts):
+        self.fund = fund_through_proxy
+        self.token = token
+        self.strategies = strategies
+        self.governance = accounts[0]
+        self.holders = accounts[1:4]
+        self.tracked = [accounts[0], accounts[5], accounts[6]] + list(self.holders)
+        self.model = FundModel(
+            address=str(fund_through_proxy),
+            governance=str(accounts[0]),
+            underlying_unit=fund_through_proxy.underlyingUnit(),
+            timestamp=brownie.chain.time()
+        )
+        for strategy, profit_perc in zip(strategies, PROFIT_PERCS):
+            token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), strategy, {'from': accounts[0]})
+            self.model.create_profit_strategy(str(strategy), profit_perc, creator=str(accounts[0]))
+        for holder in self.holders:
+            token.mint(holder, 10**12, {'from': accounts[0]})
+            token.approve(fund_through_proxy, MAX_UINT256, {'from': holder})
+            self.model.mint(str(holder), 10**12)
+
+    def apply(self, contract_method, model_method, *args, sender=None):
+        try:
+            contract_method(*args, {'from': sender or self.governance})
+            contract_revert = None
+        except VirtualMachineError as e:
+            contract_revert = e.revert_msg
+        model_args = [to_model(arg) for arg in args]
+        if sender is not None:
+            model_args.insert(0, str(sender))
+        try:
+            model_method(*model_args, timestamp=brownie.chain[-1].timestamp)
+            model_revert = None
+        except ModelRevert as e:
+            model_revert = str(e)
+        assert contract_revert == model_revert
+
+    def profit(self, index):
+        self.strategies[index].investAllUnderlying({'from': self.governance})
+        self.model.strategy(str(self.strategies[index])).invest_all_underlying()
+
+    def check(self):
+        fund, model = self.fund, self.model
+        assert fund.totalSupply() == model.total_supply
+        assert fund.totalValueLocked() == model.total_value_locked()
+        assert fund.getPricePerShare() == model.price_per_share()
+        assert fund.totalAccounted() == model.total_accounted
+        assert fund.totalInvested() == model.total_invested
+        assert fund.totalAccruedFees() == model.total_accrued_fees
+        assert fund.getStrategyList() == model.strategy_list
+        for account in self.tracked:
+            assert self.token.balanceOf(account) == model.balance_of(str(account))
+            assert fund.balanceOf(account) == model.share_balance_of(str(account))
+            assert fund.accruedFees(account) == model.accrued_fees.get(str(account), 0)
+        for strategy in self.strategies:
+            assert self.token.balanceOf(strategy) == model.balance_of(str(strategy))
+            if model.is_active_strategy(str(strategy)):
+                assert fund.getStrategy(strategy)[3] == model.strategies[str(strategy)].last_balance
+
+    def random_operation(self, rng):
+        fund, model = self.fund, self.model
+        operation = rng.choices(
+            ["deposit", "withdraw", "hard_work", "profit", "sleep", "weightage", "rebalance", "fees", "strategy_fee", "claim", "band", "reserve"],
+            weights=[25, 20, 15, 15, 10, 5, 4, 3, 3, 4, 3, 3]
+        )[0]
+        if operation == "deposit":
+            holder = rng.choice(self.holders)
+            self.apply(fund.deposit, model.deposit, rng.choice([0, rng.randint(1, 10**9)]), sender=holder)
+        elif operation == "withdraw":
+            holder = rng.choice(self.holders)
+            shares = model.share_balance_of(str(holder)) * rng.randint(0, 10000) // 10000
+            self.apply(fund.withdraw, model.withdraw, shares, sender=holder)
+        elif operation == "hard_work":
+            self.apply(fund.doHardWork, model.do_hard_work)
+        elif operation == "profit":
+            self.profit(rng.randrange(len(self.strategies)))
+        elif operation == "sleep":
+            brownie.chain.sleep(rng.randint(1, 30 * 86400))
+        elif operation == "weightage":
+            strategy = rng.choice(self.strategies)
+            self.apply(fund.updateStrategyWeightage, model.update_strategy_weightage, strategy, rng.randint(0, 5000))
+        elif operation == "rebalance":
+            self.apply(fund.setShouldRebalance, model.set_should_rebalance, rng.choice([True, False]))
+        elif operation == "fees":
+            self.apply(fund.setPerformanceFeeFund, model.set_performance_fee_fund, rng.randint(0, 1200))
+            self.apply(fund.setPlatformFee, model.set_platform_fee, rng.randint(0, 600))
+            self.apply(fund.setWithdrawalFee, model.set_withdrawal_fee, rng.randint(0, 120))
+            self.apply(fund.setFeesInShares, model.set_fees_in_shares, rng.random() < 0.5)
+        elif operation == "strategy_fee":
+            strategy = rng.choice(self.strategies)
+            self.apply(fund.updateStrategyPerformanceFee, model.update_strategy_performance_fee, strategy, rng.randint(0, 1200))
+        elif operation == "claim":
+            if rng.random() < 0.5:
+                self.apply(fund.claimFees, model.claim_fees, rng.choice(self.tracked))
+            else:
+                self.apply(fund.claimFeesBatch, model.claim_fees_batch, rng.sample(self.tracked, 3))
+        elif operation == "band":
+            threshold, min_amount = rng.choice([0, rng.randint(1, 1200)]), rng.choice([0, rng.randint(1, 10**8)])
+            if rng.random() < 0.5:
+                self.apply(fund.setRebalanceBand, model.set_rebalance_band, threshold, min_amount)
+            else:
+                strategy = rng.choice(self.strategies)
+                self.apply(fund.setStrategyRebalanceBand, model.set_strategy_rebalance_band, strategy, threshold, min_amount)
+        elif operation == "reserve":
+            policy = sorted(rng.randint(0, 4000) for _ in range(3)) if rng.random() < 0.8 else [0, 0, 0]
+            self.apply(fund.setReservePolicy, model.set_reserve_policy, policy[1], policy[0], policy[2])
+
+def setup_differential(fund_through_proxy, token, accounts, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    differential = Differential(fund_through_proxy, token, [profit_strategy_10, profit_strategy_50, profit_strategy_80], accounts)
+    fund, model = differential.fund, differential.model
+    differential.apply(fund.setPlatformRewards, model.set_platform_rewards, accounts[5])
+    differential.apply(fund.setFundManager, model.set_fund_manager, accounts[6])
+    for strategy, weightage in zip(differential.strategies, [3000, 2000, 1000]):
+        differential.apply(fund.addStrategy, model.add_strategy, strategy, weightage, 500)
+    return differential
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("use_cached_balances", [False, True])
+def test_random_operations_match_contract(fund_through_proxy, token, accounts, profit_strategy_10, profit_strategy_50, profit_strategy_80, seed, use_cached_balances):
+    differential = setup_differential(fund_through_proxy, token, accounts, profit_strategy_10, profit_strategy_50, profit_strategy_80)
+    fund, model = differential.fund, differential.model
+    if use_cached_balances:
+        # long enough for the cache to stay valid between hard works, so views match at any block
+        differential.apply(fund.setUseCachedBalances, model.set_use_cached_balances, True)
+        differential.apply(fund.setMaxCachedBalanceAge, model.set_max_cached_balance_age, 10**9)
+
+    rng = random.Random(seed)
+    for _ in range(60):
+        differential.random_operation(rng)
+        differential.check()
+
+def test_withdrawal_queue_and_remove_strategy_match_contract(fund_through_proxy, token, accounts, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    differential = setup_differential(fund_through_proxy, token, accounts, profit_strategy_10, profit_strategy_50, profit_strategy_80)
+    fund, model = differential.fund, differential.model
+    holder = differential.holders[0]
+
+    differential.apply(fund.deposit, model.deposit, 50000000, sender=holder)
+    differential.apply(fund.doHardWork, model.do_hard_work)
+    differential.profit(1)
+    differential.apply(fund.setWithdrawalQueue, model.set_withdrawal_queue, [profit_strategy_80, profit_strategy_50], [10, 20])
+    differential.apply(fund.withdraw, model.withdraw, 30000000, sender=holder)
+    differential.check()
+
+    differential.apply(fund.removeStrategy, model.remove_strategy, profit_strategy_10)
+    differential.apply(fund.doHardWork, model.do_hard_work)
+    differential.check()
+    assert fund.getWithdrawalQueue() == model.withdrawal_queue
+
+def test_model_revert_leaves_state_unchanged():
+    model = FundModel()
+    model.create_profit_strategy("strategy", 8000, creator="creator")
+    model.add_strategy("strategy", 9000, 1000)
+    model.mint("holder", 10000)
+    model.deposit("holder", 10000)
+    model.do_hard_work(timestamp=1)
+    model.strategy("strategy").invest_all_underlying()
+    model.set_performance_fee_fund(1000)
+    model.set_fund_manager("fund_manager")
+    balances = dict(model.balances)
+
+    # the creator and fund manager fees are accrued, then exceed the underlying kept in the fund
+    with pytest.raises(ModelRevert, match="Fees exceed underlying in fund"):
+        model.do_hard_work(timestamp=2)
+
+    assert model.balances == balances
+    assert model.accrued_fees == {}
+    assert model.total_accrued_fees == 0
+    assert model.last_hardwork_timestamp == 1
+
+def test_model_throughput():
+    model = FundModel()
+    for i, profit_perc in enumerate(PROFIT_PERCS):
+        model.create_profit_strategy(f"strategy_{i}", profit_perc)
+        model.add_strategy(f"strategy_{i}", 2000, 500)
+    model.mint("holder", 10**30)
+    rng = random.Random(0)
+
+    for step in range(20000):
+        operation = rng.random()
+        try:
+            if operation < 0.4:
+                model.deposit("holder", rng.randint(1, 10**18), timestamp=step)
+            elif operation < 0.7:
+                model.withdraw("holder", model.share_balance_of("holder") // 10, timestamp=step)
+            elif operation < 0.9:
+                model.do_hard_work(timestamp=step)
+            else:
+                model.strategy(f"strategy_{rng.randrange(3)}").invest_all_underlying()
+        except ModelRevert:
+            pass
+
+    assert model.share_balance_of("holder") == model.total_supply
+    assert model.underlying_balance_with_investment_for_holder("holder") <= model.total_value_locked()
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+def slot(name):
+    return int.from_bytes(brownie.web3.keccak(text=f"eip1967.mesh.finance.fundStorage.{name}"), "big") - 1
+
+def read_slot(contract, name):
+    return int.from_bytes(brownie.web3.eth.get_storage_at(contract.address, slot(name)), "big")
+
+# values of storage version 0, each in its own slot
+LEGACY_VALUES = {
+    "depositLimitTxMax": 10**24,
+    "depositLimitTxMin": 10**6,
+    "performanceFeeFund": 500,
+    "platformFee": 200,
+    "withdrawalFee": 50,
+    "maxInvestmentInStrategies": 8000,
+    "totalWeightInStrategies": 0,
+    "totalAccounted": 123456789,
+    "totalInvested": 98765432,
+    "depositsPaused": 1,
+    "shouldRebalance": 1,
+    "lastHardworkTimestamp": 1620000000,
+}
+
+PACKED_SLOTS = ["fees", "state", "totals", "depositLimitsTx", "storageVersion"]
+MAX_UINT256 = 2**256 - 1
+
+def write_legacy_storage(FundStorageLegacyWriter, fund_proxy, legacy_values, accounts):
+    # turn the proxy into a fund on storage version 0
+    writer = FundStorageLegacyWriter.deploy({'from': accounts[0]})
+    fund_proxy.upgrade(writer, {'from': accounts[0]})
+    names = PACKED_SLOTS + list(legacy_values)
+    values = [0] * len(PACKED_SLOTS) + list(legacy_values.values())
+    FundStorageLegacyWriter.at(fund_proxy.address).writeSlots([slot(name) for name in names], values, {'from': accounts[0]})
+
+def test_new_fund_uses_packed_layout(fund_through_proxy, accounts):
+    assert fund_through_proxy.storageVersion() == 1
+    fund_through_proxy.setPerformanceFeeFund(500, {'from': accounts[0]})
+    fund_through_proxy.setPlatformFee(200, {'from': accounts[0]})
+    fund_through_proxy.setWithdrawalFee(50, {'from': accounts[0]})
+    fund_through_proxy.setShouldRebalance(True, {'from': accounts[0]})
+    fund_through_proxy.setMaxCachedBalanceAge(3600, {'from': accounts[0]})
+
+    assert read_slot(fund_through_proxy, "fees") == 500 | 200 << 16 | 50 << 32 | 9000 << 48
+    assert read_slot(fund_through_proxy, "state") == 3600 << 64 | 1 << 129
+    for name in LEGACY_VALUES:
+        assert read_slot(fund_through_proxy, name) == 0
+
+def test_setter_out_of_packed_range_clamped(fund_through_proxy, accounts):
+    fund_through_proxy.setMaxCachedBalanceAge(MAX_UINT256, {'from': accounts[0]})
+    fund_through_proxy.setDepositLimitTxMax(MAX_UINT256, {'from': accounts[0]})
+    fund_through_proxy.setDepositLimitTxMin(2**128, {'from': accounts[0]})
+
+    assert fund_through_proxy.maxCachedBalanceAge() == 2**64 - 1
+    assert fund_through_proxy.depositLimitTxMax() == 2**128 - 1
+    assert fund_through_proxy.depositLimitTxMin() == 2**128 - 1
+
+def test_finalize_upgrade_migrates_legacy_slots(FundStorageLegacyWriter, fund_through_proxy, fund, accounts):
+    fund_proxy = brownie.FundProxy.at(fund_through_proxy.address)
+    write_legacy_storage(FundStorageLegacyWriter, fund_proxy, LEGACY_VALUES, accounts)
+
+    fund_proxy.upgrade(fund, {'from': accounts[0]})
+
+    assert fund_through_proxy.storageVersion() == 1
+    assert fund_through_proxy.depositLimitTxMax() == LEGACY_VALUES["depositLimitTxMax"]
+    assert fund_through_proxy.depositLimitTxMin() == LEGACY_VALUES["depositLimitTxMin"]
+    assert fund_through_proxy.performanceFeeFund() == LEGACY_VALUES["performanceFeeFund"]
+    assert fund_through_proxy.platformFee() == LEGACY_VALUES["platformFee"]
+    assert fund_through_proxy.withdrawalFee() == LEGACY_VALUES["withdrawalFee"]
+    assert fund_through_proxy.maxInvestmentInStrategies() == LEGACY_VALUES["maxInvestmentInStrategies"]
+    assert fund_through_proxy.totalWeightInStrategies() == LEGACY_VALUES["totalWeightInStrategies"]
+    assert fund_through_proxy.totalAccounted() == LEGACY_VALUES["totalAccounted"]
+    assert fund_through_proxy.totalInvested() == LEGACY_VALUES["totalInvested"]
+    assert fund_through_proxy.depositsPaused() == True
+    assert fund_through_proxy.shouldRebalance() == True
+    assert fund_through_proxy.lastHardworkTimestamp() == LEGACY_VALUES["lastHardworkTimestamp"]
+    for name in LEGACY_VALUES:
+        assert read_slot(fund_through_proxy, name) == 0
+
+def test_finalize_upgrade_clamps_unlimited_legacy_values(FundStorageLegacyWriter, fund_through_proxy, fund, token, accounts):
+    fund_proxy = brownie.FundProxy.at(fund_through_proxy.address)
+    # MAX_UINT256 was a valid setting meaning no limit, and does not fit in the packed fields
+    write_legacy_storage(FundStorageLegacyWriter, fund_proxy, dict(LEGACY_VALUES, depositLimitTxMax=MAX_UINT256, depositsPaused=0), accounts)
+
+    fund_proxy.upgrade(fund, {'from': accounts[0]})
+
+    assert fund_through_proxy.storageVersion() == 1
+    assert fund_through_proxy.depositLimitTxMax() == 2**128 - 1
+    assert read_slot(fund_through_proxy, "depositLimitTxMax") == 0
+    token.mint(accounts[1], 10**7, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 10**7, {'from': accounts[1]})
+    fund_through_proxy.deposit(10**7, {'from': accounts[1]})
+    assert fund_through_proxy.balanceOf(accounts[1]) > 0
+
+def test_finalize_upgrade_keeps_migrated_storage(fund_through_proxy, fund_2, accounts):
+    fund_proxy = brownie.FundProxy.at(fund_through_proxy.address)
+    fund_through_proxy.setPlatformFee(200, {'from': accounts[0]})
+    fees = read_slot(fund_through_proxy, "fees")
+
+    fund_proxy.upgrade(fund_2, {'from': accounts[0]})
+
+    assert read_slot(fund_through_proxy, "fees") == fees
+    assert fund_through_proxy.platformFee() == 200
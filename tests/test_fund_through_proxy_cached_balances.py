@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+def setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 50000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+
+    token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), profit_strategy_10, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.setUseCachedBalances(True, {'from': accounts[0]})
+    fund_through_proxy.setMaxCachedBalanceAge(3600, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+def live_total_value_locked(fund_through_proxy, token):
+    total = token.balanceOf(fund_through_proxy)
+    for strategy in fund_through_proxy.getStrategyList():
+        total += brownie.ProfitStrategy.at(strategy).investedUnderlyingBalance()
+    return total
+
+def test_cached_balances_disabled_by_default(fund_through_proxy):
+    assert fund_through_proxy.useCachedBalances() == False
+    assert fund_through_proxy.maxCachedBalanceAge() == 0
+
+def test_set_use_cached_balances_from_fund_manager(fund_through_proxy, accounts):
+    fund_through_proxy.setFundManager(accounts[1], {'from': accounts[0]})
+
+    with brownie.reverts("Not governance"):
+        fund_through_proxy.setUseCachedBalances(True, {'from': accounts[1]})
+    with brownie.reverts("Not governance"):
+        fund_through_proxy.setMaxCachedBalanceAge(3600, {'from': accounts[1]})
+
+def test_set_cached_balances(fund_through_proxy, accounts):
+    fund_through_proxy.setUseCachedBalances(True, {'from': accounts[0]})
+    fund_through_proxy.setMaxCachedBalanceAge(3600, {'from': accounts[0]})
+
+    assert fund_through_proxy.useCachedBalances() == True
+    assert fund_through_proxy.maxCachedBalanceAge() == 3600
+
+def test_last_balance_recorded_at_hard_work(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+
+    assert fund_through_proxy.getStrategy(profit_strategy_10)[3] == 50/100 * 50000000
+    assert fund_through_proxy.totalValueLocked() == live_total_value_locked(fund_through_proxy, token)
+
+def test_cached_price_per_share_error_bounded_by_unrealized_profit(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+
+    unrealized_profit = (50/100 * 50000000) * (10/100)
+    live_tvl = live_total_value_locked(fund_through_proxy, token)
+    live_price_per_share = fund_through_proxy.underlyingUnit() * live_tvl // fund_through_proxy.totalSupply()
+    cached_price_per_share = fund_through_proxy.getPricePerShare()
+
+    assert fund_through_proxy.totalValueLocked() == live_tvl - unrealized_profit
+    assert cached_price_per_share <= live_price_per_share
+    # error is at most the yield accrued since the last hard work
+    assert live_price_per_share - cached_price_per_share <= fund_through_proxy.underlyingUnit() * unrealized_profit // fund_through_proxy.totalSupply() + 1
+
+def test_cached_balances_fall_back_to_live_when_stale(fund_through_proxy, accounts, token, profit_strategy_10, chain):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+
+    chain.sleep(3601)
+    chain.mine()
+
+    assert fund_through_proxy.totalValueLocked() == live_total_value_locked(fund_through_proxy, token)
+
+def test_refresh_strategy_balances(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+
+    tx = fund_through_proxy.refreshStrategyBalances({'from': accounts[0]})
+
+    expected_profit = (50/100 * 50000000) * (10/100)
+    assert tx.events["StrategyRewards"].values() == [profit_strategy_10, expected_profit, expected_profit * (500/10000)]
+    assert fund_through_proxy.getStrategy(profit_strategy_10)[3] == profit_strategy_10.investedUnderlyingBalance()
+    assert fund_through_proxy.totalValueLocked() == live_total_value_locked(fund_through_proxy, token)
+
+def test_refresh_strategy_balances_from_random_account(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+
+    with brownie.reverts("Not governance nor fund manager"):
+        fund_through_proxy.refreshStrategyBalances({'from': accounts[3]})
+
+def test_deposit_with_cached_balances(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+
+    token.approve(fund_through_proxy, 10000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(10000000, {'from': accounts[1]})
+
+    # minted against the cached value, which excludes the yield since the last hard work
+    assert fund_through_proxy.balanceOf(accounts[1]) == 50000000 + 10000000
+
+def test_withdrawal_with_cached_balances_updates_last_balance(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+
+    fund_through_proxy.withdraw(40000000, {'from': accounts[1]})
+
+    # the whole shortfall is pulled from the only strategy
+    assert token.balanceOf(accounts[1]) == 50000000 + 40000000
+    assert fund_through_proxy.getStrategy(profit_strategy_10)[3] == profit_strategy_10.investedUnderlyingBalance()
+    assert fund_through_proxy.totalValueLocked() == live_total_value_locked(fund_through_proxy, token)
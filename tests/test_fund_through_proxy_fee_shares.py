@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+pytestmark = pytest.mark.scenario("funded_two_strategies_with_profit")
+
+# 5% creator fee on 2500000 and 5000000 of profit, then 10% fund manager fee on the rest of the profit
+EXPECTED_CREATOR_FEES = 125000 + 250000
+EXPECTED_FUND_MANAGER_FEE = 712500
+TOTAL_AFTER_CREATOR_FEES = 15000000 + 27500000 + 15000000 - EXPECTED_CREATOR_FEES
+# 712500 * 50000000 / (57125000 - 712500), rounded down
+EXPECTED_FUND_MANAGER_SHARES = 631508
+
+def setup_fees(world, accounts, fees_in_shares):
+    fund_through_proxy = world.fund_through_proxy
+    fund_through_proxy.setPlatformRewards(accounts[5], {'from': world.governance})
+    fund_through_proxy.setFundManager(accounts[6], {'from': world.governance})
+    fund_through_proxy.setPerformanceFeeFund(1000, {'from': world.governance})
+    fund_through_proxy.setFeesInShares(fees_in_shares, {'from': world.governance})
+
+@pytest.mark.parametrize("fees_in_shares", [False, True])
+def test_fees_in_shares_value_matches_accrued_fees(world, accounts, fees_in_shares):
+    fund_through_proxy = world.fund_through_proxy
+    setup_fees(world, accounts, fees_in_shares)
+
+    fund_through_proxy.doHardWork({'from': world.governance})
+
+    # the recipient holds the fee either as accrued underlying or as shares worth it, rounded in favour of the holders
+    fund_manager_value = fund_through_proxy.accruedFees(accounts[6]) + fund_through_proxy.underlyingBalanceWithInvestmentForHolder(accounts[6])
+    holder_value = fund_through_proxy.underlyingBalanceWithInvestmentForHolder(world.holder)
+    assert EXPECTED_FUND_MANAGER_FEE - 2 <= fund_manager_value <= EXPECTED_FUND_MANAGER_FEE
+    assert TOTAL_AFTER_CREATOR_FEES - EXPECTED_FUND_MANAGER_FEE <= holder_value <= TOTAL_AFTER_CREATOR_FEES - EXPECTED_FUND_MANAGER_FEE + 1
+    assert fund_through_proxy.accruedFees(world.governance) == EXPECTED_CREATOR_FEES
+
+def test_hard_work_mints_fund_manager_fee_shares(world, accounts):
+    fund_through_proxy = world.fund_through_proxy
+    setup_fees(world, accounts, True)
+
+    tx = fund_through_proxy.doHardWork({'from': world.governance})
+
+    assert tx.events["FundManagerRewards"].values() == [7125000, EXPECTED_FUND_MANAGER_FEE]
+    assert tx.events["FeesMinted"].values() == [accounts[6], EXPECTED_FUND_MANAGER_FEE, EXPECTED_FUND_MANAGER_SHARES]
+    assert fund_through_proxy.balanceOf(accounts[6]) == EXPECTED_FUND_MANAGER_SHARES
+    assert fund_through_proxy.totalSupply() == 50000000 + EXPECTED_FUND_MANAGER_SHARES
+    # only the creator fees are set aside, the fund manager fee stays in the total value
+    assert fund_through_proxy.accruedFees(accounts[6]) == 0
+    assert fund_through_proxy.totalAccruedFees() == EXPECTED_CREATOR_FEES
+    assert fund_through_proxy.totalValueLocked() == TOTAL_AFTER_CREATOR_FEES
+
+def test_hard_work_mints_platform_fee_shares(world, accounts):
+    fund_through_proxy = world.fund_through_proxy
+    setup_fees(world, accounts, True)
+    fund_through_proxy.setPlatformFee(100, {'from': world.governance})
+    brownie.chain.sleep(30 * 86400)
+
+    tx = fund_through_proxy.doHardWork({'from': world.governance})
+
+    platform_fee = tx.events["PlatformRewards"]["platformFee"]
+    assert platform_fee > 0
+    fees = EXPECTED_FUND_MANAGER_FEE + platform_fee
+    shares = fees * 50000000 // (TOTAL_AFTER_CREATOR_FEES - fees)
+    fund_manager_shares = shares * EXPECTED_FUND_MANAGER_FEE // fees
+    assert [event.values() for event in tx.events["FeesMinted"]] == [
+        [accounts[6], EXPECTED_FUND_MANAGER_FEE, fund_manager_shares],
+        [accounts[5], platform_fee, shares - fund_manager_shares],
+    ]
+    assert platform_fee - 2 <= fund_through_proxy.underlyingBalanceWithInvestmentForHolder(accounts[5]) <= platform_fee
+    assert fund_through_proxy.accruedFees(accounts[5]) == 0
+    assert fund_through_proxy.totalAccruedFees() == EXPECTED_CREATOR_FEES
+
+def test_chunks_mint_fund_manager_fee_shares(world, accounts):
+    fund_through_proxy = world.fund_through_proxy
+    setup_fees(world, accounts, True)
+
+    first = fund_through_proxy.doHardWorkChunk(0, 1, {'from': world.governance})
+    last = fund_through_proxy.doHardWorkChunk(1, 2, {'from': world.governance})
+
+    assert "FeesMinted" not in first.events
+    assert last.events["FeesMinted"].values() == [accounts[6], EXPECTED_FUND_MANAGER_FEE, EXPECTED_FUND_MANAGER_SHARES]
+    assert fund_through_proxy.totalAccruedFees() == EXPECTED_CREATOR_FEES
+    assert fund_through_proxy.totalValueLocked() == TOTAL_AFTER_CREATOR_FEES
+
+def test_withdrawal_fee_accrued_with_fees_in_shares(world, accounts):
+    fund_through_proxy = world.fund_through_proxy
+    setup_fees(world, accounts, True)
+    fund_through_proxy.doHardWork({'from': world.governance})
+    fund_through_proxy.setWithdrawalFee(50, {'from': world.governance})
+
+    tx = fund_through_proxy.withdraw(10000000, {'from': world.holder})
+
+    assert fund_through_proxy.accruedFees(accounts[5]) == tx.events["Withdraw"]["fee"]
+    assert fund_through_proxy.totalAccruedFees() == EXPECTED_CREATOR_FEES + tx.events["Withdraw"]["fee"]
+
+def test_fees_in_shares_setter(world, accounts):
+    fund_through_proxy = world.fund_through_proxy
+    assert fund_through_proxy.feesInShares() == False
+
+    with brownie.reverts("Not governance"):
+        fund_through_proxy.setFeesInShares(True, {'from': accounts[1]})
+    fund_through_proxy.setFeesInShares(True, {'from': world.governance})
+
+    assert fund_through_proxy.feesInShares() == True
+    assert fund_through_proxy.shouldRebalance() == False
+    assert fund_through_proxy.preserveStrategyOrder() == False
@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+pytestmark = pytest.mark.scenario("funded_two_strategies_with_profit")
+
+# 5% creator fee on 2500000 and 5000000 of profit
+EXPECTED_CREATOR_FEES = 125000 + 250000
+TOTAL_BEFORE_FEES = 15000000 + 27500000 + 15000000
+
+def test_hard_work_accrues_fees(world):
+    fund_through_proxy, token = world.fund_through_proxy, world.token
+    fund_through_proxy.doHardWork({'from': world.governance})
+
+    assert fund_through_proxy.accruedFees(world.governance) == EXPECTED_CREATOR_FEES
+    assert fund_through_proxy.totalAccruedFees() == EXPECTED_CREATOR_FEES
+    assert token.balanceOf(fund_through_proxy) == 15000000
+
+def test_accrued_fees_excluded_from_value(world):
+    fund_through_proxy = world.fund_through_proxy
+    fund_through_proxy.doHardWork({'from': world.governance})
+
+    assert fund_through_proxy.totalValueLocked() == TOTAL_BEFORE_FEES - EXPECTED_CREATOR_FEES
+    assert fund_through_proxy.getPricePerShare() == fund_through_proxy.underlyingUnit() * (TOTAL_BEFORE_FEES - EXPECTED_CREATOR_FEES) // fund_through_proxy.totalSupply()
+
+def test_accrued_fees_not_invested(world):
+    fund_through_proxy, token = world.fund_through_proxy, world.token
+    fund_through_proxy.doHardWork({'from': world.governance})
+    fund_through_proxy.setShouldRebalance(True, {'from': world.governance})
+    fund_through_proxy.doHardWork({'from': world.governance})
+
+    assert fund_through_proxy.totalAccounted() == TOTAL_BEFORE_FEES - EXPECTED_CREATOR_FEES
+    assert token.balanceOf(fund_through_proxy) >= EXPECTED_CREATOR_FEES
+
+def test_claim_fees(world, accounts):
+    fund_through_proxy, token = world.fund_through_proxy, world.token
+    fund_through_proxy.doHardWork({'from': world.governance})
+    initial_balance = token.balanceOf(world.governance)
+    total_value_locked = fund_through_proxy.totalValueLocked()
+
+    tx = fund_through_proxy.claimFees(world.governance, {'from': accounts[3]})
+
+    assert tx.events["FeesClaimed"].values() == [world.governance, EXPECTED_CREATOR_FEES]
+    assert token.balanceOf(world.governance) == initial_balance + EXPECTED_CREATOR_FEES
+    assert fund_through_proxy.accruedFees(world.governance) == 0
+    assert fund_through_proxy.totalAccruedFees() == 0
+    assert fund_through_proxy.totalValueLocked() == total_value_locked
+
+def test_claim_fees_without_accrued_fees(world, accounts):
+    tx = world.fund_through_proxy.claimFees(accounts[7], {'from': accounts[7]})
+
+    assert "FeesClaimed" not in tx.events
+    assert world.token.balanceOf(accounts[7]) == 0
+
+def test_withdrawal_fee_accrued(world, accounts):
+    fund_through_proxy, token = world.fund_through_proxy, world.token
+    fund_through_proxy.doHardWork({'from': world.governance})
+    fund_through_proxy.setWithdrawalFee(50, {'from': world.governance})
+    fund_through_proxy.setPlatformRewards(accounts[5], {'from': world.governance})
+
+    tx = fund_through_proxy.withdraw(10000000, {'from': world.holder})
+
+    expected_fee = (TOTAL_BEFORE_FEES - EXPECTED_CREATOR_FEES) // 5 * 50 // 10000
+    assert tx.events["Withdraw"]["fee"] == expected_fee
+    assert token.balanceOf(accounts[5]) == 0
+    assert fund_through_proxy.accruedFees(accounts[5]) == expected_fee
+    assert fund_through_proxy.totalAccruedFees() == EXPECTED_CREATOR_FEES + expected_fee
+
+def test_claim_fees_batch(world, accounts):
+    fund_through_proxy, token = world.fund_through_proxy, world.token
+    fund_through_proxy.doHardWork({'from': world.governance})
+    fund_through_proxy.setWithdrawalFee(50, {'from': world.governance})
+    fund_through_proxy.setPlatformRewards(accounts[5], {'from': world.governance})
+    tx = fund_through_proxy.withdraw(10000000, {'from': world.holder})
+    withdrawal_fee = tx.events["Withdraw"]["fee"]
+
+    # a recipient given twice is paid once
+    tx = fund_through_proxy.claimFeesBatch([world.governance, accounts[5], world.governance], {'from': accounts[3]})
+
+    assert [event.values() for event in tx.events["FeesClaimed"]] == [[world.governance, EXPECTED_CREATOR_FEES], [accounts[5], withdrawal_fee]]
+    assert token.balanceOf(accounts[5]) == withdrawal_fee
+    assert fund_through_proxy.totalAccruedFees() == 0
@@ -99,7 +99,7 @@ def test_hard_work_single_strategy_creator_fee_to_account(fund_through_proxy, ac
     tx = fund_through_proxy.doHardWork({'from': accounts[0]})   ## zero profit for first hard work, run again to test
     expected_profit = (50/100 * 50000000) * (10/100)
     expected_strategy_creator_fee = expected_profit * (500/10000)
-    assert token.balanceOf(accounts[0]) == expected_strategy_creator_fee
+    assert fund_through_proxy.accruedFees(accounts[0]) == expected_strategy_creator_fee
 
 def test_hard_work_single_strategy_creator_fee_fund_fee_to_account(fund_through_proxy, accounts, token, profit_strategy_10):
     token.mint(accounts[1], 100000000, {'from': accounts[0]})
@@ -120,7 +120,7 @@ def test_hard_work_single_strategy_creator_fee_fund_fee_to_account(fund_through_
     expected_profit = (50/100 * 50000000) * (10/100)
     expected_strategy_creator_fee = expected_profit * (500/10000)
     expected_fund_performance_fee = (expected_profit - expected_strategy_creator_fee) * (500/10000)
-    assert token.balanceOf(accounts[0]) == expected_strategy_creator_fee + expected_fund_performance_fee
+    assert fund_through_proxy.accruedFees(accounts[0]) == expected_strategy_creator_fee + expected_fund_performance_fee
     assert tx.events["FundManagerRewards"].values() == [expected_profit - expected_strategy_creator_fee, expected_fund_performance_fee]
 
 def test_hard_work_single_strategy_creator_fee_fund_fee_platform_fee_to_account(fund_through_proxy, accounts, token, profit_strategy_10):
@@ -144,7 +144,7 @@ def test_hard_work_single_strategy_creator_fee_fund_fee_platform_fee_to_account(
     expected_strategy_creator_fee = expected_profit * (500/10000)
     expected_fund_performance_fee = (expected_profit - expected_strategy_creator_fee) * (500/10000)
     expected_platform_fee = 0   ## TODO: Need to figure out a way to test this as block.timestamp doesn't increase much.
-    assert token.balanceOf(accounts[0]) == expected_strategy_creator_fee + expected_fund_performance_fee + expected_platform_fee
+    assert fund_through_proxy.accruedFees(accounts[0]) == expected_strategy_creator_fee + expected_fund_performance_fee + expected_platform_fee
     # assert tx.events["PlatformRewards"].values() == [50/100 * 50000000, 0, 0]
 
 
@@ -168,8 +168,24 @@ def test_hard_work_single_strategy_creator_fee_fund_fee_to_new_rewards_account(f
     expected_profit = (50/100 * 50000000) * (10/100)
     expected_strategy_creator_fee = expected_profit * (500/10000)
     expected_fund_performance_fee = (expected_profit - expected_strategy_creator_fee) * (500/10000)
-    assert token.balanceOf(accounts[0]) == expected_strategy_creator_fee
-    assert token.balanceOf(accounts[5]) == expected_fund_performance_fee
+    assert fund_through_proxy.accruedFees(accounts[0]) == expected_strategy_creator_fee
+    assert fund_through_proxy.accruedFees(accounts[5]) == expected_fund_performance_fee
+
+
+def test_fees_exceeding_underlying_in_fund(fund_through_proxy, token, accounts, profit_strategy_80):
+    token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), profit_strategy_80, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_80, 9000, 1000, {'from': accounts[0]})
+    token.mint(accounts[1], 10000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 10000, {'from': accounts[1]})
+    fund_through_proxy.deposit(10000, {'from': accounts[1]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    profit_strategy_80.investAllUnderlying({'from': accounts[0]})
+    fund_through_proxy.setPerformanceFeeFund(1000, {'from': accounts[0]})
+    fund_through_proxy.setFundManager(accounts[6], {'from': accounts[0]})
+
+    # 720 of creator fee and 648 of fund manager fee, with 1000 kept in the fund
+    with brownie.reverts("Fees exceed underlying in fund"):
+        fund_through_proxy.doHardWork({'from': accounts[0]})
 
 
 def test_rebalance_single_strategy_weight_change(fund_through_proxy, accounts, token, profit_strategy_10):
@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+def setup_three_strategies(fund_through_proxy, accounts, token, strategies):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+
+    for strategy, weightage in zip(strategies, [3000, 2000, 1000]):
+        token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), strategy, {'from': accounts[0]})
+        fund_through_proxy.addStrategy(strategy, weightage, 500, {'from': accounts[0]})
+
+def test_chunks_rebalance(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_three_strategies(fund_through_proxy, accounts, token, strategies)
+
+    tx = fund_through_proxy.doHardWorkChunk(0, 2, {'from': accounts[0]})
+
+    assert "HardWorkDone" not in tx.events
+    assert fund_through_proxy.hardWorkCursor() == 2
+    assert fund_through_proxy.shouldRebalance() == False
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [15000000, 10000000, 0]
+    assert fund_through_proxy.totalValueLocked() == 50000000
+
+    tx = fund_through_proxy.doHardWorkChunk(2, 3, {'from': accounts[0]})
+
+    assert tx.events["HardWorkDone"].values() == [50000000, fund_through_proxy.underlyingUnit()]
+    assert fund_through_proxy.hardWorkCursor() == 0
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [15000000, 10000000, 5000000]
+    assert fund_through_proxy.totalAccounted() == 50000000
+    assert fund_through_proxy.totalInvested() == 30000000
+    assert fund_through_proxy.lastHardworkTimestamp() == tx.timestamp
+
+def test_chunks_invest_new_deposits(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_three_strategies(fund_through_proxy, accounts, token, strategies)
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+
+    fund_through_proxy.doHardWorkChunk(0, 1, {'from': accounts[0]})
+    fund_through_proxy.doHardWorkChunk(1, 3, {'from': accounts[0]})
+
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [30000000, 20000000, 10000000]
+    assert fund_through_proxy.totalAccounted() == 100000000
+    assert fund_through_proxy.totalInvested() == 60000000
+
+def test_chunks_accrue_fees(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_three_strategies(fund_through_proxy, accounts, token, strategies)
+    fund_through_proxy.setPerformanceFeeFund(500, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    for strategy in strategies:
+        strategy.investAllUnderlying({'from': accounts[0]})
+
+    first = fund_through_proxy.doHardWorkChunk(0, 1, {'from': accounts[0]})
+    last = fund_through_proxy.doHardWorkChunk(1, 3, {'from': accounts[0]})
+
+    expected_profits = [1500000, 5000000, 4000000]
+    expected_strategy_creator_fees = [profit * 500 // 10000 for profit in expected_profits]
+    expected_profit_to_fund = sum(expected_profits) - sum(expected_strategy_creator_fees)
+    expected_fund_manager_fee = expected_profit_to_fund * 500 // 10000
+    assert first.events["StrategyRewards"].values() == [profit_strategy_10, expected_profits[0], expected_strategy_creator_fees[0]]
+    assert "FundManagerRewards" not in first.events
+    assert last.events["FundManagerRewards"].values() == [expected_profit_to_fund, expected_fund_manager_fee]
+    assert fund_through_proxy.accruedFees(accounts[0]) == sum(expected_strategy_creator_fees) + expected_fund_manager_fee
+    assert fund_through_proxy.totalValueLocked() == 50000000 + expected_profit_to_fund - expected_fund_manager_fee
+
+def test_chunk_rebalance_short_of_underlying(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_three_strategies(fund_through_proxy, accounts, token, strategies)
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    fund_through_proxy.updateStrategyWeightage(profit_strategy_50, 500, {'from': accounts[0]})
+    fund_through_proxy.updateStrategyWeightage(profit_strategy_80, 500, {'from': accounts[0]})
+    fund_through_proxy.updateStrategyWeightage(profit_strategy_10, 8000, {'from': accounts[0]})
+
+    # the first strategy needs 25000000 while the fund holds 20000000, the rest comes back from the later strategies
+    fund_through_proxy.doHardWorkChunk(0, 1, {'from': accounts[0]})
+    fund_through_proxy.doHardWorkChunk(1, 3, {'from': accounts[0]})
+
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [35000000, 2500000, 2500000]
+    assert fund_through_proxy.totalAccounted() == 45000000
+    assert fund_through_proxy.totalInvested() == 40000000
+    assert fund_through_proxy.totalValueLocked() == 50000000
+
+    # the amount left in the fund is invested by the next hard work
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    assert profit_strategy_10.investedUnderlyingBalance() == 35000000 + 4000000
+
+def test_chunk_must_follow_cursor(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    setup_three_strategies(fund_through_proxy, accounts, token, [profit_strategy_10, profit_strategy_50, profit_strategy_80])
+
+    with brownie.reverts("Chunk must start at the hard work cursor"):
+        fund_through_proxy.doHardWorkChunk(1, 3, {'from': accounts[0]})
+    with brownie.reverts("Invalid chunk"):
+        fund_through_proxy.doHardWorkChunk(0, 0, {'from': accounts[0]})
+    with brownie.reverts("Invalid chunk"):
+        fund_through_proxy.doHardWorkChunk(0, 4, {'from': accounts[0]})
+
+    fund_through_proxy.doHardWorkChunk(0, 1, {'from': accounts[0]})
+    with brownie.reverts("Chunk must start at the hard work cursor"):
+        fund_through_proxy.doHardWorkChunk(0, 3, {'from': accounts[0]})
+
+def test_chunk_blocks_fund_changes(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    setup_three_strategies(fund_through_proxy, accounts, token, [profit_strategy_10, profit_strategy_50, profit_strategy_80])
+    fund_through_proxy.doHardWorkChunk(0, 1, {'from': accounts[0]})
+
+    with brownie.reverts("Hard work in progress"):
+        fund_through_proxy.deposit(10000000, {'from': accounts[1]})
+    with brownie.reverts("Hard work in progress"):
+        fund_through_proxy.withdraw(10000000, {'from': accounts[1]})
+    with brownie.reverts("Hard work in progress"):
+        fund_through_proxy.doHardWork({'from': accounts[0]})
+    with brownie.reverts("Hard work in progress"):
+        fund_through_proxy.updateStrategyWeightage(profit_strategy_50, 1000, {'from': accounts[0]})
+    with brownie.reverts("Hard work in progress"):
+        fund_through_proxy.removeStrategy(profit_strategy_80, {'from': accounts[0]})
+
+    fund_through_proxy.doHardWorkChunk(1, 3, {'from': accounts[0]})
+    fund_through_proxy.deposit(10000000, {'from': accounts[1]})
+    fund_through_proxy.withdraw(10000000, {'from': accounts[1]})
+
+def test_chunk_by_non_governance(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    setup_three_strategies(fund_through_proxy, accounts, token, [profit_strategy_10, profit_strategy_50, profit_strategy_80])
+
+    with brownie.reverts("Not governance nor fund manager"):
+        fund_through_proxy.doHardWorkChunk(0, 3, {'from': accounts[1]})
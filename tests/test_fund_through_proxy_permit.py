@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+from eip712.messages import EIP712Message
+
+DEPOSIT_AMOUNT = 50000000
+
+@pytest.fixture(scope="module")
+def fund_with_permit_token(fund_factory, fund, permit_token, accounts):
+    tx = fund_factory.createFund(fund, permit_token, "Mudrex Permit Fund", "MDXPF", {'from': accounts[0]})
+    return brownie.Fund.at(tx.new_contracts[0])
+
+@pytest.fixture
+def signer(accounts):
+    # permits are signed with the private key, which only local accounts expose
+    signer = accounts.add()
+    accounts[0].transfer(signer, "1 ether")
+    return signer
+
+def permit_message(contract, chain_id, **values):
+    class Permit(EIP712Message):
+        _name_: "string" = contract.name()
+        _version_: "string" = "1"
+        _chainId_: "uint256" = chain_id
+        _verifyingContract_: "address" = contract.address
+
+        owner: "address"
+        spender: "address"
+        value: "uint256"
+        nonce: "uint256"
+        deadline: "uint256"
+    return Permit(**values)
+
+def sign_permit(contract, owner, spender, value, deadline, nonce=None):
+    values = dict(owner=owner.address, spender=str(spender), value=value,
+        nonce=contract.nonces(owner) if nonce is None else nonce, deadline=deadline)
+    # older ganache versions return 1 for the chainid opcode whatever the network
+    for chain_id in [brownie.chain.id, 1]:
+        message = permit_message(contract, chain_id, **values)
+        if contract.DOMAIN_SEPARATOR() == "0x" + bytes(message.signable_message.header).hex():
+            signed = owner.sign_message(message)
+            return signed.v, signed.r, signed.s
+    raise ValueError("Domain separator of the contract does not match")
+
+def deposit_with_permit(fund, token, signer, amount):
+    token.mint(signer, amount, {'from': brownie.accounts[0]})
+    deadline = brownie.chain.time() + 3600
+    v, r, s = sign_permit(token, signer, fund, amount, deadline)
+    return fund.depositWithPermit(amount, deadline, v, r, s, {'from': signer})
+
+def test_deposit_with_permit(fund_with_permit_token, permit_token, signer):
+    tx = deposit_with_permit(fund_with_permit_token, permit_token, signer, DEPOSIT_AMOUNT)
+
+    assert tx.events["Deposit"].values() == [signer, DEPOSIT_AMOUNT]
+    assert fund_with_permit_token.balanceOf(signer) == DEPOSIT_AMOUNT
+    assert permit_token.balanceOf(fund_with_permit_token) == DEPOSIT_AMOUNT
+    assert permit_token.nonces(signer) == 1
+    assert permit_token.allowance(signer, fund_with_permit_token) == 0
+
+def test_deposit_with_front_run_permit(fund_with_permit_token, permit_token, signer, accounts):
+    permit_token.mint(signer, DEPOSIT_AMOUNT, {'from': accounts[0]})
+    deadline = brownie.chain.time() + 3600
+    v, r, s = sign_permit(permit_token, signer, fund_with_permit_token, DEPOSIT_AMOUNT, deadline)
+
+    # the permit is copied from the pending deposit and submitted first, which uses its nonce
+    permit_token.permit(signer, fund_with_permit_token, DEPOSIT_AMOUNT, deadline, v, r, s, {'from': accounts[3]})
+    tx = fund_with_permit_token.depositWithPermit(DEPOSIT_AMOUNT, deadline, v, r, s, {'from': signer})
+
+    assert tx.events["Deposit"].values() == [signer, DEPOSIT_AMOUNT]
+    assert fund_with_permit_token.balanceOf(signer) == DEPOSIT_AMOUNT
+    assert permit_token.nonces(signer) == 1
+    assert permit_token.allowance(signer, fund_with_permit_token) == 0
+
+def test_deposit_with_expired_permit(fund_with_permit_token, permit_token, signer):
+    permit_token.mint(signer, DEPOSIT_AMOUNT, {'from': brownie.accounts[0]})
+    deadline = brownie.chain.time() - 1
+    v, r, s = sign_permit(permit_token, signer, fund_with_permit_token, DEPOSIT_AMOUNT, deadline)
+
+    with brownie.reverts("ERC20Permit: expired deadline"):
+        fund_with_permit_token.depositWithPermit(DEPOSIT_AMOUNT, deadline, v, r, s, {'from': signer})
+
+def test_deposit_with_permit_of_another_holder(fund_with_permit_token, permit_token, signer, accounts):
+    permit_token.mint(signer, DEPOSIT_AMOUNT, {'from': accounts[0]})
+    deadline = brownie.chain.time() + 3600
+    v, r, s = sign_permit(permit_token, signer, fund_with_permit_token, DEPOSIT_AMOUNT, deadline)
+
+    # the permit is checked against the sender of the deposit
+    with brownie.reverts("ERC20Permit: invalid signature"):
+        fund_with_permit_token.depositWithPermit(DEPOSIT_AMOUNT, deadline, v, r, s, {'from': accounts[1]})
+
+def test_share_permit(fund_with_permit_token, permit_token, signer, accounts):
+    deposit_with_permit(fund_with_permit_token, permit_token, signer, DEPOSIT_AMOUNT)
+    deadline = brownie.chain.time() + 3600
+    v, r, s = sign_permit(fund_with_permit_token, signer, accounts[2], DEPOSIT_AMOUNT // 2, deadline)
+
+    # anyone can submit the permit
+    fund_with_permit_token.permit(signer, accounts[2], DEPOSIT_AMOUNT // 2, deadline, v, r, s, {'from': accounts[3]})
+
+    assert fund_with_permit_token.allowance(signer, accounts[2]) == DEPOSIT_AMOUNT // 2
+    assert fund_with_permit_token.nonces(signer) == 1
+    fund_with_permit_token.transferFrom(signer, accounts[2], DEPOSIT_AMOUNT // 2, {'from': accounts[2]})
+    assert fund_with_permit_token.balanceOf(accounts[2]) == DEPOSIT_AMOUNT // 2
+
+    with brownie.reverts("Invalid permit signature"):
+        fund_with_permit_token.permit(signer, accounts[2], DEPOSIT_AMOUNT // 2, deadline, v, r, s, {'from': accounts[3]})
+
+def test_share_permit_checks(fund_with_permit_token, fund_through_proxy, signer, accounts):
+    deadline = brownie.chain.time() + 3600
+    v, r, s = sign_permit(fund_with_permit_token, signer, accounts[2], 100, deadline)
+
+    with brownie.reverts("Invalid permit signature"):
+        fund_with_permit_token.permit(signer, accounts[2], 101, deadline, v, r, s, {'from': accounts[3]})
+    with brownie.reverts("Invalid permit signature"):
+        fund_with_permit_token.permit(accounts[1], accounts[2], 100, deadline, v, r, s, {'from': accounts[3]})
+
+    expired = brownie.chain.time() - 1
+    v, r, s = sign_permit(fund_with_permit_token, signer, accounts[2], 100, expired)
+    with brownie.reverts("Permit expired"):
+        fund_with_permit_token.permit(signer, accounts[2], 100, expired, v, r, s, {'from': accounts[3]})
+
+    # every fund signs for its own address
+    assert fund_with_permit_token.DOMAIN_SEPARATOR() != fund_through_proxy.DOMAIN_SEPARATOR()
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+SECS_PER_YEAR = 31556952
+APY_PRECISION = 10**18
+PPS_CHECKPOINT_CAPACITY = 256
+
+def state_slot():
+    return int.from_bytes(brownie.web3.keccak(text="eip1967.mesh.finance.fundStorage.state"), "big") - 1
+
+def setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+    token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), profit_strategy_10, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    return fund_through_proxy.doHardWork({'from': accounts[0]})
+
+def expected_apy(start, end):
+    return (end[1] - start[1]) * APY_PRECISION * SECS_PER_YEAR // start[1] // (end[0] - start[0])
+
+def test_hard_work_records_checkpoint(fund_through_proxy, accounts, token, profit_strategy_10):
+    first = setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    brownie.chain.sleep(86400)
+    profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+    second = fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    unit = fund_through_proxy.underlyingUnit()
+    # 10% on the 25000000 in the strategy, less the strategy creator fee
+    expected_tvl = 50000000 + 2500000 - 125000
+    checkpoints = fund_through_proxy.getPpsCheckpoints(0, 10)
+    assert checkpoints == [
+        (first.timestamp, unit, 50000000),
+        (second.timestamp, unit * expected_tvl // 50000000, expected_tvl),
+    ]
+    assert second.events["HardWorkDone"].values() == [expected_tvl, unit * expected_tvl // 50000000]
+    assert fund_through_proxy.getPricePerShare() == checkpoints[1][1]
+    assert fund_through_proxy.ppsCheckpointCount() == 2
+    assert fund_through_proxy.getPpsCheckpoints(1, 10) == checkpoints[1:]
+    assert fund_through_proxy.getPpsCheckpoints(2, 10) == []
+    # the count shares the state slot with the last hard work timestamp
+    state = int.from_bytes(brownie.web3.eth.get_storage_at(fund_through_proxy.address, state_slot()), "big")
+    assert state >> 192 & (2**32 - 1) == 2
+
+    with brownie.reverts("Checkpoint out of range"):
+        fund_through_proxy.getPpsCheckpoints(3, 1)
+
+def test_apy_over_windows(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    for _ in range(3):
+        brownie.chain.sleep(86400)
+        profit_strategy_10.investAllUnderlying({'from': accounts[0]})
+        fund_through_proxy.doHardWork({'from': accounts[0]})
+    checkpoints = fund_through_proxy.getPpsCheckpoints(0, 10)
+
+    assert fund_through_proxy.apyBetween(checkpoints[0][0], checkpoints[3][0]) == (expected_apy(checkpoints[0], checkpoints[3]), checkpoints[0][0], checkpoints[3][0])
+    # the window snaps to the last checkpoints at or before its bounds
+    assert fund_through_proxy.apyBetween(checkpoints[1][0] + 100, checkpoints[3][0] - 1) == (expected_apy(checkpoints[1], checkpoints[2]), checkpoints[1][0], checkpoints[2][0])
+    # a window longer than the history starts at the oldest checkpoint
+    assert fund_through_proxy.trailingApy(10 * 86400) == (expected_apy(checkpoints[0], checkpoints[3]), checkpoints[0][0], checkpoints[3][0])
+    assert fund_through_proxy.trailingApy(86400) == (expected_apy(checkpoints[2], checkpoints[3]), checkpoints[2][0], checkpoints[3][0])
+    assert fund_through_proxy.trailingApy(86400 + 3600)[1:] == (checkpoints[1][0], checkpoints[3][0])
+
+def test_apy_needs_two_checkpoints(fund_through_proxy, accounts, token, profit_strategy_10):
+    with brownie.reverts("Not enough checkpoints in window"):
+        fund_through_proxy.trailingApy(86400)
+    first = setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+
+    with brownie.reverts("Not enough checkpoints in window"):
+        fund_through_proxy.trailingApy(86400)
+    with brownie.reverts("Invalid window"):
+        fund_through_proxy.apyBetween(first.timestamp, first.timestamp)
+
+def test_chunked_hard_work_records_checkpoint(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), profit_strategy_50, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 500, {'from': accounts[0]})
+
+    fund_through_proxy.doHardWorkChunk(0, 1, {'from': accounts[0]})
+    assert fund_through_proxy.ppsCheckpointCount() == 1
+    tx = fund_through_proxy.doHardWorkChunk(1, 2, {'from': accounts[0]})
+
+    assert fund_through_proxy.ppsCheckpointCount() == 2
+    event = tx.events["HardWorkDone"]
+    assert fund_through_proxy.getPpsCheckpoints(1, 1) == [(tx.timestamp, event["pricePerShare"], event["totalValueLocked"])]
+
+def test_checkpoints_wrap_around(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    timestamps = []
+    for _ in range(PPS_CHECKPOINT_CAPACITY + 1):
+        brownie.chain.sleep(3600)
+        timestamps.append(fund_through_proxy.doHardWork({'from': accounts[0]}).timestamp)
+
+    checkpoints = fund_through_proxy.getPpsCheckpoints(0, PPS_CHECKPOINT_CAPACITY)
+    assert fund_through_proxy.ppsCheckpointCount() == PPS_CHECKPOINT_CAPACITY
+    # the first two checkpoints were overwritten
+    assert [checkpoint[0] for checkpoint in checkpoints] == timestamps[1:]
+    assert fund_through_proxy.trailingApy(10**9)[1:] == (timestamps[1], timestamps[-1])
@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+def setup_queued_fund(fund_through_proxy, accounts, token, profit_strategy_10):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.mint(accounts[2], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[2]})
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.setQueuedMode(True, {'from': accounts[0]})
+
+def setup_settled_deposit(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_queued_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    fund_through_proxy.requestDeposit(50000000, {'from': accounts[1]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    fund_through_proxy.claim({'from': accounts[1]})
+
+def test_queued_mode_disabled_by_default(fund_through_proxy):
+    assert fund_through_proxy.queuedMode() == False
+    assert fund_through_proxy.currentEpoch() == 0
+
+def test_set_queued_mode_from_random_account(fund_through_proxy, accounts):
+    with brownie.reverts("Not governance nor fund manager"):
+        fund_through_proxy.setQueuedMode(True, {'from': accounts[3]})
+
+def test_request_deposit_without_queued_mode(fund_through_proxy, accounts, token):
+    token.mint(accounts[1], 100, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 50, {'from': accounts[1]})
+
+    with brownie.reverts("Fund is not in queued mode"):
+        fund_through_proxy.requestDeposit(50, {'from': accounts[1]})
+
+def test_direct_deposit_and_withdrawal_in_queued_mode(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_queued_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+
+    with brownie.reverts("Fund is in queued mode"):
+        fund_through_proxy.deposit(50, {'from': accounts[1]})
+    with brownie.reverts("Fund is in queued mode"):
+        fund_through_proxy.withdraw(50, {'from': accounts[1]})
+
+def test_request_deposit(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_queued_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    tx = fund_through_proxy.requestDeposit(50000000, {'from': accounts[1]})
+
+    assert tx.events["DepositRequested"].values() == [accounts[1], 50000000, 0]
+    assert token.balanceOf(fund_through_proxy) == 50000000
+    assert fund_through_proxy.balanceOf(accounts[1]) == 0
+    assert fund_through_proxy.totalValueLocked() == 0   ## queued deposits are not part of the fund before settlement
+    assert fund_through_proxy.pendingRequests(accounts[1]) == [0, 50000000, 0]
+    assert fund_through_proxy.epochs(0)[0] == 50000000
+
+def test_claim_before_settlement(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_queued_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    fund_through_proxy.requestDeposit(50000000, {'from': accounts[1]})
+
+    with brownie.reverts("Nothing to claim"):
+        fund_through_proxy.claim({'from': accounts[1]})
+
+def test_hard_work_settles_deposits(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_queued_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    fund_through_proxy.requestDeposit(50000000, {'from': accounts[1]})
+    fund_through_proxy.requestDeposit(25000000, {'from': accounts[2]})
+
+    tx = fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    assert tx.events["EpochSettled"].values() == [0, fund_through_proxy.underlyingUnit(), 75000000, 0]
+    assert fund_through_proxy.currentEpoch() == 1
+    assert fund_through_proxy.totalValueLocked() == 75000000
+    assert profit_strategy_10.investedUnderlyingBalance() == 50/100 * 75000000
+
+    tx = fund_through_proxy.claim({'from': accounts[1]})
+    assert tx.events["Claim"].values() == [accounts[1], 50000000, 0, 0]
+    fund_through_proxy.claim({'from': accounts[2]})
+
+    assert fund_through_proxy.balanceOf(accounts[1]) == 50000000
+    assert fund_through_proxy.balanceOf(accounts[2]) == 25000000
+    assert fund_through_proxy.balanceOf(fund_through_proxy) == 0
+
+def test_request_withdraw_escrows_shares(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_settled_deposit(fund_through_proxy, accounts, token, profit_strategy_10)
+    tx = fund_through_proxy.requestWithdraw(20000000, {'from': accounts[1]})
+
+    assert tx.events["WithdrawRequested"].values() == [accounts[1], 20000000, 1]
+    assert fund_through_proxy.balanceOf(accounts[1]) == 30000000
+    assert fund_through_proxy.balanceOf(fund_through_proxy) == 20000000
+
+def test_request_withdraw_more_than_balance(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_settled_deposit(fund_through_proxy, accounts, token, profit_strategy_10)
+
+    with brownie.reverts("ERC20: transfer amount exceeds balance"):
+        fund_through_proxy.requestWithdraw(60000000, {'from': accounts[1]})
+
+def test_withdrawals_netted_against_deposits(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_settled_deposit(fund_through_proxy, accounts, token, profit_strategy_10)
+    assert profit_strategy_10.investedUnderlyingBalance() == 25000000
+
+    fund_through_proxy.requestWithdraw(20000000, {'from': accounts[1]})
+    fund_through_proxy.requestDeposit(30000000, {'from': accounts[2]})
+    tx = fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    assert tx.events["EpochSettled"].values() == [1, fund_through_proxy.underlyingUnit(), 30000000, 20000000]
+    # the withdrawal is covered by the fund and the new deposits, the strategy only receives new investment
+    assert profit_strategy_10.investedUnderlyingBalance() == 25000000 + 50/100 * 10000000
+
+    fund_through_proxy.claim({'from': accounts[1]})
+    fund_through_proxy.claim({'from': accounts[2]})
+
+    assert token.balanceOf(accounts[1]) == 50000000 + 20000000
+    assert fund_through_proxy.balanceOf(accounts[1]) == 30000000
+    assert fund_through_proxy.balanceOf(accounts[2]) == 30000000
+    assert fund_through_proxy.totalValueLocked() == 60000000
+
+def test_withdrawal_shortfall_pulled_from_strategies(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_settled_deposit(fund_through_proxy, accounts, token, profit_strategy_10)
+
+    fund_through_proxy.requestWithdraw(40000000, {'from': accounts[1]})
+    tx = fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    assert tx.events["EpochSettled"].values() == [1, fund_through_proxy.underlyingUnit(), 0, 40000000]
+
+    fund_through_proxy.claim({'from': accounts[1]})
+
+    assert token.balanceOf(accounts[1]) == 50000000 + 40000000
+    assert fund_through_proxy.totalValueLocked() == 10000000
+
+def test_claim_with_withdrawal_fee(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_settled_deposit(fund_through_proxy, accounts, token, profit_strategy_10)
+    fund_through_proxy.setWithdrawalFee(50, {'from': accounts[0]})
+    fund_through_proxy.setPlatformRewards(accounts[5], {'from': accounts[0]})
+
+    fund_through_proxy.requestWithdraw(10000000, {'from': accounts[1]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    tx = fund_through_proxy.claim({'from': accounts[1]})
+
+    expected_fee = 50 * 10000000/10000
+    assert tx.events["Claim"].values() == [accounts[1], 0, 10000000 - expected_fee, expected_fee]
+    assert fund_through_proxy.accruedFees(accounts[5]) == expected_fee
+
+def test_new_request_claims_settled_request(fund_through_proxy, accounts, token, profit_strategy_10):
+    setup_queued_fund(fund_through_proxy, accounts, token, profit_strategy_10)
+    fund_through_proxy.requestDeposit(50000000, {'from': accounts[1]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    fund_through_proxy.requestDeposit(10000000, {'from': accounts[1]})
+
+    assert fund_through_proxy.balanceOf(accounts[1]) == 50000000
+    assert fund_through_proxy.pendingRequests(accounts[1]) == [1, 10000000, 0]
+
+def test_sweep_queued_shares(fund_through_proxy, accounts):
+    with brownie.reverts("can not sweep queued shares"):
+        fund_through_proxy.sweep(fund_through_proxy, accounts[0], {'from': accounts[0]})
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+def setup_drifted_strategies(fund_through_proxy, accounts, token, strategies):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+
+    for strategy, weightage in zip(strategies, [3000, 2000, 1000]):
+        token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), strategy, {'from': accounts[0]})
+        fund_through_proxy.addStrategy(strategy, weightage, 500, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    # 10% on the first strategy, 16500000 against a target of 15427500 once the creator fee is accrued
+    strategies[0].investAllUnderlying({'from': accounts[0]})
+    fund_through_proxy.setShouldRebalance(True, {'from': accounts[0]})
+
+def test_rebalance_skips_strategies_within_band(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_drifted_strategies(fund_through_proxy, accounts, token, strategies)
+    fund_through_proxy.setRebalanceBand(500, 0, {'from': accounts[0]})
+
+    tx = fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    # the first strategy drifted 7% from its target, the others 2.85%
+    assert "InvestInStrategy" not in tx.events
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [15427500, 10000000, 5000000]
+    assert [fund_through_proxy.getStrategy(strategy)[3] for strategy in strategies] == [15427500, 10000000, 5000000]
+    assert fund_through_proxy.totalAccounted() == 51425000
+    assert fund_through_proxy.totalInvested() == 30427500
+    assert fund_through_proxy.totalValueLocked() == 51425000
+
+def test_rebalance_without_band_moves_every_strategy(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_drifted_strategies(fund_through_proxy, accounts, token, strategies)
+
+    tx = fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    assert [event["strategy"] for event in tx.events["InvestInStrategy"]] == [profit_strategy_50, profit_strategy_80]
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [15427500, 10285000, 5142500]
+    assert fund_through_proxy.totalInvested() == 30855000
+
+def test_strategy_band_overrides_fund_band(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_drifted_strategies(fund_through_proxy, accounts, token, strategies)
+    fund_through_proxy.setRebalanceBand(500, 0, {'from': accounts[0]})
+    fund_through_proxy.setStrategyRebalanceBand(profit_strategy_10, 1000, 0, {'from': accounts[0]})
+
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    assert fund_through_proxy.strategyRebalanceBands(profit_strategy_10) == (1000, 0)
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [16500000, 10000000, 5000000]
+    assert fund_through_proxy.totalInvested() == 31500000
+    assert fund_through_proxy.shouldRebalance() == False
+
+def test_rebalance_band_min_amount(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_drifted_strategies(fund_through_proxy, accounts, token, strategies)
+    fund_through_proxy.setRebalanceBand(0, 1000000, {'from': accounts[0]})
+
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    assert fund_through_proxy.rebalanceBand() == (0, 1000000)
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [15427500, 10000000, 5000000]
+
+def test_rebalance_plan(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_drifted_strategies(fund_through_proxy, accounts, token, strategies)
+    fund_through_proxy.setRebalanceBand(500, 0, {'from': accounts[0]})
+
+    # the creator fee is not accrued yet, the total is 51500000
+    assert fund_through_proxy.getRebalancePlan() == [
+        (profit_strategy_10, 16500000, 15450000, 1050000, 0, False),
+        (profit_strategy_50, 10000000, 10300000, 0, 0, True),
+        (profit_strategy_80, 5000000, 5150000, 0, 0, True),
+    ]
+
+    fund_through_proxy.setRebalanceBand(0, 0, {'from': accounts[0]})
+    plan = fund_through_proxy.getRebalancePlan()
+    assert [transfer[3:] for transfer in plan] == [(1050000, 0, False), (0, 300000, False), (0, 150000, False)]
+
+def test_remove_strategy_clears_band(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    setup_drifted_strategies(fund_through_proxy, accounts, token, [profit_strategy_10, profit_strategy_50, profit_strategy_80])
+    fund_through_proxy.setStrategyRebalanceBand(profit_strategy_80, 100, 10, {'from': accounts[0]})
+
+    fund_through_proxy.removeStrategy(profit_strategy_80, {'from': accounts[0]})
+
+    assert fund_through_proxy.strategyRebalanceBands(profit_strategy_80) == (0, 0)
+
+def test_rebalance_band_limits(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    setup_drifted_strategies(fund_through_proxy, accounts, token, [profit_strategy_10, profit_strategy_50])
+
+    with brownie.reverts("Value greater than 100%"):
+        fund_through_proxy.setRebalanceBand(10001, 0, {'from': accounts[0]})
+    with brownie.reverts("Value greater than 100%"):
+        fund_through_proxy.setStrategyRebalanceBand(profit_strategy_10, 10001, 0, {'from': accounts[0]})
+    with brownie.reverts("This strategy is not active in this fund"):
+        fund_through_proxy.setStrategyRebalanceBand(profit_strategy_80, 100, 0, {'from': accounts[0]})
+    with brownie.reverts("Not governance nor fund manager"):
+        fund_through_proxy.setRebalanceBand(100, 0, {'from': accounts[1]})
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+def setup_reserve_policy(fund_through_proxy, accounts, token, strategies):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+
+    for strategy, weightage in zip(strategies, [3000, 2000, 1000]):
+        token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), strategy, {'from': accounts[0]})
+        fund_through_proxy.addStrategy(strategy, weightage, 500, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    # the first hard work leaves 40% in the fund, above the ceiling
+    fund_through_proxy.setReservePolicy(2000, 1000, 3000, {'from': accounts[0]})
+
+def test_hard_work_sweeps_reserve_above_ceiling(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_reserve_policy(fund_through_proxy, accounts, token, strategies)
+
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    # the excess over the 20% target is split between the strategies by weightage
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [19999999, 13333333, 6666666]
+    assert token.balanceOf(fund_through_proxy) == 10000002
+    assert fund_through_proxy.reserveCoverage(1000000) == 10
+    assert fund_through_proxy.totalValueLocked() == 50000000
+
+def test_hard_work_keeps_reserve_within_band(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_reserve_policy(fund_through_proxy, accounts, token, strategies)
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    fund_through_proxy.deposit(2000000, {'from': accounts[1]})
+    tx = fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    assert "InvestInStrategy" not in tx.events
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [19999999, 13333333, 6666666]
+    assert token.balanceOf(fund_through_proxy) == 12000002
+
+def test_hard_work_refills_reserve_below_floor(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    setup_reserve_policy(fund_through_proxy, accounts, token, strategies)
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    # served from the reserve without touching the strategies
+    fund_through_proxy.withdraw(9000000, {'from': accounts[1]})
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [19999999, 13333333, 6666666]
+    assert fund_through_proxy.reserveCoverage(1000000) == 1
+
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    assert [strategy.investedUnderlyingBalance() for strategy in strategies] == [16400000, 10933334, 5466667]
+    assert token.balanceOf(fund_through_proxy) == 8199999
+    assert fund_through_proxy.totalValueLocked() == 41000000
+
+def test_reserve_policy_limits(fund_through_proxy, accounts):
+    with brownie.reverts("Value greater than 100%"):
+        fund_through_proxy.setReservePolicy(2000, 1000, 10001, {'from': accounts[0]})
+    with brownie.reverts("Reserve target must be between floor and ceiling"):
+        fund_through_proxy.setReservePolicy(500, 1000, 3000, {'from': accounts[0]})
+    with brownie.reverts("Reserve target must be between floor and ceiling"):
+        fund_through_proxy.setReservePolicy(4000, 1000, 3000, {'from': accounts[0]})
+    with brownie.reverts("Not governance nor fund manager"):
+        fund_through_proxy.setReservePolicy(2000, 1000, 3000, {'from': accounts[1]})
+    with brownie.reverts("Withdrawal size must be greater than 0"):
+        fund_through_proxy.reserveCoverage(0)
+
+    fund_through_proxy.setReservePolicy(2000, 1000, 3000, {'from': accounts[0]})
+    assert fund_through_proxy.reservePolicy() == (2000, 1000, 3000)
+    assert fund_through_proxy.performanceFeeFund() == 0
+    assert fund_through_proxy.maxInvestmentInStrategies() == 9000
@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+def test_strategy_record(fund_through_proxy, accounts, profit_strategy_10):
+    tx = fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+
+    assert fund_through_proxy.getStrategy(profit_strategy_10) == [5000, 500, tx.timestamp, 0, 0]
+    assert fund_through_proxy.strategies(profit_strategy_10) == [5000, 500, tx.timestamp, 0, 0]
+
+def test_remove_first_strategy_moves_last_strategy(fund_through_proxy, accounts, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_80, 1000, 500, {'from': accounts[0]})
+    fund_through_proxy.removeStrategy(profit_strategy_10, {'from': accounts[0]})
+
+    assert fund_through_proxy.getStrategyList() == [profit_strategy_80, profit_strategy_50]
+    assert fund_through_proxy.getStrategy(profit_strategy_80)[4] == 0
+    assert fund_through_proxy.getStrategy(profit_strategy_50)[4] == 1
+    assert fund_through_proxy.getStrategy(profit_strategy_10) == [0, 0, 0, 0, 0]
+
+def test_remove_last_strategy(fund_through_proxy, accounts, profit_strategy_10, profit_strategy_50):
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 500, {'from': accounts[0]})
+    fund_through_proxy.removeStrategy(profit_strategy_50, {'from': accounts[0]})
+
+    assert fund_through_proxy.getStrategyList() == [profit_strategy_10]
+    assert fund_through_proxy.getStrategy(profit_strategy_10)[4] == 0
+
+def test_preserve_strategy_order_disabled_by_default(fund_through_proxy):
+    assert fund_through_proxy.preserveStrategyOrder() == False
+
+def test_set_preserve_strategy_order_from_random_account(fund_through_proxy, accounts):
+    with brownie.reverts("Not governance nor fund manager"):
+        fund_through_proxy.setPreserveStrategyOrder(True, {'from': accounts[3]})
+
+def test_remove_first_strategy_preserving_order(fund_through_proxy, accounts, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    fund_through_proxy.setPreserveStrategyOrder(True, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_80, 1000, 500, {'from': accounts[0]})
+    fund_through_proxy.removeStrategy(profit_strategy_10, {'from': accounts[0]})
+
+    assert fund_through_proxy.getStrategyList() == [profit_strategy_50, profit_strategy_80]
+    assert fund_through_proxy.getStrategy(profit_strategy_50)[4] == 0
+    assert fund_through_proxy.getStrategy(profit_strategy_80)[4] == 1
+
+def test_hard_work_after_remove_strategy(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 50000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_80, 1000, 500, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    fund_through_proxy.removeStrategy(profit_strategy_10, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    assert profit_strategy_10.investedUnderlyingBalance() == 0
+    assert profit_strategy_50.investedUnderlyingBalance() == 20/100 * 50000000
+    assert profit_strategy_80.investedUnderlyingBalance() == 10/100 * 50000000
+    assert fund_through_proxy.getStrategy(profit_strategy_50)[3] == 20/100 * 50000000
+    assert fund_through_proxy.getStrategy(profit_strategy_80)[3] == 10/100 * 50000000
+
+def test_strategy_records_after_upgrade(fund_factory, fund, fund_2, token, accounts):
+    tx = fund_factory.createFund(fund, token, "Mudrex Generic Fund", "MDXGF", {'from': accounts[0]})
+    fund_proxy = brownie.FundProxy.at(tx.new_contracts[0])
+    fund_through_proxy = brownie.Fund.at(tx.new_contracts[0])
+    strategy = brownie.ProfitStrategy.deploy(fund_through_proxy, 1000, {'from': accounts[0]})
+
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 50000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+    fund_through_proxy.addStrategy(strategy, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    strategy_record = fund_through_proxy.getStrategy(strategy)
+
+    fund_proxy.upgrade(fund_2, {'from': accounts[0]})
+
+    assert fund_through_proxy.getStrategy(strategy) == strategy_record
+    assert fund_through_proxy.getStrategyList() == [strategy]
+    assert fund_through_proxy.totalValueLocked() == 50000000
+
+# storage slots of Fund after the inherited contracts: Initializable 0, ContextUpgradeable 1-50,
+# ERC20Upgradeable 51-100, ReentrancyGuardUpgradeable 101-150, FundStorage 151-200
+LEGACY_STRATEGIES_SLOT = 201
+STRATEGY_LIST_SLOT = 202
+STRATEGIES_SLOT = 205
+
+def mapping_slot(key, slot):
+    return int.from_bytes(brownie.web3.keccak(bytes.fromhex(str(key)[2:].rjust(64, "0")) + slot.to_bytes(32, "big")), "big")
+
+def read_storage(contract, slot):
+    return int.from_bytes(brownie.web3.eth.get_storage_at(contract.address, slot), "big")
+
+def test_finalize_upgrade_migrates_unpacked_strategy_records(FundStorageLegacyWriter, fund_factory, fund, token, accounts):
+    tx = fund_factory.createFund(fund, token, "Mudrex Generic Fund", "MDXGF", {'from': accounts[0]})
+    fund_proxy = brownie.FundProxy.at(tx.new_contracts[0])
+    fund_through_proxy = brownie.Fund.at(tx.new_contracts[0])
+    strategies = [brownie.ProfitStrategy.deploy(fund_through_proxy, profit_perc, {'from': accounts[0]}) for profit_perc in [1000, 5000]]
+    for strategy in strategies:
+        fund_through_proxy.addStrategy(strategy, 2000, 500, {'from': accounts[0]})
+    # the slots are right if they hold the length of the strategy list and the packed records
+    assert read_storage(fund_through_proxy, STRATEGY_LIST_SLOT) == 2
+    assert all(read_storage(fund_through_proxy, mapping_slot(strategy, STRATEGIES_SLOT)) != 0 for strategy in strategies)
+
+    # turn the records into the unpacked layout: weightage, performance fee, activation, last balance, index in list
+    legacy_records = {strategies[0]: [5000, 300, 1620000000, 20000000, 7], strategies[1]: [2500, 1000, 1620000100, 5000000, 3]}
+    slots, values = [], []
+    for strategy, record in legacy_records.items():
+        base = mapping_slot(strategy, LEGACY_STRATEGIES_SLOT)
+        slots += [base + i for i in range(5)] + [mapping_slot(strategy, STRATEGIES_SLOT)]
+        values += record + [0]
+    total_last_balance_slot = int.from_bytes(brownie.web3.keccak(text="eip1967.mesh.finance.fundStorage.totalLastBalance"), "big") - 1
+    slots.append(total_last_balance_slot)
+    values.append(0)
+    fund_proxy.upgrade(FundStorageLegacyWriter.deploy({'from': accounts[0]}), {'from': accounts[0]})
+    FundStorageLegacyWriter.at(fund_proxy.address).writeSlots(slots, values, {'from': accounts[0]})
+
+    fund_proxy.upgrade(fund, {'from': accounts[0]})
+
+    # the index in list is rebuilt from the position in the strategy list
+    assert fund_through_proxy.getStrategy(strategies[0]) == [5000, 300, 1620000000, 20000000, 0]
+    assert fund_through_proxy.getStrategy(strategies[1]) == [2500, 1000, 1620000100, 5000000, 1]
+    assert read_storage(fund_through_proxy, total_last_balance_slot) == 25000000
+    for strategy in strategies:
+        base = mapping_slot(strategy, LEGACY_STRATEGIES_SLOT)
+        assert [read_storage(fund_through_proxy, base + i) for i in range(5)] == [0] * 5
@@ -62,7 +62,8 @@ def test_withdrawal_with_withdrawal_fee(fund_through_proxy, accounts, token):
 
     assert fund_through_proxy.balanceOf(accounts[1]) == 0
     assert token.balanceOf(accounts[1]) == intial_balance_for_account - expected_fee
-    assert token.balanceOf(accounts[0]) == intial_balance_for_governance + expected_fee
+    assert token.balanceOf(accounts[0]) == intial_balance_for_governance
+    assert fund_through_proxy.accruedFees(accounts[0]) == expected_fee
 
 def test_withdrawal_event_fires(fund_through_proxy, accounts, token):
     token.mint(accounts[1], 10000000, {'from': accounts[0]})
@@ -96,4 +97,4 @@ def test_withdrawal_with_withdrawal_fee_and_changed_rewards(fund_through_proxy,
     assert fund_through_proxy.balanceOf(accounts[1]) == 0
     assert token.balanceOf(accounts[1]) == intial_balance_for_account - expected_fee
     assert token.balanceOf(accounts[0]) == intial_balance_for_governance
-    assert token.balanceOf(accounts[5]) == expected_fee
+    assert fund_through_proxy.accruedFees(accounts[5]) == expected_fee
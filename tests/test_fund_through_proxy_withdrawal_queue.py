@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+def setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 50000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_80, 1000, 500, {'from': accounts[0]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+def test_withdrawal_queue_empty_by_default(fund_through_proxy):
+    assert fund_through_proxy.getWithdrawalQueue() == []
+
+def test_set_withdrawal_queue(fund_through_proxy, accounts, profit_strategy_10, profit_strategy_50):
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 500, {'from': accounts[0]})
+    fund_through_proxy.setWithdrawalQueue([profit_strategy_50, profit_strategy_10], [10, 20], {'from': accounts[0]})
+
+    assert fund_through_proxy.getWithdrawalQueue() == [profit_strategy_50, profit_strategy_10]
+    assert fund_through_proxy.withdrawalCostHint(profit_strategy_50) == 10
+    assert fund_through_proxy.withdrawalCostHint(profit_strategy_10) == 20
+
+def test_set_withdrawal_queue_from_random_account(fund_through_proxy, accounts, profit_strategy_10):
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+
+    with brownie.reverts("Not governance nor fund manager"):
+        fund_through_proxy.setWithdrawalQueue([profit_strategy_10], [10], {'from': accounts[3]})
+
+def test_set_withdrawal_queue_inactive_strategy(fund_through_proxy, accounts, profit_strategy_10):
+    with brownie.reverts("This strategy is not active in this fund"):
+        fund_through_proxy.setWithdrawalQueue([profit_strategy_10], [10], {'from': accounts[0]})
+
+def test_set_withdrawal_queue_duplicate_strategy(fund_through_proxy, accounts, profit_strategy_10):
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+
+    with brownie.reverts("Strategy is already in the queue"):
+        fund_through_proxy.setWithdrawalQueue([profit_strategy_10, profit_strategy_10], [10, 10], {'from': accounts[0]})
+
+def test_set_withdrawal_queue_not_ordered_by_cost(fund_through_proxy, accounts, profit_strategy_10, profit_strategy_50):
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 500, {'from': accounts[0]})
+
+    with brownie.reverts("Withdrawal queue must be ordered by cost"):
+        fund_through_proxy.setWithdrawalQueue([profit_strategy_50, profit_strategy_10], [20, 10], {'from': accounts[0]})
+
+def test_set_withdrawal_queue_length_mismatch(fund_through_proxy, accounts, profit_strategy_10):
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+
+    with brownie.reverts("Queue and cost hints must have the same length"):
+        fund_through_proxy.setWithdrawalQueue([profit_strategy_10], [10, 20], {'from': accounts[0]})
+
+def test_withdrawal_follows_queue(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80)
+    fund_through_proxy.setWithdrawalQueue([profit_strategy_80, profit_strategy_10], [10, 20], {'from': accounts[0]})
+
+    fund_through_proxy.withdraw(30000000, {'from': accounts[1]})
+
+    # 10000000 from the fund, the remaining 20000000 from the queue in order
+    assert token.balanceOf(accounts[1]) == 50000000 + 30000000
+    assert profit_strategy_80.investedUnderlyingBalance() == 0
+    assert profit_strategy_10.investedUnderlyingBalance() == 25000000 - 15000000
+    assert profit_strategy_50.investedUnderlyingBalance() == 10000000
+    assert fund_through_proxy.getStrategy(profit_strategy_10)[3] == 25000000 - 15000000
+    assert fund_through_proxy.getStrategy(profit_strategy_80)[3] == 0
+
+def test_withdrawal_without_queue_is_pro_rata(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80)
+    fund_through_proxy.setWithdrawalQueue([profit_strategy_80], [10], {'from': accounts[0]})
+    fund_through_proxy.setWithdrawalQueue([], [], {'from': accounts[0]})
+
+    fund_through_proxy.withdraw(30000000, {'from': accounts[1]})
+
+    # the shortfall of 20000000 is split by the weightages out of the 80% in the strategies
+    assert token.balanceOf(accounts[1]) == 50000000 + 30000000
+    assert profit_strategy_10.investedUnderlyingBalance() == 25000000 - 50/80 * 20000000
+    assert profit_strategy_50.investedUnderlyingBalance() == 10000000 - 20/80 * 20000000
+    assert profit_strategy_80.investedUnderlyingBalance() == 5000000 - 10/80 * 20000000
+
+def test_withdrawal_beyond_queue_falls_back_to_other_strategies(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80)
+    fund_through_proxy.setWithdrawalQueue([profit_strategy_80], [10], {'from': accounts[0]})
+
+    fund_through_proxy.withdraw(30000000, {'from': accounts[1]})
+
+    # 10000000 from the fund, 5000000 from the queue, the remaining 15000000 from the first strategy of the list
+    assert token.balanceOf(accounts[1]) == 50000000 + 30000000
+    assert profit_strategy_80.investedUnderlyingBalance() == 0
+    assert profit_strategy_10.investedUnderlyingBalance() == 25000000 - 15000000
+    assert profit_strategy_50.investedUnderlyingBalance() == 10000000
+    assert fund_through_proxy.getStrategy(profit_strategy_10)[3] == 25000000 - 15000000
+
+def test_withdrawal_after_queued_strategy_removed(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    setup_invested_fund(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80)
+    fund_through_proxy.setWithdrawalQueue([profit_strategy_80, profit_strategy_10], [10, 20], {'from': accounts[0]})
+    fund_through_proxy.removeStrategy(profit_strategy_80, {'from': accounts[0]})
+
+    fund_through_proxy.withdraw(45000000, {'from': accounts[1]})
+
+    # the removed strategy returned its 5000000 to the fund, the queue covers 25000000 and the strategy out of it the rest
+    assert fund_through_proxy.getWithdrawalQueue() == [profit_strategy_10]
+    assert token.balanceOf(accounts[1]) == 50000000 + 45000000
+    assert profit_strategy_10.investedUnderlyingBalance() == 0
+    assert profit_strategy_50.investedUnderlyingBalance() == 10000000 - 5000000
+    assert fund_through_proxy.getStrategy(profit_strategy_50)[3] == 10000000 - 5000000
+
+def test_remove_strategy_removes_it_from_queue(fund_through_proxy, accounts, profit_strategy_10, profit_strategy_50, profit_strategy_80):
+    fund_through_proxy.addStrategy(profit_strategy_10, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_50, 2000, 500, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(profit_strategy_80, 1000, 500, {'from': accounts[0]})
+    fund_through_proxy.setWithdrawalQueue([profit_strategy_80, profit_strategy_10, profit_strategy_50], [10, 20, 30], {'from': accounts[0]})
+
+    fund_through_proxy.removeStrategy(profit_strategy_80, {'from': accounts[0]})
+
+    assert fund_through_proxy.getWithdrawalQueue() == [profit_strategy_10, profit_strategy_50]
+    assert fund_through_proxy.withdrawalCostHint(profit_strategy_80) == 0
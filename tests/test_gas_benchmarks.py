@@ -0,0 +1,216 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+from scripts.gas_profiler import GasProfile
+
+# run with: brownie test tests/test_gas_benchmarks.py --network development
+pytestmark = pytest.mark.require_network("development")
+
+STRATEGY_COUNTS = [1, 2, 5, 10, 20]
+MAX_INVESTMENT_IN_STRATEGIES = 9000
+DEPOSIT_AMOUNT = 100000000
+
+def benchmark_name(method, strategy_count, variant=None):
+    label = f"Fund.{method}"
+    if variant:
+        label += f"[{variant}]"
+    return f"{label}[strategies={strategy_count}]"
+
+def create_fund_with_strategies(fund_factory, fund, token, accounts, strategy_count, add_last=True):
+    tx = fund_factory.createFund(fund, token, "Mudrex Benchmark Fund", "MDXBF", {'from': accounts[0]})
+    fund_through_proxy = brownie.Fund.at(tx.new_contracts[0])
+
+    weightage = MAX_INVESTMENT_IN_STRATEGIES // strategy_count
+    strategies = []
+    for i in range(strategy_count):
+        strategy = brownie.ProfitStrategy.deploy(fund_through_proxy, 1000, {'from': accounts[0]})
+        token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), strategy, {'from': accounts[0]})
+        if add_last or i < strategy_count - 1:
+            fund_through_proxy.addStrategy(strategy, weightage, 500, {'from': accounts[0]})
+        strategies.append(strategy)
+    return fund_through_proxy, strategies
+
+def deposit(fund_through_proxy, token, account, amount):
+    token.mint(account, amount, {'from': brownie.accounts[0]})
+    token.approve(fund_through_proxy, amount, {'from': account})
+    return fund_through_proxy.deposit(amount, {'from': account})
+
+def generate_profit(strategies):
+    for strategy in strategies:
+        strategy.investAllUnderlying({'from': brownie.accounts[0]})
+
+
+@pytest.mark.parametrize("strategy_count", STRATEGY_COUNTS)
+def test_benchmark_strategy_management(fund_factory, fund, token, accounts, gas_recorder, strategy_count):
+    fund_through_proxy, strategies = create_fund_with_strategies(fund_factory, fund, token, accounts, strategy_count, add_last=False)
+    weightage = MAX_INVESTMENT_IN_STRATEGIES // strategy_count
+
+    tx = fund_through_proxy.addStrategy(strategies[-1], weightage, 500, {'from': accounts[0]})
+    gas_recorder.record(benchmark_name("addStrategy", strategy_count), tx)
+
+    tx = fund_through_proxy.updateStrategyWeightage(strategies[0], weightage - 1, {'from': accounts[0]})
+    gas_recorder.record(benchmark_name("updateStrategyWeightage", strategy_count), tx)
+
+    tx = fund_through_proxy.updateStrategyPerformanceFee(strategies[0], 100, {'from': accounts[0]})
+    gas_recorder.record(benchmark_name("updateStrategyPerformanceFee", strategy_count), tx)
+
+    # removing the first strategy is the worst case for the strategy list
+    tx = fund_through_proxy.removeStrategy(strategies[0], {'from': accounts[0]})
+    gas_recorder.record(benchmark_name("removeStrategy", strategy_count), tx)
+
+
+@pytest.mark.parametrize("strategy_count", STRATEGY_COUNTS)
+def test_benchmark_deposit(fund_factory, fund, token, accounts, gas_recorder, strategy_count):
+    fund_through_proxy, strategies = create_fund_with_strategies(fund_factory, fund, token, accounts, strategy_count)
+
+    tx = deposit(fund_through_proxy, token, accounts[1], DEPOSIT_AMOUNT)
+    gas_recorder.record(benchmark_name("deposit", strategy_count, "first"), tx)
+
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    generate_profit(strategies)
+
+    tx = deposit(fund_through_proxy, token, accounts[2], DEPOSIT_AMOUNT)
+    gas_recorder.record(benchmark_name("deposit", strategy_count, "invested"), tx)
+
+    token.mint(accounts[3], DEPOSIT_AMOUNT, {'from': accounts[0]})
+    token.approve(fund_through_proxy, DEPOSIT_AMOUNT, {'from': accounts[3]})
+    tx = fund_through_proxy.depositFor(DEPOSIT_AMOUNT, accounts[4], {'from': accounts[3]})
+    gas_recorder.record(benchmark_name("depositFor", strategy_count, "invested"), tx)
+
+
+@pytest.mark.parametrize("rebalance", [True, False])
+@pytest.mark.parametrize("strategy_count", STRATEGY_COUNTS)
+def test_benchmark_hard_work(fund_factory, fund, token, accounts, gas_recorder, strategy_count, rebalance):
+    fund_through_proxy, strategies = create_fund_with_strategies(fund_factory, fund, token, accounts, strategy_count)
+    fund_through_proxy.setPerformanceFeeFund(500, {'from': accounts[0]})
+    fund_through_proxy.setPlatformFee(100, {'from': accounts[0]})
+    deposit(fund_through_proxy, token, accounts[1], DEPOSIT_AMOUNT)
+
+    variant = "rebalance" if rebalance else "no_rebalance"
+
+    # first hard work always rebalances as adding strategies sets the rebalance flag
+    tx = fund_through_proxy.doHardWork({'from': accounts[0]})
+    gas_recorder.record(benchmark_name("doHardWork", strategy_count, "first"), tx)
+
+    generate_profit(strategies)
+    deposit(fund_through_proxy, token, accounts[2], DEPOSIT_AMOUNT)
+    fund_through_proxy.setShouldRebalance(rebalance, {'from': accounts[0]})
+
+    tx = fund_through_proxy.doHardWork({'from': accounts[0]})
+    gas_recorder.record(benchmark_name("doHardWork", strategy_count, variant), tx)
+
+
+CHUNK_SIZE = 5
+
+@pytest.mark.parametrize("rebalance", [True, False])
+@pytest.mark.parametrize("strategy_count", [10, 20])
+def test_benchmark_hard_work_chunks(fund_factory, fund, token, accounts, gas_recorder, strategy_count, rebalance):
+    fund_through_proxy, strategies = create_fund_with_strategies(fund_factory, fund, token, accounts, strategy_count)
+    fund_through_proxy.setPerformanceFeeFund(500, {'from': accounts[0]})
+    fund_through_proxy.setPlatformFee(100, {'from': accounts[0]})
+    deposit(fund_through_proxy, token, accounts[1], DEPOSIT_AMOUNT)
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    generate_profit(strategies)
+    deposit(fund_through_proxy, token, accounts[2], DEPOSIT_AMOUNT)
+    fund_through_proxy.setShouldRebalance(rebalance, {'from': accounts[0]})
+
+    # the most expensive chunk bounds the gas of a hard work cycle
+    gas_used = []
+    for start in range(0, strategy_count, CHUNK_SIZE):
+        tx = fund_through_proxy.doHardWorkChunk(start, min(start + CHUNK_SIZE, strategy_count), {'from': accounts[0]})
+        gas_used.append(tx.gas_used)
+    variant = "rebalance" if rebalance else "no_rebalance"
+    gas_recorder.record(benchmark_name(f"doHardWorkChunk[chunk={CHUNK_SIZE}]", strategy_count, variant), max(gas_used))
+
+
+def test_benchmark_pps_checkpoint(fund_factory, fund, token, accounts, gas_recorder):
+    fund_through_proxy, strategies = create_fund_with_strategies(fund_factory, fund, token, accounts, 1)
+    deposit(fund_through_proxy, token, accounts[1], DEPOSIT_AMOUNT)
+
+    # the first checkpoint writes an empty slot, the most expensive case
+    profile = GasProfile()
+    profile.add(fund_through_proxy.doHardWork({'from': accounts[0]}))
+    checkpoint_gas = sum(inclusive for name, (_, inclusive) in profile.by_function().items() if name.endswith("._writePpsCheckpoint"))
+    gas_recorder.record("Fund.doHardWork[pps_checkpoint]", checkpoint_gas)
+
+    # a single SSTORE, the count is stored with the state slot
+    assert 20000 < checkpoint_gas < 25000
+
+
+@pytest.mark.parametrize("strategy_count", STRATEGY_COUNTS)
+def test_benchmark_withdraw(fund_factory, fund, token, accounts, gas_recorder, strategy_count):
+    fund_through_proxy, strategies = create_fund_with_strategies(fund_factory, fund, token, accounts, strategy_count)
+    deposit(fund_through_proxy, token, accounts[1], DEPOSIT_AMOUNT)
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    generate_profit(strategies)
+
+    # small withdrawal served from the underlying kept in the fund
+    tx = fund_through_proxy.withdraw(DEPOSIT_AMOUNT // 100, {'from': accounts[1]})
+    gas_recorder.record(benchmark_name("withdraw", strategy_count, "from_fund"), tx)
+
+    # large withdrawal that has to pull from the strategies
+    tx = fund_through_proxy.withdraw(DEPOSIT_AMOUNT // 2, {'from': accounts[1]})
+    gas_recorder.record(benchmark_name("withdraw", strategy_count, "from_strategies"), tx)
+
+
+@pytest.mark.parametrize("strategy_count", STRATEGY_COUNTS)
+def test_benchmark_views(fund_factory, fund, token, accounts, gas_recorder, strategy_count):
+    fund_through_proxy, strategies = create_fund_with_strategies(fund_factory, fund, token, accounts, strategy_count)
+    deposit(fund_through_proxy, token, accounts[1], DEPOSIT_AMOUNT)
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+    gas_recorder.record(benchmark_name("getPricePerShare", strategy_count), fund_through_proxy.getPricePerShare.estimate_gas())
+    gas_recorder.record(benchmark_name("totalValueLocked", strategy_count), fund_through_proxy.totalValueLocked.estimate_gas())
+    gas_recorder.record(benchmark_name("underlyingBalanceWithInvestmentForHolder", strategy_count),
+        fund_through_proxy.underlyingBalanceWithInvestmentForHolder.estimate_gas(accounts[1]))
+
+
+@pytest.mark.parametrize("strategy_count", STRATEGY_COUNTS)
+def test_benchmark_withdraw_queue_against_pro_rata(fund_factory, fund, token, accounts, gas_recorder, strategy_count):
+    gas_used = {}
+    for variant in ["pro_rata", "queue"]:
+        fund_through_proxy, strategies = create_fund_with_strategies(fund_factory, fund, token, accounts, strategy_count)
+        if variant == "queue":
+            fund_through_proxy.setWithdrawalQueue(strategies, list(range(1, strategy_count + 1)), {'from': accounts[0]})
+        deposit(fund_through_proxy, token, accounts[1], DEPOSIT_AMOUNT)
+        fund_through_proxy.doHardWork({'from': accounts[0]})
+
+        tx = fund_through_proxy.withdraw(DEPOSIT_AMOUNT // 2, {'from': accounts[1]})
+        gas_used[variant] = gas_recorder.record(benchmark_name("withdraw", strategy_count, f"from_strategies_{variant}"), tx)
+
+    if strategy_count > 1:
+        assert gas_used["queue"] < gas_used["pro_rata"]
+
+
+@pytest.mark.parametrize("fund_count", [1, 5])
+def test_benchmark_create_fund_proxy_against_beacon(fund_factory, fund, token, accounts, gas_recorder, fund_count):
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    salts = ["0x" + i.to_bytes(32, "big").hex() for i in range(fund_count)]
+    names = [f"Mudrex Benchmark Fund {i}" for i in range(fund_count)]
+    symbols = [f"MDXBF{i}" for i in range(fund_count)]
+
+    gas_used = {"proxy": 0}
+    for name, symbol in zip(names, symbols):
+        tx = fund_factory.createFund(fund, token, name, symbol, {'from': accounts[0]})
+        gas_used["proxy"] += tx.gas_used
+    gas_recorder.record(f"FundFactory.createFund[funds={fund_count}]", gas_used["proxy"])
+
+    tx = fund_factory.createFunds(salts, [token] * fund_count, names, symbols, {'from': accounts[0]})
+    gas_used["beacon"] = gas_recorder.record(f"FundFactory.createFunds[funds={fund_count}]", tx)
+
+    assert gas_used["beacon"] < gas_used["proxy"]
+
+
+def test_benchmark_deposit_proxy_against_beacon(fund_factory, fund, token, accounts, gas_recorder):
+    # beacon funds read the implementation from the factory on every call
+    fund_factory.setFundImplementation(fund, {'from': accounts[0]})
+    tx = fund_factory.createFund(fund, token, "Mudrex Benchmark Fund", "MDXBF", {'from': accounts[0]})
+    fund_through_proxy = brownie.Fund.at(tx.new_contracts[0])
+    tx = fund_factory.createFundDeterministic("0x" + bytes(32).hex(), token, "Mudrex Benchmark Fund", "MDXBF", {'from': accounts[0]})
+    fund_through_beacon = brownie.Fund.at(tx.new_contracts[0])
+
+    for variant, created in [("proxy", fund_through_proxy), ("beacon", fund_through_beacon)]:
+        deposit(created, token, accounts[1], DEPOSIT_AMOUNT)
+        tx = deposit(created, token, accounts[1], DEPOSIT_AMOUNT)
+        gas_recorder.record(f"Fund.deposit[{variant}]", tx)
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+from scripts.gas_profiler import GasProfile, step_costs
+
+FUND, STRATEGY_1, STRATEGY_2 = "0x" + "f" * 40, "0x" + "1" * 40, "0x" + "2" * 40
+
+def synthetic_trace():
+    # doHardWork calls doHardWork on two strategies from an internal function, gasCost of CALL includes the forwarded gas
+    steps = [
+        (0, 0, "Fund.doHardWork", FUND, "PUSH1", 1000, 3),
+        (0, 1, "Fund.rebalanceStrategies", FUND, "JUMPDEST", 997, 1),
+        (0, 1, "Fund.rebalanceStrategies", FUND, "CALL", 996, 900),
+        (1, 0, "ProfitStrategy.doHardWork", STRATEGY_1, "SSTORE", 800, 500),
+        (1, 0, "ProfitStrategy.doHardWork", STRATEGY_1, "RETURN", 300, 0),
+        (0, 1, "Fund.rebalanceStrategies", FUND, "CALL", 290, 200),
+        (1, 0, "ProfitStrategy.doHardWork", STRATEGY_2, "SLOAD", 150, 100),
+        (1, 0, "ProfitStrategy.doHardWork", STRATEGY_2, "RETURN", 50, 0),
+        (0, 1, "Fund.rebalanceStrategies", FUND, "POP", 60, 2),
+        (0, 0, "Fund.doHardWork", FUND, "STOP", 58, 0),
+    ]
+    keys = ["depth", "jumpDepth", "fn", "address", "op", "gas", "gasCost"]
+    return [dict(zip(keys, step)) for step in steps]
+
+def test_step_costs_exclude_callees():
+    costs = list(step_costs(synthetic_trace()))
+
+    assert sum(gas for _, _, gas in costs) == 1000 - 58
+    # gas of the calls minus the gas used by the strategies
+    calls = [gas for _, opcode, gas in costs if opcode == "CALL"]
+    assert calls == [996 - 290 - 500, 290 - 60 - 100]
+
+def test_profile_by_function_and_strategy():
+    profile = GasProfile({STRATEGY_1: "strategy 1"})
+    profile.add_trace(synthetic_trace(), 21942)
+    profile.add_trace(synthetic_trace(), 21942)
+
+    assert profile.overhead == 2 * 21000
+    assert profile.by_function() == {
+        "Fund.doHardWork": (6, 1884),
+        "Fund.rebalanceStrategies": (678, 1878),
+        "ProfitStrategy.doHardWork[strategy 1]": (1000, 1000),
+        "ProfitStrategy.doHardWork": (200, 200),
+    }
+    rows = profile.by_strategy([STRATEGY_2, STRATEGY_1])
+    assert [(row["label"], row["gas"], row["gas_per_tx"]) for row in rows] == [("strategy 1", 1000, 500), (STRATEGY_2, 200, 100)]
+    assert profile.opcodes[("Fund.rebalanceStrategies", "CALL")] == 2 * 336
+    assert profile.collapsed_stacks() == [
+        "Fund.doHardWork 6",
+        "Fund.doHardWork;Fund.rebalanceStrategies 678",
+        "Fund.doHardWork;Fund.rebalanceStrategies;ProfitStrategy.doHardWork 200",
+        "Fund.doHardWork;Fund.rebalanceStrategies;ProfitStrategy.doHardWork[strategy 1] 1000",
+        "<intrinsic and refunds> 42000",
+    ]
+
+def test_profile_hard_work(fund_through_proxy, accounts, token, profit_strategy_10, profit_strategy_50, profit_strategy_80, tmp_path):
+    strategies = [profit_strategy_10, profit_strategy_50, profit_strategy_80]
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+    for strategy, weightage in zip(strategies, [3000, 2000, 1000]):
+        token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), strategy, {'from': accounts[0]})
+        fund_through_proxy.addStrategy(strategy, weightage, 500, {'from': accounts[0]})
+
+    profile = GasProfile({strategy: f"strategy {i}" for i, strategy in enumerate(strategies)})
+    txs = [fund_through_proxy.doHardWork({'from': accounts[0]})]
+    for strategy in strategies:
+        strategy.investAllUnderlying({'from': accounts[0]})
+    txs.append(fund_through_proxy.doHardWork({'from': accounts[0]}))
+    for tx in txs:
+        profile.add(tx)
+
+    assert profile.transactions == 2
+    assert profile.gas_used == sum(tx.gas_used for tx in txs)
+    assert sum(profile.stacks.values()) + profile.overhead == profile.gas_used
+    # the proxy delegates to the implementation
+    assert profile.by_function()["Fund.doHardWork"][1] > profile.gas_used // 2
+
+    rows = profile.by_strategy(strategies)
+    assert {row["strategy"] for row in rows} == {str(strategy) for strategy in strategies}
+    assert [row["gas"] for row in rows] == sorted([row["gas"] for row in rows], reverse=True)
+    for row in rows:
+        assert row["gas"] > 0
+        assert "ProfitStrategy.doHardWork" in row["functions"]
+
+    path = tmp_path / "hardwork.folded"
+    profile.write_flame_graph(path)
+    lines = path.read_text().splitlines()
+    assert any(line.startswith("FundProxy;Fund.doHardWork;") and "ProfitStrategy.doHardWork[strategy 2]" in line for line in lines)
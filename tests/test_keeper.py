@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+from scripts.fund_lens import fund_state
+from scripts.keeper import Keeper, NonceManager, estimate_hard_work, SECS_PER_YEAR
+
+PRICE = 10**30  # wei per underlying token, high enough for the fees of the tests to pay for the gas
+
+def create_invested_fund(fund_factory, fund, token, accounts, profit_perc=1000):
+    tx = fund_factory.createFund(fund, token, "Mudrex Generic Fund", "MDXGF", {'from': accounts[0]})
+    fund_through_proxy = brownie.Fund.at(tx.new_contracts[0])
+    strategy = brownie.ProfitStrategy.deploy(fund_through_proxy, profit_perc, {'from': accounts[0]})
+    token.grantRole(brownie.web3.keccak(text="MINTER_ROLE"), strategy, {'from': accounts[0]})
+    fund_through_proxy.addStrategy(strategy, 5000, 500, {'from': accounts[0]})
+    fund_through_proxy.setPerformanceFeeFund(500, {'from': accounts[0]})
+
+    token.mint(accounts[1], 100000000, {'from': accounts[0]})
+    token.approve(fund_through_proxy, 100000000, {'from': accounts[1]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    return fund_through_proxy, strategy
+
+def test_estimate_hard_work(fund_lens, fund_factory, fund, token, accounts):
+    fund_through_proxy, strategy = create_invested_fund(fund_factory, fund, token, accounts)
+    strategy.investAllUnderlying({'from': accounts[0]})
+    fund_through_proxy.deposit(50000000, {'from': accounts[1]})
+
+    state = fund_state(fund_through_proxy, lens=fund_lens)
+    estimate = estimate_hard_work(state, brownie.chain.time(), apr=0.1, interval=SECS_PER_YEAR)
+
+    expected_profit = 25000000 * 10 // 100
+    expected_strategy_creator_fee = expected_profit * 500 // 10000
+    # half of the new deposit goes to the strategy, the reserve of the first deposit stays in the fund
+    assert estimate.to_invest == 25000000
+    assert estimate.idle_yield == 2500000
+    assert estimate.profit == expected_profit
+    assert estimate.strategy_creator_fees == expected_strategy_creator_fee
+    assert estimate.fund_manager_fee == (expected_profit - expected_strategy_creator_fee) * 500 // 10000
+    assert estimate.platform_fee == 0
+    assert estimate.value == estimate.idle_yield + estimate.fees
+    assert not estimate.forced
+
+def test_estimate_hard_work_with_rebalance(fund_lens, fund_factory, fund, token, accounts):
+    fund_through_proxy, strategy = create_invested_fund(fund_factory, fund, token, accounts)
+    fund_through_proxy.updateStrategyWeightage(strategy, 8000, {'from': accounts[0]})
+
+    estimate = estimate_hard_work(fund_state(fund_through_proxy, lens=fund_lens), brownie.chain.time(), apr=0.1, interval=3600)
+
+    assert estimate.to_invest == 50000000 * 8000 // 10000 - 25000000
+    assert estimate.forced
+
+def test_estimate_hard_work_with_reserve_policy(fund_lens, fund_factory, fund, token, accounts):
+    fund_through_proxy, strategy = create_invested_fund(fund_factory, fund, token, accounts)
+    fund_through_proxy.setReservePolicy(2000, 1000, 3000, {'from': accounts[0]})
+
+    # the reserve of 25000000 is above the ceiling of 30% of 50000000, the strategy takes it down to the target
+    estimate = estimate_hard_work(fund_state(fund_through_proxy, lens=fund_lens), brownie.chain.time(), apr=0.1, interval=SECS_PER_YEAR)
+    assert estimate.to_invest == 25000000 - 10000000
+    assert estimate.to_refill == 0
+    assert not estimate.forced
+
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+    assert fund_state(fund_through_proxy, lens=fund_lens)["totalInvested"] == 25000000 + estimate.to_invest
+
+    # the withdrawal takes the reserve below the floor, the hard work refills it from the strategy
+    fund_through_proxy.withdraw(9000000, {'from': accounts[1]})
+    estimate = estimate_hard_work(fund_state(fund_through_proxy, lens=fund_lens), brownie.chain.time(), apr=0.1, interval=SECS_PER_YEAR)
+    assert estimate.to_invest == 0
+    assert estimate.idle_yield == 0
+    assert estimate.to_refill == 41000000 * 2000 // 10000 - 1000000
+    assert estimate.forced
+
+def test_keeper_runs_profitable_funds(fund_lens, fund_factory, fund, token, accounts):
+    profitable = [create_invested_fund(fund_factory, fund, token, accounts) for _ in range(2)]
+    idle, _ = create_invested_fund(fund_factory, fund, token, accounts)
+    for _, strategy in profitable:
+        strategy.investAllUnderlying({'from': accounts[0]})
+
+    funds = [fund_through_proxy for fund_through_proxy, _ in profitable] + [idle]
+    keeper = Keeper(accounts[0], funds, {token: PRICE}, lens=fund_lens, gas_price=10**9)
+    estimates, txs = keeper.run_once()
+
+    assert [estimate.should_run for estimate in estimates] == [True, True, False]
+    assert estimates[2].reason == "not profitable"
+    assert [tx.receiver for tx in txs] == [profitable[0][0], profitable[1][0]]
+    assert all(tx.status == 1 for tx in txs)
+    assert txs[1].nonce == txs[0].nonce + 1
+    for (fund_through_proxy, _), tx in zip(profitable, txs):
+        assert fund_through_proxy.lastHardworkTimestamp() == tx.timestamp
+        assert fund_through_proxy.accruedFees(accounts[0]) > 0
+
+def test_keeper_skips_when_gas_costs_more(fund_lens, fund_factory, fund, token, accounts):
+    fund_through_proxy, strategy = create_invested_fund(fund_factory, fund, token, accounts)
+    strategy.investAllUnderlying({'from': accounts[0]})
+
+    keeper = Keeper(accounts[0], [fund_through_proxy], {token: fund_through_proxy.underlyingUnit()}, lens=fund_lens, gas_price=10**9)
+    estimates, txs = keeper.run_once()
+
+    assert estimates[0].value_in_wei < estimates[0].gas_cost
+    assert not estimates[0].should_run
+    assert txs == []
+
+def test_keeper_forces_rebalance_and_overdue_funds(fund_lens, fund_factory, fund, token, accounts):
+    rebalancing, _ = create_invested_fund(fund_factory, fund, token, accounts)
+    overdue, _ = create_invested_fund(fund_factory, fund, token, accounts)
+    rebalancing.setShouldRebalance(True, {'from': accounts[0]})
+    brownie.chain.sleep(2 * 86400)
+    brownie.chain.mine()
+
+    keeper = Keeper(accounts[0], [rebalancing, overdue], {}, lens=fund_lens, gas_price=10**9, max_interval=86400)
+    estimates, txs = keeper.run_once()
+
+    assert [estimate.should_run for estimate in estimates] == [True, True]
+    assert len(txs) == 2
+    assert rebalancing.shouldRebalance() == False
+
+def test_keeper_skips_reverting_hard_work(fund_lens, fund_factory, fund, token, accounts):
+    fund_through_proxy, strategy = create_invested_fund(fund_factory, fund, token, accounts)
+    strategy.investAllUnderlying({'from': accounts[0]})
+
+    keeper = Keeper(accounts[3], [fund_through_proxy], {token: PRICE}, lens=fund_lens, gas_price=10**9)
+    estimates, txs = keeper.run_once()
+
+    assert estimates[0].gas is None
+    assert estimates[0].reason.startswith("hard work reverts")
+    assert txs == []
+
+def test_nonce_manager(accounts):
+    nonces = NonceManager(accounts[2])
+    start = accounts[2].nonce
+
+    assert [nonces.next(), nonces.next()] == [start, start + 1]
+    nonces.reset()
+    assert nonces.next() == start
@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+# the mocks stand in for the mainnet vaults: run with --network development
+pytestmark = pytest.mark.require_network("development")
+
+DEPOSIT_AMOUNT = 10**21
+
+@pytest.fixture(params=["yearn", "alpha"])
+def strategy_kind(request):
+    return request.param
+
+@pytest.fixture
+def strategy(request, strategy_kind):
+    return request.getfixturevalue(f"{strategy_kind}_strategy")
+
+@pytest.fixture
+def vault(request, strategy_kind):
+    return request.getfixturevalue("mock_yvault" if strategy_kind == "yearn" else "mock_abox")
+
+def add_yield(request, strategy_kind, yield_bps):
+    # the value of every vault share grows by yield_bps
+    if strategy_kind == "yearn":
+        yvault = request.getfixturevalue("mock_yvault")
+        yvault.addYield(yvault.totalAssets() * yield_bps // 10000, {'from': brownie.accounts[0]})
+    else:
+        ctoken = request.getfixturevalue("mock_ctoken")
+        ctoken.setExchangeRate(ctoken.exchangeRateStored() * (10000 + yield_bps) // 10000, {'from': brownie.accounts[0]})
+
+def invest(fund_through_proxy, token, strategy, accounts):
+    fund_through_proxy.addStrategy(strategy, 9000, 500, {'from': accounts[0]})
+    token.mint(accounts[1], DEPOSIT_AMOUNT, {'from': accounts[0]})
+    token.approve(fund_through_proxy, DEPOSIT_AMOUNT, {'from': accounts[1]})
+    fund_through_proxy.deposit(DEPOSIT_AMOUNT, {'from': accounts[1]})
+    fund_through_proxy.doHardWork({'from': accounts[0]})
+
+def test_hard_work_invests_in_vault(fund_through_proxy, token, strategy, vault, accounts):
+    invest(fund_through_proxy, token, strategy, accounts)
+
+    assert token.balanceOf(strategy) == 0
+    assert token.balanceOf(vault) == DEPOSIT_AMOUNT * 9 // 10
+    assert vault.balanceOf(strategy) == DEPOSIT_AMOUNT * 9 // 10
+    assert strategy.investedUnderlyingBalance() == DEPOSIT_AMOUNT * 9 // 10
+    assert fund_through_proxy.totalValueLocked() == DEPOSIT_AMOUNT
+
+def test_yield_raises_price_per_share(request, strategy_kind, fund_through_proxy, token, strategy, accounts):
+    invest(fund_through_proxy, token, strategy, accounts)
+    add_yield(request, strategy_kind, 1000)
+
+    assert strategy.investedUnderlyingBalance() == DEPOSIT_AMOUNT * 9 // 10 * 11 // 10
+    assert fund_through_proxy.totalValueLocked() == DEPOSIT_AMOUNT * 109 // 100
+    assert fund_through_proxy.getPricePerShare() > fund_through_proxy.underlyingUnit()
+
+def test_withdraw_to_fund(request, strategy_kind, fund_through_proxy, token, strategy, vault, accounts):
+    invest(fund_through_proxy, token, strategy, accounts)
+    add_yield(request, strategy_kind, 1000)
+    fund_balance = token.balanceOf(fund_through_proxy)
+
+    strategy.withdrawToFund(DEPOSIT_AMOUNT // 2, {'from': accounts[0]})
+    # vault shares are rounded down
+    assert abs(token.balanceOf(fund_through_proxy) - (fund_balance + DEPOSIT_AMOUNT // 2)) <= 2
+
+    strategy.withdrawAllToFund({'from': accounts[0]})
+    assert vault.balanceOf(strategy) == 0
+    assert token.balanceOf(strategy) == 0
+    assert strategy.investedUnderlyingBalance() == 0
+    assert abs(token.balanceOf(fund_through_proxy) - (DEPOSIT_AMOUNT * 109 // 100)) <= 2
+
+def test_fund_withdrawal_pulls_from_strategy(fund_through_proxy, token, strategy, accounts):
+    invest(fund_through_proxy, token, strategy, accounts)
+
+    fund_through_proxy.withdraw(DEPOSIT_AMOUNT // 2, {'from': accounts[1]})
+    assert token.balanceOf(accounts[1]) == DEPOSIT_AMOUNT // 2
+    # the reserve of DEPOSIT_AMOUNT // 10 is used first, the strategy covers the rest, vault shares are rounded down
+    assert abs(strategy.investedUnderlyingBalance() - DEPOSIT_AMOUNT // 2) <= 2
+
+def test_hard_work_keeps_liquidity_buffer(fund_through_proxy, token, strategy, vault, accounts):
+    strategy.setLiquidityBuffer(1000, {'from': accounts[0]})
+    invest(fund_through_proxy, token, strategy, accounts)
+
+    assert token.balanceOf(strategy) == DEPOSIT_AMOUNT * 9 // 100
+    assert vault.balanceOf(strategy) == DEPOSIT_AMOUNT * 81 // 100
+    assert strategy.investedUnderlyingBalance() == DEPOSIT_AMOUNT * 9 // 10
+
+def test_small_withdrawal_served_from_liquidity_buffer(fund_through_proxy, token, strategy, vault, accounts):
+    strategy.setLiquidityBuffer(1000, {'from': accounts[0]})
+    invest(fund_through_proxy, token, strategy, accounts)
+    shares = vault.balanceOf(strategy)
+
+    strategy.withdrawToFund(DEPOSIT_AMOUNT // 100, {'from': accounts[0]})
+
+    assert vault.balanceOf(strategy) == shares
+    assert token.balanceOf(strategy) == DEPOSIT_AMOUNT * 8 // 100
+    assert strategy.investedUnderlyingBalance() == DEPOSIT_AMOUNT * 89 // 100
+
+def test_large_withdrawal_refills_liquidity_buffer(fund_through_proxy, token, strategy, accounts):
+    strategy.setLiquidityBuffer(1000, {'from': accounts[0]})
+    invest(fund_through_proxy, token, strategy, accounts)
+    fund_balance = token.balanceOf(fund_through_proxy)
+
+    strategy.withdrawToFund(DEPOSIT_AMOUNT // 2, {'from': accounts[0]})
+
+    # vault shares are rounded down
+    assert abs(token.balanceOf(fund_through_proxy) - (fund_balance + DEPOSIT_AMOUNT // 2)) <= 2
+    assert abs(token.balanceOf(strategy) - DEPOSIT_AMOUNT * 4 // 100) <= 2
+    assert abs(strategy.investedUnderlyingBalance() - DEPOSIT_AMOUNT * 4 // 10) <= 2
+
+def test_liquidity_buffer_limits(strategy, accounts):
+    with brownie.reverts("Buffer greater than 100%"):
+        strategy.setLiquidityBuffer(10001, {'from': accounts[0]})
+    with brownie.reverts("The sender has to be the governance or fund"):
+        strategy.setLiquidityBuffer(1000, {'from': accounts[1]})
+
+def test_yearn_yield_accrues_over_time(fund_through_proxy, token, yearn_strategy, mock_yvault, accounts):
+    invest(fund_through_proxy, token, yearn_strategy, accounts)
+    # 1e-8 of the assets every second
+    mock_yvault.setYieldPerSecond(10**10, {'from': accounts[0]})
+    brownie.chain.sleep(86400)
+    brownie.chain.mine()
+
+    assert yearn_strategy.investedUnderlyingBalance() > DEPOSIT_AMOUNT * 9 // 10
+    mock_yvault.accrue({'from': accounts[0]})
+    assert mock_yvault.pendingYield() == 0
+    assert token.balanceOf(mock_yvault) > DEPOSIT_AMOUNT * 9 // 10
+
+def test_alpha_exchange_rate_accrues_over_time(fund_through_proxy, token, alpha_strategy, mock_ctoken, accounts):
+    invest(fund_through_proxy, token, alpha_strategy, accounts)
+    mock_ctoken.setSupplyRatePerSecond(10**10, {'from': accounts[0]})
+    brownie.chain.sleep(86400)
+    mock_ctoken.accrueInterest({'from': accounts[0]})
+
+    assert alpha_strategy.investedUnderlyingBalance() > DEPOSIT_AMOUNT * 9 // 10
+
+def test_yearn_emergency_shutdown_reverts_hard_work(fund_through_proxy, token, yearn_strategy, mock_yvault, accounts):
+    fund_through_proxy.addStrategy(yearn_strategy, 9000, 500, {'from': accounts[0]})
+    token.mint(yearn_strategy, DEPOSIT_AMOUNT, {'from': accounts[0]})
+    mock_yvault.setEmergencyShutdown(True, {'from': accounts[0]})
+
+    with brownie.reverts("Vault is emergency shutdown"):
+        yearn_strategy.doHardWork({'from': accounts[0]})
+
+def test_strategy_requires_vault_for_underlying(YearnV2StrategyLocal, MockYVaultV2, fund_through_proxy, token_2, accounts):
+    yvault = MockYVaultV2.deploy(token_2, {'from': accounts[0]})
+    with brownie.reverts("underlying not supported: yVault is for another token"):
+        YearnV2StrategyLocal.deploy(fund_through_proxy, yvault, {'from': accounts[0]})
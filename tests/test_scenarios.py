@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+import scenarios
+
+pytestmark = pytest.mark.scenario("funded_two_strategies_after_hardwork")
+
+@pytest.fixture(scope="module")
+def empty_world(scenario):
+    return scenario("empty_fund")
+
+def test_world_after_hardwork(world):
+    fund_through_proxy = world.fund_through_proxy
+
+    assert fund_through_proxy.totalValueLocked() == scenarios.DEPOSIT_AMOUNT
+    assert fund_through_proxy.balanceOf(world.holder) == scenarios.DEPOSIT_AMOUNT
+    assert fund_through_proxy.getStrategyList() == world.strategies
+    assert [strategy.investedUnderlyingBalance() for strategy in world.strategies] == [25000000, 10000000]
+
+def test_world_changed_by_test(world):
+    world.fund_through_proxy.withdraw(scenarios.DEPOSIT_AMOUNT, {'from': world.holder})
+
+    assert world.fund_through_proxy.totalValueLocked() == 0
+
+def test_world_reverted_for_next_test(world):
+    assert world.fund_through_proxy.totalValueLocked() == scenarios.DEPOSIT_AMOUNT
+
+def test_scenarios_use_separate_contracts(world, empty_world):
+    assert empty_world.fund_through_proxy != world.fund_through_proxy
+    assert empty_world.fund_through_proxy.getStrategyList() == []
+    assert empty_world.fund_through_proxy.totalSupply() == 0
+
+def test_world_is_cached_per_module(world, scenario):
+    assert scenario("funded_two_strategies_after_hardwork") is world
+
+def test_unknown_scenario(accounts):
+    with pytest.raises(KeyError):
+        scenarios.build("unknown", accounts)
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+
+import pytest, brownie
+
+# run with: brownie test tests/test_strategy_gas_benchmarks.py --network development
+pytestmark = pytest.mark.require_network("development")
+
+BALANCES = [10**18, 10**24]
+YIELDS_BPS = [0, 1000]
+
+def benchmark_name(contract, method, balance, yield_bps):
+    return f"{contract}.{method}[balance=1e{len(str(balance)) - 1}][yield_bps={yield_bps}]"
+
+def create_strategy(request, strategy_kind):
+    strategy = request.getfixturevalue(f"{strategy_kind}_strategy")
+    if strategy_kind == "yearn":
+        yvault = request.getfixturevalue("mock_yvault")
+        def add_yield(yield_bps):
+            yvault.addYield(yvault.totalAssets() * yield_bps // 10000, {'from': brownie.accounts[0]})
+    else:
+        ctoken = request.getfixturevalue("mock_ctoken")
+        def add_yield(yield_bps):
+            ctoken.setExchangeRate(ctoken.exchangeRateStored() * (10000 + yield_bps) // 10000, {'from': brownie.accounts[0]})
+    return strategy, add_yield
+
+
+@pytest.mark.parametrize("yield_bps", YIELDS_BPS)
+@pytest.mark.parametrize("balance", BALANCES)
+@pytest.mark.parametrize("strategy_kind", ["yearn", "alpha"])
+def test_benchmark_strategy(request, token, accounts, gas_recorder, strategy_kind, balance, yield_bps):
+    strategy, add_yield = create_strategy(request, strategy_kind)
+    contract = strategy._name
+
+    # the strategy is called by governance, as the fund would with the underlying it sent
+    token.mint(strategy, balance, {'from': accounts[0]})
+    tx = strategy.doHardWork({'from': accounts[0]})
+    gas_recorder.record(benchmark_name(contract, "doHardWork", balance, yield_bps), tx)
+    add_yield(yield_bps)
+
+    gas_recorder.record(benchmark_name(contract, "investedUnderlyingBalance", balance, yield_bps),
+        strategy.investedUnderlyingBalance.estimate_gas())
+
+    # a second hard work adds to an existing vault position
+    token.mint(strategy, balance, {'from': accounts[0]})
+    tx = strategy.doHardWork({'from': accounts[0]})
+    gas_recorder.record(benchmark_name(contract, "doHardWork[invested]", balance, yield_bps), tx)
+
+    tx = strategy.withdrawToFund(balance // 2, {'from': accounts[0]})
+    gas_recorder.record(benchmark_name(contract, "withdrawToFund", balance, yield_bps), tx)
+
+    tx = strategy.withdrawAllToFund({'from': accounts[0]})
+    gas_recorder.record(benchmark_name(contract, "withdrawAllToFund", balance, yield_bps), tx)
+    assert strategy.investedUnderlyingBalance() == 0
+
+
+@pytest.mark.parametrize("strategy_kind", ["yearn", "alpha"])
+def test_benchmark_withdraw_with_liquidity_buffer(request, token, accounts, gas_recorder, strategy_kind):
+    strategy, _ = create_strategy(request, strategy_kind)
+    contract = strategy._name
+    balance = BALANCES[-1]
+    token.mint(strategy, balance, {'from': accounts[0]})
+    strategy.doHardWork({'from': accounts[0]})
+
+    gas_used = {}
+    for buffer in [0, 500]:
+        strategy.setLiquidityBuffer(buffer, {'from': accounts[0]})
+        # a withdrawal large enough to pull from the vault, which refills the buffer
+        strategy.withdrawToFund(balance // 10, {'from': accounts[0]})
+        tx = strategy.withdrawToFund(balance // 100, {'from': accounts[0]})
+        gas_used[buffer] = gas_recorder.record(f"{contract}.withdrawToFund[small][buffer_bps={buffer}]", tx)
+
+    # served from the buffer without a vault redemption
+    assert gas_used[500] < gas_used[0]